@@ -0,0 +1,17 @@
+"""
+Micro-benchmarks of the computational hot paths of ``cogwheel``
+(waveform generation, likelihood evaluation, marginalization, priors).
+
+Benchmarks are classes with ``time_*`` methods, an optional ``setup``
+method and optional ``params`` / ``param_names`` attributes, following
+the conventions of airspeed velocity (``asv``), so they can be run with
+``asv`` by pointing its ``benchmark_dir`` to this directory. They can
+also be run without ``asv``, and the results saved and compared across
+commits::
+
+    python -m cogwheel.benchmarks.run --output <dirname>
+    python -m cogwheel.benchmarks.run --compare <old.json> <new.json>
+
+See ``cogwheel.benchmarks.run``. Events are synthetic (Gaussian noise
+plus an injection), so benchmarks do not require network access.
+"""
@@ -0,0 +1,43 @@
+"""Benchmarks of likelihood evaluations."""
+import itertools
+
+from cogwheel import likelihood
+from cogwheel.benchmarks import common
+from cogwheel.likelihood.marginalized_distance_phase import (
+    MarginalizedDistancePhaseLikelihood)
+
+LIKELIHOOD_CLASSES = {
+    cls.__name__: cls
+    for cls in [likelihood.RelativeBinningLikelihood,
+                likelihood.MarginalizedDistanceLikelihood,
+                MarginalizedDistancePhaseLikelihood,
+                likelihood.MarginalizedExtrinsicLikelihood,
+                likelihood.MarginalizedExtrinsicLikelihoodQAS]}
+
+# Approximants that the likelihood classes support, default otherwise:
+APPROXIMANTS = {'MarginalizedExtrinsicLikelihoodQAS': 'IMRPhenomXAS'}
+
+
+class LnLike:
+    """
+    Time ``.lnlike`` of relative-binning likelihoods, at parameters
+    that change between calls as they would during sampling.
+    """
+    params = (list(LIKELIHOOD_CLASSES),)
+    param_names = ('likelihood_class',)
+
+    def setup(self, likelihood_class):
+        """Instantiate the likelihood."""
+        approximant = APPROXIMANTS.get(likelihood_class, common.APPROXIMANT)
+        kwargs = common.get_likelihood_kwargs(approximant)
+        if likelihood_class.startswith('MarginalizedDistance'):
+            kwargs['lookup_table'] = common.get_lookup_table()
+
+        self.likelihood = LIKELIHOOD_CLASSES[likelihood_class](**kwargs)
+        self.par_dics = itertools.cycle(
+            {par: par_dic[par] for par in self.likelihood.params}
+            for par_dic in common.get_par_dics(approximant))
+
+    def time_lnlike(self, likelihood_class):
+        """Log likelihood."""
+        self.likelihood.lnlike(next(self.par_dics))
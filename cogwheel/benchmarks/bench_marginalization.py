@@ -0,0 +1,75 @@
+"""Benchmarks of the marginalization over extrinsic parameters."""
+import pathlib
+import tempfile
+
+from cogwheel import likelihood
+from cogwheel.benchmarks import common
+from cogwheel.likelihood.marginalization import lookup_table
+
+
+class CoherentScoreHM:
+    """
+    Time ``CoherentScoreHM.get_marginalization_info`` given the inner
+    products of a waveform with higher modes.
+    """
+    def setup(self):
+        """Compute the inner products."""
+        marginalized_likelihood = likelihood.MarginalizedExtrinsicLikelihood(
+            **common.get_likelihood_kwargs())
+        self.coherent_score = marginalized_likelihood.coherent_score
+        self.dh_mptd, self.hh_mppd = marginalized_likelihood._get_dh_hh(
+            common.get_par_dic())
+        self.times = marginalized_likelihood._times
+
+    def time_get_marginalization_info(self):
+        """Marginalize the likelihood over extrinsic parameters."""
+        self.coherent_score.get_marginalization_info(
+            self.dh_mptd, self.hh_mppd, self.times)
+
+
+class SkyDictionary:
+    """Time the construction of a ``SkyDictionary``."""
+    number = 1
+    repeat = 3
+    timeout = 300
+
+    def time_init(self):
+        """Sample the sky and tabulate detector delays."""
+        likelihood.SkyDictionary(common.DETECTOR_NAMES)
+
+
+class LookupTable:
+    """
+    Time the construction of a ``LookupTable``, loaded from the cache
+    file and computed from scratch (with a small shape, in a temporary
+    cache file).
+    """
+    number = 1
+    repeat = 3
+    timeout = 300
+
+    def setup(self):
+        """Ensure the default table is cached, redirect new tables."""
+        common.get_lookup_table()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._cache_fname = lookup_table.LOOKUP_TABLES_FNAME
+        self._tmp_cache_fname = (pathlib.Path(self._tmpdir.name)
+                                 / self._cache_fname.name)
+
+    def teardown(self):
+        """Restore the cache file and delete the temporary one."""
+        lookup_table.LOOKUP_TABLES_FNAME = self._cache_fname
+        self._tmpdir.cleanup()
+
+    def time_init_cached(self):
+        """Load the default table."""
+        likelihood.LookupTable()
+
+    def time_init_uncached(self):
+        """Compute a table with shape (32, 16)."""
+        self._tmp_cache_fname.unlink(missing_ok=True)
+        lookup_table.LOOKUP_TABLES_FNAME = self._tmp_cache_fname
+        try:
+            likelihood.LookupTable(shape=(32, 16))
+        finally:
+            lookup_table.LOOKUP_TABLES_FNAME = self._cache_fname
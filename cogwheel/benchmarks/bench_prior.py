@@ -0,0 +1,45 @@
+"""Benchmarks of prior transforms and densities."""
+import itertools
+import numpy as np
+
+from cogwheel import gw_prior
+from cogwheel.benchmarks import common
+
+
+class CombinedPrior:
+    """
+    Time ``.transform`` and ``.lnprior`` of registered priors, at
+    sampled parameters that change between calls (more than the size
+    of the caches).
+    """
+    params = (['IASPrior', 'LVCPrior', 'IntrinsicAlignedSpinIASPrior'],)
+    param_names = ('prior_name',)
+    n_samples = 256
+
+    def setup(self, prior_name):
+        """Instantiate the prior and draw parameters around the injection."""
+        prior_class = gw_prior.prior_registry[prior_name]
+        self.prior = prior_class.from_reference_waveform_finder(
+            common.get_reference_waveform_finder())
+
+        par_dic = common.get_par_dic()
+        sampled_dic = self.prior.inverse_transform(
+            **{par: par_dic[par] for par in self.prior.standard_params})
+        sampled_0 = np.array([sampled_dic[par]
+                              for par in self.prior.sampled_params])
+        rng = np.random.default_rng(0)
+        sampled = np.clip(
+            sampled_0 + .05 * self.prior.cubesize * rng.uniform(
+                -1, 1, (self.n_samples, len(sampled_0))),
+            self.prior.cubemin, self.prior.cubemin + self.prior.cubesize)
+        self.sampled_dics = itertools.cycle(
+            dict(zip(self.prior.sampled_params, values))
+            for values in sampled)
+
+    def time_transform(self, prior_name):
+        """Sampled to standard parameters."""
+        self.prior.transform(**next(self.sampled_dics))
+
+    def time_lnprior(self, prior_name):
+        """Log prior density."""
+        self.prior.lnprior(**next(self.sampled_dics))
@@ -0,0 +1,40 @@
+"""Benchmarks of waveform generation."""
+import itertools
+
+from cogwheel import likelihood
+from cogwheel.benchmarks import common
+
+
+class GetHplusHcross:
+    """
+    Time ``WaveformGenerator.get_hplus_hcross`` on the relative-binning
+    frequency grid. The slow path computes a new waveform with LAL, the
+    fast path rescales a cached one (only `phi_ref` and `d_luminosity`
+    change).
+    """
+    params = (['IMRPhenomXAS', 'IMRPhenomXPHM'],)
+    param_names = ('approximant',)
+
+    def setup(self, approximant):
+        """Get frequencies and parameters for the waveforms."""
+        self.waveform_generator = common.get_waveform_generator(approximant)
+        self.fbin = likelihood.RelativeBinningLikelihood(
+            **common.get_likelihood_kwargs(approximant)).fbin
+        self.par_dics = itertools.cycle(common.get_par_dics(approximant))
+
+        self.fast_par_dics = itertools.cycle(
+            par_dic | {'phi_ref': phi_ref, 'd_luminosity': d_luminosity}
+            for par_dic in [common.get_par_dic(approximant)]
+            for phi_ref, d_luminosity in [(.2, 800.), (1., 900.)])
+        self.waveform_generator.get_hplus_hcross(self.fbin,
+                                                 next(self.fast_par_dics))
+
+    def time_slow(self, approximant):
+        """Waveform that is not cached."""
+        self.waveform_generator.get_hplus_hcross(self.fbin,
+                                                 next(self.par_dics))
+
+    def time_fast(self, approximant):
+        """Waveform that differs from a cached one in fast parameters."""
+        self.waveform_generator.get_hplus_hcross(self.fbin,
+                                                 next(self.fast_par_dics))
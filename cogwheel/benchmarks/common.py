@@ -0,0 +1,106 @@
+"""
+Synthetic events and likelihood ingredients shared by the benchmarks.
+Cached so that different benchmarks reuse them within a process.
+"""
+import numpy as np
+
+from cogwheel import data
+from cogwheel import likelihood
+from cogwheel import utils
+from cogwheel import waveform
+
+DETECTOR_NAMES = 'HLV'
+ASD_FUNCS = ['asd_H_O3', 'asd_L_O3', 'asd_V_O3']
+DURATION = 8.
+TGPS = 0.
+
+PAR_DIC = {'m1': 30., 'm2': 25., 's1z': .1, 's2z': -.1,
+           's1x_n': .2, 's1y_n': -.1, 's2x_n': 0., 's2y_n': .1,
+           'l1': 0., 'l2': 0., 'iota': .5, 'ra': 1., 'dec': .3, 'psi': .4,
+           'phi_ref': .2, 't_geocenter': 0., 'd_luminosity': 800.,
+           'f_ref': 50.}
+
+# Approximant used by benchmarks that are not specific to one:
+APPROXIMANT = 'IMRPhenomXPHM'
+
+
+def get_par_dic(approximant=APPROXIMANT):
+    """
+    Return a copy of ``PAR_DIC``, with in-plane spins set to zero if
+    `approximant` does not support precession.
+    """
+    par_dic = PAR_DIC.copy()
+    if waveform.APPROXIMANTS[approximant].aligned_spins:
+        par_dic.update(waveform.ZERO_INPLANE_SPINS)
+    return par_dic
+
+
+def get_par_dics(approximant=APPROXIMANT, num=256):
+    """
+    Return list of `num` parameter dictionaries scattered around the
+    injection, so that successive likelihood evaluations require new
+    waveforms (as during sampling). Cycling through them bypasses the
+    caches if `num` exceeds their size.
+    """
+    rng = np.random.default_rng(0)
+    par_dic_0 = get_par_dic(approximant)
+    par_dics = []
+    for _ in range(num):
+        par_dic = par_dic_0.copy()
+        for par in 'm1', 'm2', 'd_luminosity':
+            par_dic[par] *= 1 + rng.uniform(-.01, .01)
+        for par in 'iota', 'ra', 'dec', 'psi', 'phi_ref':
+            par_dic[par] += rng.uniform(-.05, .05)
+        par_dic['t_geocenter'] += rng.uniform(-1e-3, 1e-3)
+        par_dics.append(par_dic)
+    return par_dics
+
+
+@utils.lru_cache()
+def get_event_data(approximant=APPROXIMANT):
+    """
+    Return an ``EventData`` with Gaussian noise and an injection with
+    parameters ``get_par_dic(approximant)``.
+    """
+    event_data = data.EventData.gaussian_noise(
+        eventname=f'benchmark_{approximant}', duration=DURATION,
+        detector_names=DETECTOR_NAMES, asd_funcs=ASD_FUNCS, tgps=TGPS,
+        seed=0)
+    event_data.inject_signal(get_par_dic(approximant), approximant)
+    return event_data
+
+
+def get_waveform_generator(approximant=APPROXIMANT):
+    """Return a new ``WaveformGenerator`` for the benchmark event."""
+    return waveform.WaveformGenerator.from_event_data(
+        get_event_data(approximant), approximant)
+
+
+@utils.lru_cache()
+def get_lookup_table():
+    """Return a ``LookupTable`` with default settings."""
+    return likelihood.LookupTable()
+
+
+def get_likelihood_kwargs(approximant=APPROXIMANT):
+    """
+    Return keyword arguments to instantiate a relative-binning
+    likelihood for the benchmark event, using the injection as
+    reference waveform.
+    """
+    return {'event_data': get_event_data(approximant),
+            'waveform_generator': get_waveform_generator(approximant),
+            'par_dic_0': get_par_dic(approximant),
+            'pn_phase_tol': .05}
+
+
+@utils.lru_cache()
+def get_reference_waveform_finder():
+    """
+    Return a ``ReferenceWaveformFinder`` for the benchmark event, with
+    the (aligned-spin) injection as reference waveform. Only used to
+    instantiate priors, it is not optimized.
+    """
+    approximant = 'IMRPhenomXAS'
+    return likelihood.ReferenceWaveformFinder(
+        **get_likelihood_kwargs(approximant))
@@ -0,0 +1,206 @@
+"""
+Run the benchmarks in ``cogwheel.benchmarks`` without ``asv``, save
+the results to json files named by git commit, and compare results
+between commits to spot performance regressions.
+
+Usage::
+
+    python -m cogwheel.benchmarks.run [--pattern <regex>] [--output <dirname>]
+    python -m cogwheel.benchmarks.run --compare <old.json> <new.json>
+"""
+import argparse
+import datetime
+import functools
+import importlib
+import itertools
+import json
+import pathlib
+import pkgutil
+import platform
+import re
+import statistics
+import subprocess
+import timeit
+
+import numpy as np
+
+from cogwheel import benchmarks
+
+DEFAULT_REPEAT = 5
+
+
+def discover_benchmarks(pattern=None):
+    """
+    Return list of ``(name, benchmark_class, method_name, params)``
+    tuples, one per benchmark and combination of parameters.
+
+    Parameters
+    ----------
+    pattern: str, optional
+        Regular expression, only benchmarks whose name matches it are
+        returned. Names are of the form
+        ``'<module>.<class>.<method>(<params>)'``.
+    """
+    found = []
+    for module_info in pkgutil.iter_modules(benchmarks.__path__):
+        if not module_info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module(
+            f'{benchmarks.__name__}.{module_info.name}')
+        for class_name, benchmark_class in vars(module).items():
+            if (not isinstance(benchmark_class, type)
+                    or benchmark_class.__module__ != module.__name__):
+                continue
+
+            params = getattr(benchmark_class, 'params', ())
+            if params and not isinstance(params[0], (list, tuple)):
+                params = (params,)  # Single parameter
+
+            for method_name in sorted(vars(benchmark_class)):
+                if not method_name.startswith('time_'):
+                    continue
+                for param_values in itertools.product(*params):
+                    name = (f'{module_info.name}.{class_name}.{method_name}'
+                            f'({", ".join(map(str, param_values))})')
+                    if pattern is None or re.search(pattern, name):
+                        found.append((name, benchmark_class, method_name,
+                                      param_values))
+    return found
+
+
+def time_benchmark(benchmark_class, method_name, params=()):
+    """
+    Return dictionary with the time per call (s) of a benchmark.
+
+    The number of calls per repetition is set by the class attribute
+    ``number`` if present, otherwise chosen so that a repetition takes
+    at least 0.2 s. ``setup`` and ``teardown`` are called for each of
+    the ``repeat`` repetitions.
+    """
+    number = getattr(benchmark_class, 'number', None)
+    repeat = getattr(benchmark_class, 'repeat', DEFAULT_REPEAT)
+
+    times = []
+    for _ in range(repeat):
+        benchmark = benchmark_class()
+        if hasattr(benchmark, 'setup'):
+            benchmark.setup(*params)
+        try:
+            timer = timeit.Timer(functools.partial(
+                getattr(benchmark, method_name), *params))
+            if number is None:
+                number, _ = timer.autorange()  # Also serves as warm-up
+            times.append(timer.timeit(number) / number)
+        finally:
+            if hasattr(benchmark, 'teardown'):
+                benchmark.teardown(*params)
+
+    return {'median': statistics.median(times),
+            'min': min(times),
+            'number': number,
+            'repeat': repeat}
+
+
+def run_benchmarks(pattern=None):
+    """
+    Run benchmarks and return a dictionary of results by benchmark
+    name, see ``discover_benchmarks`` and ``time_benchmark``. Failed
+    benchmarks have an entry with the error instead.
+    """
+    results = {}
+    for name, benchmark_class, method_name, params in discover_benchmarks(
+            pattern):
+        try:
+            results[name] = time_benchmark(benchmark_class, method_name,
+                                           params)
+        except Exception as err:
+            results[name] = {'error': repr(err)}
+            print(f'{name:<80} failed: {err!r}')
+        else:
+            print(f'{name:<80} {_format_time(results[name]["median"])}')
+    return results
+
+
+def get_commit():
+    """Return a git description of the commit of the source code."""
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=pathlib.Path(__file__).parent, capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(results, dirname):
+    """
+    Save benchmark results and metadata to a json file in `dirname`
+    named after the commit, return its path.
+    """
+    commit = get_commit()
+    path = pathlib.Path(dirname)/f'{commit}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump({'commit': commit,
+                   'date': datetime.datetime.now().isoformat(),
+                   'machine': platform.node(),
+                   'python': platform.python_version(),
+                   'numpy': np.__version__,
+                   'results': results},
+                  results_file, indent=2)
+    return path
+
+
+def compare_results(old_path, new_path, threshold=1.2):
+    """
+    Print the ratio of new to old median times of the benchmarks that
+    ran successfully in both, flagging regressions (``+``) and
+    improvements (``-``) by more than a factor `threshold`.
+    Return dictionary of ratios by benchmark name.
+    """
+    old, new = ([json.loads(pathlib.Path(path).read_text(encoding='utf-8')
+                            )['results'] for path in (old_path, new_path)])
+    ratios = {}
+    for name in old.keys() & new.keys():
+        if 'median' in old[name] and 'median' in new[name]:
+            ratios[name] = new[name]['median'] / old[name]['median']
+
+    for name in sorted(ratios):
+        ratio = ratios[name]
+        flag = '+' if ratio > threshold else '-' if ratio < 1/threshold else ''
+        print(f'{flag:1} {_format_time(old[name]["median"])} '
+              f'{_format_time(new[name]["median"])} {ratio:6.2f}  {name}')
+    return ratios
+
+
+def _format_time(seconds):
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            break
+    return f'{seconds / scale:7.2f} {unit:2}'
+
+
+def main(pattern=None, output=None, compare=None, threshold=1.2):
+    """Run benchmarks and save the results, or compare saved results."""
+    if compare:
+        compare_results(*compare, threshold)
+        return
+
+    results = run_benchmarks(pattern)
+    if output:
+        print(f'Saved results to {save_results(results, output)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Run cogwheel benchmarks, or compare saved results.')
+    parser.add_argument('--pattern',
+                        help='regular expression to select benchmarks.')
+    parser.add_argument('--output', help='''directory where to save the
+                                            results, named by commit.''')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='json files with results to compare.')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='''ratio of times beyond which a change is
+                                flagged when comparing.''')
+    main(**vars(parser.parse_args()))
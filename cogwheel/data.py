@@ -1,6 +1,13 @@
 """Download, process and store data about GW events."""
 
+import hashlib
+import json
+import multiprocessing.pool
+import os
 import pathlib
+import shutil
+import tempfile
+import scipy.fft
 from scipy import signal
 from scipy import interpolate
 import matplotlib.pyplot as plt
@@ -28,6 +35,13 @@ ASDS = {path.name.removesuffix('.npy'): path
 
 EVENTS_METADATA = pd.read_csv(DATADIR/'events_metadata.csv', index_col=0)
 
+# Welch ASDs measured by ``EventData.from_timeseries``, so that
+# reconditioning the same data with different settings is fast.
+# Keys are ``(filename, mtime, t_start, t_end, wht_filter_duration,
+# fmax)``, values are ``(frequencies, asd)`` arrays.
+_measured_asd_cache = utils.LRUCache('cogwheel.data.measured_asd',
+                                     maxsize=32)
+
 
 def make_asd_func(frequencies, asd):
     """
@@ -39,6 +53,65 @@ def make_asd_func(frequencies, asd):
                                 fill_value=1)
 
 
+@utils.lru_cache()
+def load_asd_func(asd_name):
+    """
+    Return function that interpolates one of the predefined ASDs, the
+    keys of ``ASDS``. Cached so that the file is read only once.
+    """
+    if asd_name not in ASDS:
+        raise ValueError(f'Unknown asd_func {asd_name!r}. '
+                         f'Allowed values are {list(ASDS)}')
+    return make_asd_func(*np.load(ASDS[asd_name]))
+
+
+def get_asd_funcs(asd_funcs):
+    """
+    Return list of ASD functions, replacing strings in `asd_funcs` by
+    the corresponding predefined ASDs (see ``load_asd_func``).
+    """
+    return [load_asd_func(asd_func) if isinstance(asd_func, str)
+            else asd_func
+            for asd_func in asd_funcs]
+
+
+def draw_gaussian_noise(asd, duration, rng):
+    """
+    Return frequency-domain stationary Gaussian noise with amplitude
+    spectral density `asd`.
+
+    Parameters
+    ----------
+    asd: float array of shape (..., nfreq)
+        Amplitude spectral density (1/Hz) on an ``np.fft.rfftfreq``
+        frequency grid. Leading dimensions are drawn independently
+        (e.g. detectors).
+
+    duration: float
+        Duration of the data (s).
+
+    rng: numpy.random.Generator
+        Random number generator.
+
+    Return
+    ------
+    Complex array of the same shape as `asd`.
+    """
+    real, imag = rng.normal(scale=np.sqrt(duration) / 2 * asd,
+                            size=(2,) + asd.shape)
+    strain = real + 1j * imag
+    strain[..., [0, -1]] = strain[..., [0, -1]].real  # Real at f=0 & Nyquist
+    return strain
+
+
+def get_h_h(h_f, wht_filter, df):
+    """
+    Return inner product ⟨h|h⟩ of a frequency-domain waveform `h_f`
+    of shape (..., nfreq), per detector (ignoring ASD-drift correction).
+    """
+    return 4 * df * np.linalg.norm(h_f * wht_filter, axis=-1)**2
+
+
 class DataError(Exception):
     """Base class for exceptions in this module."""
 
@@ -48,6 +121,9 @@ class EventData(utils.JSONMixin):
     Class to save an event's frequency-domain strain data and whitening
     filter for multiple detectors.
     """
+    METADATA_FILENAME = 'metadata.json'
+    _ARRAY_KEYS = ('frequencies', 'strain', 'wht_filter')
+
     def __init__(self, eventname, frequencies, strain, wht_filter,
                  detector_names, tgps, tcoarse):
         """
@@ -96,7 +172,7 @@ class EventData(utils.JSONMixin):
         self.tcoarse = tcoarse
         self.wht_filter = wht_filter
 
-        self.blued_strain = None  # Set by ``set_strain()``
+        self._blued_strain = None  # Set by ``blued_strain``
         self._set_strain(strain)
 
         nonzero = np.nonzero(np.sum(self.wht_filter, axis=0))[0]
@@ -104,9 +180,16 @@ class EventData(utils.JSONMixin):
         self.fbounds = self.frequencies[nonzero[[0, -1]]]
         self.injection = None
 
-    def _set_strain(self, strain):
+    def _set_strain(self, strain, blued_strain=None):
         self.strain = strain
-        self.blued_strain = self.wht_filter**2 * self.strain
+        self._blued_strain = blued_strain
+
+    @property
+    def blued_strain(self):
+        """``wht_filter**2 * strain``, computed on first access."""
+        if self._blued_strain is None:
+            self._blued_strain = self.wht_filter**2 * self.strain
+        return self._blued_strain
 
     @property
     def df(self):
@@ -127,7 +210,7 @@ class EventData(utils.JSONMixin):
     def from_timeseries(
             cls, filenames, eventname, detector_names, tgps,
             t_before=16., t_after=16., wht_filter_duration=32., fmin=15.,
-            df_taper=1., fmax=1024.):
+            df_taper=1., fmax=1024., n_workers=None):
         """
         Parameters
         ----------
@@ -170,6 +253,11 @@ class EventData(utils.JSONMixin):
         fmax: float
             Desired Nyquist frequency (Hz), half the sampling frequency.
 
+        n_workers: int, optional
+            Number of threads. Detectors are processed in parallel,
+            and the remaining threads are used by the FFTs. Defaults to
+            the number of CPUs.
+
         Return
         ------
             ``EventData`` instance.
@@ -178,13 +266,28 @@ class EventData(utils.JSONMixin):
             raise ValueError(
                 'Length of `filenames` and `detector_names` are mismatched.')
 
-        f_strain_whtfilter_tcoarses = []
-        for filename, fmin_ in zip(*np.broadcast_arrays(filenames, fmin)):
+        n_workers = n_workers or os.cpu_count() or 1
+        n_threads = min(n_workers, len(filenames))
+        fft_workers = max(1, n_workers // n_threads)
+
+        def process_detector(filename, fmin_):
             timeseries = cls._read_timeseries(filename, tgps)
-            f_strain_whtfilter_tcoarses.append(
-                cls._get_f_strain_whtfilter_from_timeseries(
-                    timeseries, tgps, t_before, t_after, wht_filter_duration,
-                    fmin_, df_taper, fmax))
+            path = pathlib.Path(filename).resolve()
+            asd_key = (str(path), path.stat().st_mtime_ns,
+                       timeseries.t0.value, timeseries.duration.value,
+                       wht_filter_duration, fmax)
+            return cls._get_f_strain_whtfilter_from_timeseries(
+                timeseries, tgps, t_before, t_after, wht_filter_duration,
+                fmin_, df_taper, fmax, asd_key=asd_key, workers=fft_workers)
+
+        args = list(zip(*np.broadcast_arrays(filenames, fmin)))
+        if n_threads > 1:
+            with multiprocessing.pool.ThreadPool(n_threads) as pool:
+                f_strain_whtfilter_tcoarses = pool.starmap(process_detector,
+                                                           args)
+        else:
+            f_strain_whtfilter_tcoarses = [process_detector(*arg)
+                                           for arg in args]
         (frequencies, *f_copies), strain, wht_filter, (tcoarse, *t_copies) = (
             np.array(arr) for arr in zip(*f_strain_whtfilter_tcoarses))
 
@@ -231,14 +334,14 @@ class EventData(utils.JSONMixin):
                   'near event.')
 
         timeseries = timeseries.crop(t_start, t_end)
-        assert not any(np.isnan(timeseries))
+        assert not np.isnan(timeseries.value).any()
         return timeseries
 
     @staticmethod
     def _get_f_strain_whtfilter_from_timeseries(
             timeseries: gwpy.timeseries.TimeSeries, tgps: float,
             t_before=16., t_after=16., wht_filter_duration=32.,
-            fmin=15., df_taper=1., fmax=1024.):
+            fmin=15., df_taper=1., fmax=1024., asd_key=None, workers=None):
         """
         Parameters
         ----------
@@ -271,6 +374,14 @@ class EventData(utils.JSONMixin):
 
         fmax: float
             Desired Nyquist frequency (Hz), half the sampling frequency.
+
+        asd_key: hashable, optional
+            If passed, the measured ASD is cached under this key (see
+            ``_measure_asd``), it must identify the `timeseries`,
+            `wht_filter_duration` and `fmax`.
+
+        workers: int, optional
+            Number of workers for ``scipy.fft``.
         """
         if (wht_filter_duration / timeseries.dt.value) % 2 != 0:
             raise NotImplementedError(
@@ -289,22 +400,22 @@ class EventData(utils.JSONMixin):
         rfftfreq_down = rfftfreq[:i_max]
 
         # Construct whitening filter
-        measured_asd = timeseries.asd(wht_filter_duration,
-                                      overlap=wht_filter_duration/2,
-                                      method='median', window='hann')
-        asd = measured_asd.interpolate(1 / segment_duration).value[:i_max]
+        asd = np.interp(rfftfreq_down, *EventData._measure_asd(
+            timeseries, wht_filter_duration, fmax, asd_key))
 
         highpass = highpass_filter(rfftfreq_down, fmin, df_taper)
-        raw_wht_filter_td = np.fft.irfft(highpass / asd)
+        raw_wht_filter_td = scipy.fft.irfft(highpass / asd, workers=workers)
 
-        window_fir = signal.tukey(int(wht_filter_duration * 2 * fmax), .1)
+        window_fir = signal.windows.tukey(int(wht_filter_duration * 2 * fmax),
+                                          .1)
         window_fir_padded_shifted = np.fft.fftshift(
             np.pad(window_fir, (len(raw_wht_filter_td)-len(window_fir)) // 2))
 
         # Whitening filter will be exactly 0 below fmin,
         # approximately FIR, exactly zero phase:
-        wht_filter = highpass * np.fft.rfft(
-            window_fir_padded_shifted * raw_wht_filter_td).real
+        wht_filter = highpass * scipy.fft.rfft(
+            window_fir_padded_shifted * raw_wht_filter_td,
+            workers=workers).real
 
         # Taper and downsample data
         ntaper = int(wht_filter_duration / 2 / segment.dt.value)
@@ -319,7 +430,7 @@ class EventData(utils.JSONMixin):
         segment[first_valid_ind : first_valid_ind+ntaper] *= taper
         segment[last_valid_ind-ntaper+1 : last_valid_ind+1] *= taper[::-1]
 
-        data_fd = np.fft.rfft(segment.value)
+        data_fd = scipy.fft.rfft(segment.value, workers=workers)
 
         data_fd_down = data_fd[:i_max] * rfftfreq_down[-1] / rfftfreq[-1]
         data_fd_down[-1] = data_fd_down[-1].real
@@ -330,6 +441,33 @@ class EventData(utils.JSONMixin):
 
         return rfftfreq_down, data_fd_down, wht_filter, tcoarse
 
+    @staticmethod
+    def _measure_asd(timeseries, wht_filter_duration, fmax, asd_key=None):
+        """
+        Return frequencies and amplitude spectral density of
+        `timeseries` measured with the median Welch method, using Hann
+        windows of duration `wht_filter_duration` overlapping by half.
+        Only frequencies needed to interpolate up to `fmax` are kept.
+        If `asd_key` is passed, results are cached under it.
+        """
+        if asd_key is not None:
+            frequencies_asd = _measured_asd_cache.get(asd_key)
+            if frequencies_asd is not utils.LRUCache.MISSING:
+                return frequencies_asd
+
+        nperseg = int(wht_filter_duration / timeseries.dt.value)
+        frequencies, psd = signal.welch(
+            timeseries.value, fs=1 / timeseries.dt.value, window='hann',
+            nperseg=nperseg, noverlap=nperseg // 2,
+            nfft=scipy.fft.next_fast_len(nperseg, real=True),
+            average='median')
+        i_max = np.searchsorted(frequencies, fmax) + 2
+        frequencies_asd = frequencies[:i_max], np.sqrt(psd[:i_max])
+
+        if asd_key is not None:
+            _measured_asd_cache.set(asd_key, frequencies_asd)
+        return frequencies_asd
+
     @classmethod
     def gaussian_noise(
             cls, eventname, duration, detector_names, asd_funcs, tgps,
@@ -384,23 +522,13 @@ class EventData(utils.JSONMixin):
             raise ValueError(
                 'Lengths of `detector_names` and `asd_funcs` should match.')
 
-        for i, asd_func in enumerate(asd_funcs):
-            if isinstance(asd_func, str):
-                if not asd_func in ASDS:
-                    raise ValueError(f'Unknown asd_func {asd_func!r}. '
-                                     f'Allowed values are {list(ASDS)}')
-                asd_funcs[i] = make_asd_func(*np.load(ASDS[asd_func]))
-
         tcoarse = duration / 2 if tcoarse is None else tcoarse
         dt = 1 / (2*fmax)
         frequencies = np.fft.rfftfreq(n=int(duration / dt), d=dt)
-        asd = np.array([asd_func(frequencies) for asd_func in asd_funcs])
-
-        real, imag = np.random.default_rng(seed).normal(
-            scale=np.sqrt(duration) / 2 * asd, size=(2,) + asd.shape)
-        strain = real + 1j * imag
-        strain[:, [0, -1]] = strain[:, [0, -1]].real  # Real at f = 0 & Nyquist
-
+        asd = np.array([asd_func(frequencies)
+                        for asd_func in get_asd_funcs(asd_funcs)])
+        strain = draw_gaussian_noise(asd, duration,
+                                     np.random.default_rng(seed))
         wht_filter = highpass_filter(frequencies, fmin, df_taper) / asd
         return cls(eventname, frequencies, strain, wht_filter, detector_names,
                    tgps, tcoarse)
@@ -426,7 +554,7 @@ class EventData(utils.JSONMixin):
                                                          par_dic)
         self._set_strain(self.strain + h_f)
 
-        h_h = 4 * self.df * np.linalg.norm(h_f * self.wht_filter, axis=-1)**2
+        h_h = get_h_h(h_f, self.wht_filter, self.df)
         self.injection = dict(par_dic=par_dic,
                               approximant=approximant,
                               h_h=h_h)
@@ -511,6 +639,129 @@ class EventData(utils.JSONMixin):
 
         return cls(**dic)
 
+    def to_npy_dir(self, dirname, *, overwrite=False,
+                   dir_permissions=utils.DIR_PERMISSIONS,
+                   file_permissions=utils.FILE_PERMISSIONS):
+        """
+        Save class as a directory of ``.npy`` files plus a json file
+        with the scalar attributes. Unlike ``.npz``, this format can
+        be memory-mapped on load (see ``from_npy_dir``).
+        The directory is written atomically.
+        """
+        dirname = pathlib.Path(dirname)
+        if dirname.exists():
+            if not overwrite:
+                raise FileExistsError(f'{dirname} already exists. '
+                                      'Pass `overwrite=True` to overwrite.')
+            shutil.rmtree(dirname)
+
+        utils.mkdirs(dirname.parent, dir_permissions)
+        tmpdir = pathlib.Path(tempfile.mkdtemp(dir=dirname.parent,
+                                               prefix=f'.{dirname.name}.'))
+        metadata = {key: val for key, val in self.get_init_dict().items()
+                    if key not in self._ARRAY_KEYS}
+        with open(tmpdir/self.METADATA_FILENAME, 'w',
+                  encoding='utf-8') as metadata_file:
+            json.dump(metadata, metadata_file, cls=utils.NumpyEncoder)
+
+        for key in self._ARRAY_KEYS + ('blued_strain',):
+            np.save(tmpdir/f'{key}.npy', getattr(self, key))
+
+        for path in tmpdir.iterdir():
+            path.chmod(file_permissions)
+        tmpdir.chmod(dir_permissions)
+        try:
+            tmpdir.rename(dirname)
+        except OSError:  # Written concurrently by another process
+            shutil.rmtree(tmpdir)
+            if not dirname.exists():
+                raise
+
+    @classmethod
+    def from_npy_dir(cls, dirname, mmap_mode='r'):
+        """
+        Load a directory previously saved with ``to_npy_dir()``.
+        By default arrays are memory-mapped read-only, so that
+        processes loading the same directory share memory.
+        """
+        dirname = pathlib.Path(dirname)
+        with open(dirname/cls.METADATA_FILENAME,
+                  encoding='utf-8') as metadata_file:
+            dic = json.load(metadata_file)
+        for key in cls._ARRAY_KEYS:
+            dic[key] = np.load(dirname/f'{key}.npy', mmap_mode=mmap_mode)
+
+        event_data = cls(**dic)
+        event_data._set_strain(
+            event_data.strain,
+            np.load(dirname/'blued_strain.npy', mmap_mode=mmap_mode))
+        return event_data
+
+    def get_content_hash(self):
+        """
+        Return a hex digest that identifies the contents of the
+        instance, used to avoid saving duplicate copies of the data.
+        """
+        sha1 = hashlib.sha1()
+        for key, val in self.get_init_dict().items():
+            if key in self._ARRAY_KEYS:
+                val = np.ascontiguousarray(val)
+                sha1.update(f'{key}{val.dtype}{val.shape}'.encode())
+                sha1.update(val.data)
+            else:
+                sha1.update(json.dumps([key, val],
+                                       cls=utils.NumpyEncoder).encode())
+        return sha1.hexdigest()
+
+    def get_multiband_inds(self, time_to_merger, phase_tol=.1, max_df=1.):
+        """
+        Return indices of a subset of ``frequencies`` that spans
+        ``fbounds`` with bands of progressively coarser resolution.
+        The spacing in each band is a power of 2 times ``df``, the
+        largest such that the phase of a chirp with a given time to
+        merger changes by less than `phase_tol` between points.
+        Smooth functions of frequency, like a waveform whose time shift
+        was removed, can be interpolated from this grid.
+
+        Parameters
+        ----------
+        time_to_merger: callable
+            Function of frequency (Hz) that returns the time to merger
+            (s) of the signal at that frequency (e.g. see
+            ``gw_utils.time_to_merger``).
+
+        phase_tol: float
+            Maximum phase change (rad) between points.
+
+        max_df: float
+            Maximum spacing (Hz), to resolve features in the amplitude.
+
+        Return
+        ------
+        1-d array of increasing indices of ``frequencies``, including
+        the first and last nonzero ones of ``wht_filter``.
+        """
+        frequencies = self.frequencies[self.fslice]
+        max_step = np.minimum(
+            max_df,
+            phase_tol / (2*np.pi * np.abs(time_to_merger(frequencies)))
+            ) / self.df
+
+        # Make nondecreasing (conservatively) so each band is contiguous
+        max_step = np.minimum.accumulate(max_step[::-1])[::-1]
+        log2_step = np.floor(np.log2(np.maximum(max_step, 1))).astype(int)
+
+        bands = []
+        i_start = 0
+        while i_start < len(frequencies) - 1:
+            step = 2 ** log2_step[i_start]
+            i_end = np.searchsorted(log2_step, log2_step[i_start], 'right')
+            bands.append(np.arange(i_start, i_end, step))
+            i_start = bands[-1][-1] + step
+
+        inds = np.unique(np.r_[np.concatenate(bands), len(frequencies) - 1])
+        return self.fslice.start + inds
+
     @staticmethod
     def get_filename(eventname=None):
         """Return npz filename to save/load class instance."""
@@ -82,7 +82,7 @@ class MarginalizedRelativeBinningLikelihood(RelativeBinningLikelihood):
 
         Assuming no higher modes.
         """
-        h0_f = self._get_h_f(self.par_dic_0, by_m=False)
+        h0_f = self._get_reference_h_f(self.par_dic_0, by_m=False)
         h0_fbin = self.waveform_generator.get_strain_at_detectors(
             self.fbin, self.par_dic_0, by_m=False)  # ndet x len(fbin)
 
@@ -70,14 +70,75 @@ def detector_travel_times(detector_name_1, detector_name_2):
 
 
 # ----------------------------------------------------------------------
-# Similar to the above, but in Earth-fixed coordinates and vectorized:
+# Similar to the above, but vectorized:
+@utils.lru_cache()
+def _get_detector_arrays(detector_names):
+    """
+    Return arrays with the responses (n_detectors, 3, 3) and locations
+    (n_detectors, 3) of the detectors.
+    `detector_names` must be hashable.
+    """
+    responses = np.array([DETECTORS[detector_name].response
+                          for detector_name in detector_names])
+    locations = np.array([DETECTORS[detector_name].location
+                          for detector_name in detector_names])
+    return responses, locations
+
+
+def get_fplus_fcross(detector_names, ra, dec, psi, gmst):
+    """
+    Return array of shape (..., 2, n_detectors) with F+, Fx antenna
+    coefficients, where `...` is the shape of broadcasting
+    (ra, dec, psi). Equivalent to ``fplus_fcross`` with
+    ``gmst = lal.GreenwichMeanSiderealTime(tgps)``, but vectorized.
+    """
+    responses, _ = _get_detector_arrays(tuple(detector_names))
+
+    gha = gmst - np.asarray(ra)  # Greenwich hour angle
+    cosgha = np.cos(gha)
+    singha = np.sin(gha)
+    cosdec = np.cos(dec)
+    sindec = np.sin(dec)
+    cospsi = np.cos(psi)
+    sinpsi = np.sin(psi)
+
+    # Polarization axes, as in ``lal.ComputeDetAMResponse``, (..., 3)
+    x = np.stack(np.broadcast_arrays(
+        -cospsi * singha - sinpsi * cosgha * sindec,
+        -cospsi * cosgha + sinpsi * singha * sindec,
+        sinpsi * cosdec), axis=-1)
+    y = np.stack(np.broadcast_arrays(
+        sinpsi * singha - cospsi * cosgha * sindec,
+        sinpsi * cosgha + cospsi * singha * sindec,
+        cospsi * cosdec), axis=-1)
+
+    # Polarization tensors e+, ex contracted with the responses
+    xx = x[..., :, np.newaxis] * x[..., np.newaxis, :]
+    yy = y[..., :, np.newaxis] * y[..., np.newaxis, :]
+    xy = x[..., :, np.newaxis] * y[..., np.newaxis, :]
+    eplus_ecross = np.stack([xx - yy, xy + np.swapaxes(xy, -1, -2)],
+                            axis=-3)  # (..., 2, 3, 3)
+    return (eplus_ecross.reshape(eplus_ecross.shape[:-2] + (9,))
+            @ responses.reshape(-1, 9).T)
+
+
+def get_time_delays(detector_names, ra, dec, gmst):
+    """
+    Return array of shape (n_detectors, ...) with time delays from
+    geocenter [s], where `...` is the shape of broadcasting (ra, dec).
+    Equivalent to ``time_delay_from_geocenter`` with
+    ``gmst = lal.GreenwichMeanSiderealTime(tgps)``, but vectorized.
+    """
+    return get_geocenter_delays(detector_names, dec, np.asarray(ra) - gmst)
+
+
+# Similar to the above, but in Earth-fixed coordinates:
 def get_geocenter_delays(detector_names, lat, lon):
     """
     Return array of shape (n_detectors, ...) time delays from geocenter
     [s]. Vectorized over lat, lon.
     """
-    locations = np.array([DETECTORS[detector_name].location
-                          for detector_name in detector_names])  # (ndet, 3)
+    _, locations = _get_detector_arrays(tuple(detector_names))  # (ndet, 3)
     #JM 08/11/22 prevert cyclic reference of gw_utils.py and skyloc_angles.py
     # direction = skyloc_angles.latlon_to_cart3d(lat, lon) #
 
@@ -95,9 +156,7 @@ def get_fplus_fcross_0(detector_names, lat, lon):
     Vectorized over lat, lon. Return shape is (..., n_det, 2)
     where `...` is the shape of broadcasting (lat, lon).
     """
-    responses = np.array([DETECTORS[detector_name].response
-                          for detector_name in detector_names]
-                        )  # (n_det, 3, 3)
+    responses, _ = _get_detector_arrays(tuple(detector_names))
 
     lat, lon = np.broadcast_arrays(lat, lon)
     coslon = np.cos(lon)
@@ -152,6 +211,15 @@ def m1m2_to_mchirp(m1, m2):
     return (m1*m2)**.6 / (m1+m2)**.2
 
 
+def time_to_merger(f, mchirp):
+    """
+    Return the leading-order post-Newtonian time to merger (s) of a
+    binary with detector-frame chirp mass `mchirp` (Msun), when the
+    frequency of its quadrupole radiation is `f` (Hz).
+    """
+    return 5/256 * (lal.MTSUN_SI * mchirp)**(-5/3) * (np.pi * f)**(-8/3)
+
+
 def chieff(m1, m2, s1z, s2z):
     return (m1*s1z + m2*s2z) / (m1+m2)
 
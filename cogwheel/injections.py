@@ -0,0 +1,293 @@
+"""
+Generate many synthetic events with Gaussian noise and injected
+signals, e.g. for probability-probability tests.
+
+An ``InjectionCampaign`` is a directory with the strain of all the
+events stacked in a single ``.npy`` file, the frequencies and whitening
+filter (which all events share) and a table of injection parameters.
+Arrays are memory-mapped on load, so events can be accessed lazily and
+processes reading the same campaign share memory.
+
+Example
+-------
+>>> injections = prior.generate_random_samples(10_000)
+>>> campaign = InjectionCampaign.generate(
+...     'pp_test', injections, 'IMRPhenomXPHM', 'HLV',
+...     ('asd_H_O3a', 'asd_L_O3a', 'asd_V_O3a'), duration=16.,
+...     tgps=0., seed=0, n_processes=16)
+>>> event_data = campaign.get_event_data(0)
+"""
+
+import json
+import multiprocessing
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from cogwheel import data
+from cogwheel import utils
+from cogwheel import waveform
+
+# Set by ``_init_worker``.
+_worker_state = None
+
+
+def _init_worker(dirname):
+    """
+    Initializer for pool processes. Load the campaign's shared arrays
+    and instantiate the waveform generator once per process.
+    """
+    global _worker_state
+    campaign = InjectionCampaign(dirname)
+    metadata = campaign.metadata
+    _worker_state = {
+        'campaign': campaign,
+        'strain': np.load(campaign.path/'strain.npy', mmap_mode='r+'),
+        'asd': np.load(campaign.path/'asd.npy'),
+        'waveform_generator': waveform.WaveformGenerator(
+            metadata['detector_names'], metadata['tgps'],
+            metadata['tcoarse'], metadata['approximant'],
+            metadata['harmonic_modes'])}
+
+
+def _worker_inject(inds):
+    """
+    Generate noise and inject signals for the events `inds`, write the
+    strain to the campaign file and return their ⟨h|h⟩.
+    """
+    campaign = _worker_state['campaign']
+    strain = _worker_state['strain']
+    waveform_generator = _worker_state['waveform_generator']
+    metadata = campaign.metadata
+    frequencies = campaign.frequencies
+    wht_filter = campaign.wht_filter
+    df = frequencies[1] - frequencies[0]
+
+    h_h = []
+    for i, (_, par_dic) in zip(
+            inds, campaign.injections.iloc[inds].iterrows()):
+        rng = np.random.default_rng(
+            np.random.SeedSequence(metadata['seed'], spawn_key=(i,)))
+        noise = data.draw_gaussian_noise(_worker_state['asd'],
+                                         metadata['duration'], rng)
+        h_f = waveform_generator.get_strain_at_detectors(
+            frequencies, par_dic[waveform_generator.params].to_dict())
+        strain[i] = noise + h_f
+        h_h.append(data.get_h_h(h_f, wht_filter, df))
+    strain.flush()
+    return h_h
+
+
+class InjectionCampaign:
+    """
+    Set of synthetic events that share detectors, noise ASDs, GPS
+    time and frequency grid, stored in a directory. Each event has
+    independent Gaussian noise and an injected signal.
+
+    Use ``generate()`` to create a campaign and the constructor to load
+    an existing one. ``get_event_data(i)`` returns the ``EventData`` of
+    the `i`-th event, with memory-mapped strain.
+
+    The noise of each event comes from an independent random stream
+    derived from the campaign seed, so results do not depend on the
+    number of processes. Event `i` equals
+    ``EventData.gaussian_noise(..., seed=seeds[i])`` followed by
+    ``inject_signal``, where
+    ``seeds = np.random.SeedSequence(seed).spawn(n_injections)``.
+    """
+    METADATA_FILENAME = 'metadata.json'
+    INJECTIONS_FILENAME = 'injections.feather'
+
+    def __init__(self, dirname):
+        self.path = pathlib.Path(dirname)
+        with open(self.path/self.METADATA_FILENAME,
+                  encoding='utf-8') as metadata_file:
+            self.metadata = json.load(metadata_file)
+
+        self.injections = pd.read_feather(self.path/self.INJECTIONS_FILENAME)
+        self.frequencies = np.load(self.path/'frequencies.npy')
+        self.wht_filter = np.load(self.path/'wht_filter.npy', mmap_mode='r')
+        self._strain = None
+
+    def __len__(self):
+        return self.metadata['n_injections']
+
+    @property
+    def strain(self):
+        """
+        Memory-mapped array of shape (n_injections, ndet, nfreq) with
+        the frequency-domain strain of all events.
+        """
+        if self._strain is None:
+            self._strain = np.load(self.path/'strain.npy', mmap_mode='r')
+        return self._strain
+
+    def get_event_data(self, i):
+        """
+        Return ``EventData`` instance of the `i`-th event, with
+        ``injection`` attribute as set by ``EventData.inject_signal``.
+        """
+        metadata = self.metadata
+        event_data = data.EventData(
+            f'{metadata["eventname_prefix"]}_{i}', self.frequencies,
+            self.strain[i], self.wht_filter, metadata['detector_names'],
+            metadata['tgps'], metadata['tcoarse'])
+
+        injection = self.injections.iloc[i]
+        h_h_cols = self.get_h_h_cols(metadata['detector_names'])
+        event_data.injection = {
+            'par_dic': injection.drop(h_h_cols).to_dict(),
+            'approximant': metadata['approximant'],
+            'h_h': injection[h_h_cols].to_numpy(dtype=float)}
+        return event_data
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.get_event_data(i)
+
+    @staticmethod
+    def get_h_h_cols(detector_names):
+        """Return names of the injections columns with ⟨h|h⟩."""
+        return [f'h_h_{det}' for det in detector_names]
+
+    @classmethod
+    def generate(cls, dirname, injections, approximant, detector_names,
+                 asd_funcs, duration, tgps, tcoarse=None, fmin=15.,
+                 df_taper=1., fmax=1024., seed=None, harmonic_modes=None,
+                 eventname_prefix='injection', n_processes=1,
+                 batch_size=64, overwrite=False,
+                 dir_permissions=utils.DIR_PERMISSIONS,
+                 file_permissions=utils.FILE_PERMISSIONS):
+        """
+        Generate a campaign and save it to a directory.
+
+        The ASDs, frequencies and whitening filter are computed once
+        and shared by all events. Events are generated in batches of
+        `batch_size` distributed over `n_processes`, each of which
+        instantiates the waveform generator once and writes directly
+        to the memory-mapped strain file. The directory is written
+        atomically.
+
+        Parameters
+        ----------
+        dirname: str or os.PathLike
+            Directory to save the campaign, must not exist unless
+            `overwrite` is ``True``.
+
+        injections: pandas.DataFrame
+            Injection parameters, one event per row. Columns must
+            include ``waveform.WaveformGenerator.params``.
+
+        approximant: str
+            Name of approximant.
+
+        detector_names, asd_funcs, duration, tgps, tcoarse, fmin,
+        df_taper, fmax:
+            See ``EventData.gaussian_noise``.
+
+        seed: int, optional
+            Use some fixed value for reproducibility.
+
+        harmonic_modes: list of 2-tuples with (l, m) pairs, optional
+            Passed to ``waveform.WaveformGenerator``.
+
+        eventname_prefix: str
+            Events are named ``f'{eventname_prefix}_{i}'``.
+
+        n_processes: int
+            Number of processes for waveform generation.
+
+        batch_size: int
+            Number of events per task sent to the processes.
+
+        overwrite: bool
+            Whether to overwrite an existing `dirname`.
+
+        Return
+        ------
+        Instance of ``InjectionCampaign``.
+        """
+        dirname = pathlib.Path(dirname)
+        if dirname.exists() and not overwrite:
+            raise FileExistsError(f'{dirname} already exists. '
+                                  'Pass `overwrite=True` to overwrite.')
+        if len(detector_names) != len(asd_funcs):
+            raise ValueError(
+                'Lengths of `detector_names` and `asd_funcs` should match.')
+        if missing := set(waveform.WaveformGenerator.params
+                          ) - set(injections.columns):
+            raise ValueError(f'`injections` is missing columns {missing}.')
+
+        tcoarse = duration / 2 if tcoarse is None else tcoarse
+        dt = 1 / (2*fmax)
+        frequencies = np.fft.rfftfreq(n=int(duration / dt), d=dt)
+        asd = np.array([asd_func(frequencies)
+                        for asd_func in data.get_asd_funcs(asd_funcs)])
+        wht_filter = data.highpass_filter(frequencies, fmin, df_taper) / asd
+        n_injections = len(injections)
+
+        utils.mkdirs(dirname.parent, dir_permissions)
+        tmpdir = pathlib.Path(tempfile.mkdtemp(dir=dirname.parent,
+                                               prefix=f'.{dirname.name}.'))
+        try:
+            np.save(tmpdir/'frequencies.npy', frequencies)
+            np.save(tmpdir/'asd.npy', asd)
+            np.save(tmpdir/'wht_filter.npy', wht_filter)
+            np.lib.format.open_memmap(
+                tmpdir/'strain.npy', mode='w+', dtype=np.complex128,
+                shape=(n_injections, len(detector_names), len(frequencies))
+                ).flush()
+
+            injections = injections.reset_index(drop=True)
+            injections.to_feather(tmpdir/cls.INJECTIONS_FILENAME)
+
+            metadata = {
+                'n_injections': n_injections,
+                'approximant': approximant,
+                'harmonic_modes': harmonic_modes,
+                'detector_names': detector_names,
+                'tgps': tgps,
+                'tcoarse': tcoarse,
+                'duration': duration,
+                'fmin': fmin,
+                'df_taper': df_taper,
+                'fmax': fmax,
+                'seed': np.random.SeedSequence(seed).entropy,
+                'eventname_prefix': eventname_prefix}
+            with open(tmpdir/cls.METADATA_FILENAME, 'w',
+                      encoding='utf-8') as metadata_file:
+                json.dump(metadata, metadata_file, cls=utils.NumpyEncoder)
+
+            batches = [range(start, min(start + batch_size, n_injections))
+                       for start in range(0, n_injections, batch_size)]
+            if n_processes == 1:
+                _init_worker(tmpdir)
+                h_h = list(map(_worker_inject, batches))
+            else:
+                with multiprocessing.Pool(n_processes,
+                                          initializer=_init_worker,
+                                          initargs=(tmpdir,)) as pool:
+                    h_h = pool.map(_worker_inject, batches)
+
+            injections[cls.get_h_h_cols(detector_names)] = np.reshape(
+                [h_h_event for h_h_batch in h_h for h_h_event in h_h_batch],
+                (n_injections, len(detector_names)))
+            injections.to_feather(tmpdir/cls.INJECTIONS_FILENAME)
+
+            for path in tmpdir.iterdir():
+                path.chmod(file_permissions)
+            tmpdir.chmod(dir_permissions)
+            if dirname.exists():
+                shutil.rmtree(dirname)
+            tmpdir.rename(dirname)
+        except BaseException:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            raise
+        finally:
+            global _worker_state
+            _worker_state = None
+
+        return cls(dirname)
@@ -8,6 +8,7 @@ and is subclassed by ``BaseRelativeBinning``.
 import inspect
 from functools import wraps
 import numpy as np
+import scipy.fft
 from scipy import special, stats
 import matplotlib.pyplot as plt
 
@@ -141,34 +142,78 @@ class CBCLikelihood(utils.JSONMixin):
             Passed to `safe_std`, keys include:
                 `expected_high`, `reject_nearby`.
         """
-        # Use all available modes to get a waveform, then reset
-        harmonic_modes = self.waveform_generator.harmonic_modes
-        self.waveform_generator.harmonic_modes = None
-        # Undo previous asd_drift so result is independent of it
-        normalized_h_f = (self._get_h_f(par_dic, normalize=True)
-                          / self.asd_drift[:, np.newaxis])
-        self.waveform_generator.harmonic_modes = harmonic_modes
-
-        z_cos, z_sin = self._matched_filter_timeseries(normalized_h_f)
-        whitened_h_f = (np.sqrt(2 * self.event_data.nfft * self.event_data.df)
-                        * self.event_data.wht_filter * normalized_h_f)
-
-        correlation_length = (4 * np.sum(np.abs(whitened_h_f)**4, axis=-1)
-                              / self.event_data.nfft)
-
-        asd_drift = np.ones_like(self.asd_drift)
-        for i_det, ncorr in enumerate(correlation_length):
-            nsamples = min(np.ceil(ncorr / tol**2).astype(int),
-                           z_cos.shape[1])
-            max_contiguous_low = np.ceil(max_tcorr_contiguous_low * ncorr
-                                        ).astype(int)
-
-            places = (i_det, np.arange(-nsamples//2, nsamples//2))
-            asd_drift[i_det] = self._safe_std(
-                np.r_[z_cos[places], z_sin[places]], max_contiguous_low,
-                **kwargs)
-
-        return asd_drift
+        return self.compute_asd_drifts([par_dic], tol,
+                                       max_tcorr_contiguous_low, **kwargs)[0]
+
+    def compute_asd_drifts(self, par_dics, tol=.02,
+                           max_tcorr_contiguous_low=16., *, batch_size=16,
+                           workers=None, **kwargs):
+        """
+        Vectorized version of ``compute_asd_drift`` for multiple
+        waveforms. The matched-filter timeseries of a batch of
+        waveforms are computed in a single multi-dimensional inverse
+        FFT, optionally using multiple threads.
+
+        Parameters
+        ----------
+        par_dics: sequence of dicts
+            Waveform parameters, keys should match
+            ``self.waveform_generator.params``.
+
+        tol, max_tcorr_contiguous_low, **kwargs:
+            Passed to ``compute_asd_drift``.
+
+        batch_size: int
+            Number of waveforms to process together, sets the memory
+            footprint.
+
+        workers: int, optional
+            Number of threads for the FFTs, passed to ``scipy.fft``.
+            Negative values count from the number of CPUs. Defaults to
+            one, so as not to oversubscribe the CPUs when called from
+            multiple processes.
+
+        Return
+        ------
+        Array of shape ``(len(par_dics), n_detectors)``.
+        """
+        par_dics = list(par_dics)
+        asd_drifts = np.ones((len(par_dics), len(self.asd_drift)))
+        for i_start in range(0, len(par_dics), batch_size):
+            # Use all available modes to get a waveform, then reset
+            harmonic_modes = self.waveform_generator.harmonic_modes
+            self.waveform_generator.harmonic_modes = None
+            # Undo previous asd_drift so result is independent of it
+            normalized_h_f = np.array([
+                self._get_reference_h_f(par_dic, normalize=True)
+                / self.asd_drift[:, np.newaxis]
+                for par_dic in par_dics[i_start : i_start + batch_size]])
+            self.waveform_generator.harmonic_modes = harmonic_modes
+
+            z_cos, z_sin = self._matched_filter_timeseries(normalized_h_f,
+                                                           workers)
+            whitened_h_f = (np.sqrt(2 * self.event_data.nfft
+                                    * self.event_data.df)
+                            * self.event_data.wht_filter * normalized_h_f)
+
+            correlation_lengths = (
+                4 * np.sum(np.abs(whitened_h_f)**4, axis=-1)
+                / self.event_data.nfft)
+
+            for i_batch, correlation_length in enumerate(correlation_lengths):
+                for i_det, ncorr in enumerate(correlation_length):
+                    nsamples = min(np.ceil(ncorr / tol**2).astype(int),
+                                   z_cos.shape[-1])
+                    max_contiguous_low = np.ceil(
+                        max_tcorr_contiguous_low * ncorr).astype(int)
+
+                    places = (i_batch, i_det,
+                              np.arange(-nsamples//2, nsamples//2))
+                    asd_drifts[i_start + i_batch, i_det] = self._safe_std(
+                        np.r_[z_cos[places], z_sin[places]],
+                        max_contiguous_low, **kwargs)
+
+        return asd_drifts
 
     def _safe_std(self, arr, max_contiguous_low=np.inf,
                   expected_high=1., reject_nearby=.5):
@@ -302,6 +347,15 @@ class CBCLikelihood(utils.JSONMixin):
             h_f /= np.sqrt(self._compute_h_h(h_f))[..., np.newaxis]
         return h_f
 
+    def _get_reference_h_f(self, par_dic, *, normalize=False, by_m=False):
+        """
+        Return waveform strain at detectors on the FFT frequency grid,
+        as used to set up the likelihood (e.g. ASD drift). Same as
+        ``_get_h_f``, subclasses may override it with a faster
+        approximation.
+        """
+        return self._get_h_f(par_dic, normalize=normalize, by_m=by_m)
+
     def _compute_h_h(self, h_f):
         """
         Return array of len ndetectors with inner product (h|h).
@@ -318,7 +372,7 @@ class CBCLikelihood(utils.JSONMixin):
         return (4 * self.event_data.df * self.asd_drift**-2
                 * np.sum(self.event_data.blued_strain * np.conj(h_f), axis=-1))
 
-    def _matched_filter_timeseries(self, normalized_h_f):
+    def _matched_filter_timeseries(self, normalized_h_f, workers=None):
         """
         Return (z_cos, z_sin), the matched filter output of a normalized
         template and its Hilbert transform.
@@ -326,18 +380,21 @@ class CBCLikelihood(utils.JSONMixin):
 
         Parameters
         ----------
-        h_f: (ndet, nrfft) array
-            Normalized frequency domain waveform.
+        h_f: (..., ndet, nrfft) array
+            Normalized frequency domain waveform(s).
+
+        workers: int, optional
+            Number of threads for the inverse FFT, see ``scipy.fft``.
 
         Return
         ------
-        z_cos, z_sin: each is a (ndet, nfft) time series.
+        z_cos, z_sin: each is a (..., ndet, nfft) time series.
         """
         factor = 2 * self.event_data.nfft * self.event_data.df
-        z_cos = factor * np.fft.irfft(self.event_data.blued_strain
-                                      * np.conj(normalized_h_f))
-        z_sin = factor * np.fft.irfft(self.event_data.blued_strain
-                                      * np.conj(1j * normalized_h_f))
+        blued_h_f = self.event_data.blued_strain * np.conj(normalized_h_f)
+        # conj(1j * h) = -1j * conj(h):
+        z_cos, z_sin = factor * scipy.fft.irfft(
+            np.stack((blued_h_f, -1j * blued_h_f)), workers=workers)
         return z_cos, z_sin
 
     def plot_whitened_wf(self, par_dic, trng=(-.7, .1), plot_data=True,
@@ -246,6 +246,17 @@ class BaseCoherentScore(utils.JSONMixin, ABC):
         self._sample_distance = utils.handle_scalars(
             np.vectorize(self.lookup_table.sample_distance, otypes=[float]))
 
+    def __getstate__(self):
+        """Drop ``_sample_distance`` for pickling, it is a closure."""
+        state = self.__dict__.copy()
+        del state['_sample_distance']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._sample_distance = utils.handle_scalars(
+            np.vectorize(self.lookup_table.sample_distance, otypes=[float]))
+
     @staticmethod
     @property
     @abstractmethod
@@ -255,6 +266,7 @@ class BaseCoherentScore(utils.JSONMixin, ABC):
         allows to verify that the lookup table is of the correct type.
         """
 
+    @utils.timed('marginalization')
     def _get_marginalization_info(self, *args, **kwargs):
         """
         Return a MarginalizationInfo object with extrinsic parameter
@@ -157,6 +157,7 @@ class LookupTable(utils.JSONMixin):
 
         return table
 
+    @utils.timed('lookup_table')
     def __call__(self, d_h, h_h):
         """
         Return ``log(evidence) - d_h**2 / h_h / 2``, where``evidence``
@@ -328,6 +329,17 @@ class LookupTableMarginalizedPhase22(LookupTable):
         self.sample_phase = utils.handle_scalars(
             np.vectorize(self._sample_phase, otypes=[float]))
 
+    def __getstate__(self):
+        """Drop ``sample_phase`` for pickling, it is a closure."""
+        state = self.__dict__.copy()
+        del state['sample_phase']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sample_phase = utils.handle_scalars(
+            np.vectorize(self._sample_phase, otypes=[float]))
+
     def _function_integrand(self, d_luminosity, d_h, h_h):
         """
         Proportional to the distance posterior. The log of the integral
@@ -2,7 +2,6 @@
 Implement class ``SkyDictionary``, useful for marginalizing over sky
 location.
 """
-import collections
 import itertools
 import numpy as np
 import scipy.signal
@@ -31,13 +30,23 @@ class SkyDictionary(utils.JSONMixin):
         self.seed = seed
         self._rng = np.random.default_rng(seed)
 
-        self.sky_samples = self._create_sky_samples()
-        self.fplus_fcross_0 = gw_utils.get_fplus_fcross_0(self.detector_names,
-                                                          **self.sky_samples)
+        sky_samples = self._create_sky_samples()
         geocenter_delays = gw_utils.get_geocenter_delays(
-            self.detector_names, **self.sky_samples)
-        self.geocenter_delay_first_det = geocenter_delays[0]
-        self.delays = geocenter_delays[1:] - geocenter_delays[0]
+            self.detector_names, **sky_samples)
+        self._set_sky_samples(
+            sky_samples,
+            fplus_fcross_0=gw_utils.get_fplus_fcross_0(self.detector_names,
+                                                       **sky_samples),
+            geocenter_delay_first_det=geocenter_delays[0],
+            delays=geocenter_delays[1:] - geocenter_delays[0])
+
+    def _set_sky_samples(self, sky_samples, fplus_fcross_0,
+                         geocenter_delay_first_det, delays):
+        """Set sky samples and the attributes that derive from them."""
+        self.sky_samples = sky_samples
+        self.fplus_fcross_0 = fplus_fcross_0
+        self.geocenter_delay_first_det = geocenter_delay_first_det
+        self.delays = delays
 
         self.delays2inds_map = self._create_delays2inds_map()
 
@@ -45,18 +54,51 @@ class SkyDictionary(utils.JSONMixin):
         self._min_delay = np.min(discrete_delays, axis=0)
         self._max_delay = np.max(discrete_delays, axis=0)
 
+        keys = tuple(discrete_delays.T)
+        inds = self.delays2inds_map.values()
+
         # (n_det-1,) float array: _sky_prior := d(Omega) / (4pi d(delays))
         self._sky_prior = np.zeros(self._max_delay - self._min_delay + 1)
-        for key, inds in self.delays2inds_map.items():
-            self._sky_prior[key] = (
-                self.f_sampling ** (len(self.detector_names) - 1)
-                * len(inds) / self.nsky)
+        self._sky_prior[keys] = (
+            self.f_sampling ** (len(self.detector_names) - 1)
+            * np.fromiter(map(len, inds), float) / self.nsky)
 
         # (n_det-1) array of generators that yield sky-indices
         self.ind_generators = np.full(self._max_delay - self._min_delay + 1,
                                       iter(()))
-        for key, inds in self.delays2inds_map.items():
-            self.ind_generators[key] = itertools.cycle(inds)
+        generators = np.empty(len(inds), object)
+        generators[:] = list(map(itertools.cycle, inds))
+        self.ind_generators[keys] = generators
+
+    def get_artifacts(self):
+        """
+        Return dictionary with the sky samples, their antenna
+        coefficients and time delays, to save them with the json.
+        """
+        return {'lat': self.sky_samples['lat'],
+                'lon': self.sky_samples['lon'],
+                'fplus_fcross_0': self.fplus_fcross_0,
+                'geocenter_delay_first_det': self.geocenter_delay_first_det,
+                'delays': self.delays}
+
+    @classmethod
+    def from_artifacts(cls, init_kwargs, artifacts):
+        """
+        Instantiate from the output of ``get_artifacts`` without
+        recomputing the sky samples.
+        """
+        sky_dict = cls.__new__(cls)
+        sky_dict.detector_names = tuple(init_kwargs['detector_names'])
+        sky_dict.nsky = init_kwargs['nsky']
+        sky_dict.f_sampling = init_kwargs['f_sampling']
+        sky_dict.seed = init_kwargs['seed']
+        sky_dict._rng = np.random.default_rng(sky_dict.seed)
+        sky_dict._set_sky_samples(
+            {'lat': artifacts['lat'], 'lon': artifacts['lon']},
+            artifacts['fplus_fcross_0'],
+            artifacts['geocenter_delay_first_det'],
+            artifacts['delays'])
+        return sky_dict
 
     def resample_timeseries(self, timeseries, times, axis=-1,
                             window=('tukey', .1)):
@@ -164,14 +206,21 @@ class SkyDictionary(utils.JSONMixin):
         indices.
         Its keys are tuples of ints of length (n_det - 1), with time
         delays to the first detector in units of 1/self.f_sampling.
-        Its values are list of indices to ``self.sky_samples`` of
+        Its values are arrays of indices to ``self.sky_samples`` of
         samples that have the corresponding (discretized) time delays.
         """
-        # (ndet-1, nsky)
-        delays_keys = zip(*np.rint(self.delays * self.f_sampling).astype(int))
-
-        delays2inds_map = collections.defaultdict(list)
-        for i_sample, delays_key in enumerate(delays_keys):
-            delays2inds_map[delays_key].append(i_sample)
-
-        return delays2inds_map
+        delays_keys = np.rint(self.delays * self.f_sampling
+                              ).astype(int)  # (ndet-1, nsky)
+
+        # Label each combination of delays with an integer
+        flat_keys = np.zeros(delays_keys.shape[1], int)
+        for det_delays in delays_keys:
+            flat_keys = (flat_keys * (np.ptp(det_delays) + 1)
+                         + det_delays - np.min(det_delays))
+
+        order = np.argsort(flat_keys, kind='stable')
+        starts = np.flatnonzero(np.diff(flat_keys[order], prepend=-1))
+        ends = np.append(starts[1:], len(order))
+        keys = map(tuple, delays_keys[:, order[starts]].T.tolist())
+        return dict(zip(keys, (order[start : end]
+                               for start, end in zip(starts, ends))))
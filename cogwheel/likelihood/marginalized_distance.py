@@ -15,7 +15,7 @@ class MarginalizedDistanceLikelihood(RelativeBinningLikelihood):
     """
     def __init__(self, lookup_table, event_data, waveform_generator,
                  par_dic_0, fbin=None, pn_phase_tol=None,
-                 spline_degree=3):
+                 spline_degree=3, multiband_phase_tol=None):
         """
         Parameters
         ----------
@@ -33,12 +33,16 @@ class MarginalizedDistanceLikelihood(RelativeBinningLikelihood):
                        relative binning.
         lookup_table: Instance of ``likelihood.LookupTable`` to compute
                       the marginalized likelihood.
+        multiband_phase_tol: Phase tolerance [rad] of the multibanded
+                             grid used to set up the summary data, or
+                             ``None`` to use the full FFT grid. See
+                             ``RelativeBinningLikelihood``.
         """
         if lookup_table.marginalized_params != {'d_luminosity'}:
             raise ValueError('Use ``LookupTable`` class.')
 
         super().__init__(event_data, waveform_generator, par_dic_0, fbin,
-                         pn_phase_tol, spline_degree)
+                         pn_phase_tol, spline_degree, multiband_phase_tol)
 
         self.lookup_table = lookup_table
 
@@ -163,6 +163,7 @@ class MarginalizedExtrinsicLikelihood(BaseRelativeBinning):
         # Count off-diagonal terms twice:
         self._h_h_weights[~np.equal(m_inds, mprime_inds)] *= 2
 
+    @utils.timed('summary')
     def _get_dh_hh(self, par_dic):
         h_mpb = self.waveform_generator.get_hplus_hcross(
             self.fbin, dict(par_dic) | self._ref_dic, by_m=True)  # mpb
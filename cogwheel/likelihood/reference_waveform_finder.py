@@ -5,18 +5,22 @@ A class ``ReferenceWaveformFinder`` is defined with methods to find
 parameters with good likelihood, these can be chosen as a reference
 solution for the relative-binning method.
 """
+import contextlib
 import warnings
 
+import lal
 import numpy as np
-from scipy.optimize import differential_evolution, minimize, minimize_scalar
+from scipy.optimize import minimize, minimize_scalar
 
 from cogwheel import data
 from cogwheel import gw_utils
+from cogwheel import utils
 from cogwheel import waveform
 from cogwheel.gw_prior.extrinsic import UniformTimePrior
 from cogwheel.skyloc_angles import SkyLocAngles
 from .likelihood import check_bounds
 from .relative_binning import RelativeBinningLikelihood
+from .template_bank import TemplateBank
 
 
 class ReferenceWaveformFinder(RelativeBinningLikelihood):
@@ -83,7 +87,7 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
                              f'crossing time {gw_utils.EARTH_CROSSING_TIME} s')
 
         self._time_range = time_range
-        self._set_summary()
+        self._update_summary()
 
     @property
     def mchirp_range(self):
@@ -102,7 +106,8 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
     @classmethod
     def from_event(cls, event, mchirp_guess, approximant='IMRPhenomXAS',
                    pn_phase_tol=.02, spline_degree=3,
-                   time_range=(-.1, .1), mchirp_range=None):
+                   time_range=(-.1, .1), mchirp_range=None,
+                   n_processes=1, use_template_bank=False):
         """
         Constructor that finds a reference waveform solution
         automatically by maximizing the likelihood.
@@ -136,6 +141,15 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
             Range of chirp mass to explore (Msun). If not provided, an
             automatic choice will be made (see method
             ``set_mchirp_range``).
+
+        n_processes: int
+            Number of processes to evaluate the likelihood in parallel
+            when maximizing it (see ``find_bestfit_pars``).
+
+        use_template_bank: bool
+            Whether to seed the maximization over intrinsic parameters
+            with the best templates of a cached ``TemplateBank`` (see
+            ``find_bestfit_pars``).
         """
         if isinstance(event, data.EventData):
             event_data = event
@@ -174,10 +188,12 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
                             spline_degree=spline_degree,
                             time_range=time_range,
                             mchirp_range=mchirp_range)
-        ref_wf_finder.find_bestfit_pars()
+        ref_wf_finder.find_bestfit_pars(
+            n_processes=n_processes, use_template_bank=use_template_bank)
         return ref_wf_finder
 
-    def find_bestfit_pars(self, seed=0):
+    def find_bestfit_pars(self, seed=0, n_processes=1,
+                          use_template_bank=False):
         """
         Find a good fit solution with restricted parameters (face-on,
         equal aligned spins). Additionally, use that to set
@@ -197,9 +213,21 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
         Parameters
         ----------
         seed: To initialize the random state of stochastic maximizers.
+
+        n_processes: Number of processes used to evaluate the
+                     population of the differential evolution
+                     maximizers in parallel.
+
+        use_template_bank: Whether to first evaluate the incoherent
+                           likelihood on a coarse ``TemplateBank``
+                           (generated and cached on first use) and add
+                           its best templates to the initial population
+                           of the intrinsic-parameter maximization.
         """
         # Optimize intrinsic parameters, update relative binning summary:
-        self._optimize_m1m2s1zs2z_incoherently(seed)
+        guesses = (self._search_template_bank(n_processes)
+                   if use_template_bank else None)
+        self._optimize_m1m2s1zs2z_incoherently(seed, n_processes, guesses)
 
         # Use waveform to define reference detector, detector pair and
         # reference frequency:
@@ -212,7 +240,7 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
         self._optimize_phase_and_distance()
 
         if not self._mchirp_range:
-            self.set_mchirp_range()
+            self.set_mchirp_range(n_processes=n_processes)
 
     def _matched_filter_timeseries_rb(self, par_dic):
         """
@@ -276,6 +304,61 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
         amp_bf = np.abs(d_h) / h_h
         return lnl, amp_bf, phase_bf
 
+    def lnlike_max_amp_phase_skyloc(self, ra, dec, t_geocenter):
+        """
+        Vectorized version of ``lnlike_max_amp_phase`` over sky
+        location and time, with the remaining parameters fixed to
+        ``self.par_dic_0``. The waveform is computed once and
+        contracted with the summary weights, the antenna coefficients
+        and time delays are evaluated as arrays.
+        Parameter bounds are not checked.
+
+        Parameters
+        ----------
+        ra, dec, t_geocenter: float or array
+            Right ascension, declination (rad) and time of arrival at
+            geocenter relative to ``tgps + tcoarse`` (s). Must
+            broadcast to a common shape.
+
+        Return
+        ------
+        Array of the broadcasted shape of the inputs, with the log
+        likelihood maximized over amplitude and phase.
+        """
+        ra, dec, t_geocenter = np.broadcast_arrays(ra, dec, t_geocenter)
+        shape = ra.shape
+        ra, dec, t_geocenter = map(np.ravel, (ra, dec, t_geocenter))
+
+        detector_names = self.waveform_generator.detector_names
+        gmst = lal.GreenwichMeanSiderealTime(self.event_data.tgps)
+        fplus_fcross = gw_utils.get_fplus_fcross(  # npd
+            detector_names, ra, dec, self.par_dic_0['psi'], gmst)
+        time_delays = gw_utils.get_time_delays(  # dn
+            detector_names, ra, dec, gmst)
+        shifts = np.exp(2j*np.pi * self.fbin
+                        * (self.waveform_generator.tcoarse + t_geocenter
+                           + time_delays)[..., np.newaxis])  # dnf
+
+        hplus_hcross = self.waveform_generator.get_hplus_hcross(  # mpf
+            self.fbin,
+            {par: self.par_dic_0[par]
+             for par in self.waveform_generator._waveform_params},
+            by_m=True)
+
+        d_h_dfp = np.einsum('mdf, mpf -> dfp',
+                            self._d_h_weights, hplus_hcross.conj())
+        d_h = np.einsum('dnp, npd -> n', shifts @ d_h_dfp, fplus_fcross)
+
+        # Time shifts cancel in (h|h):
+        m_inds, mprime_inds = self.waveform_generator.get_m_mprime_inds()
+        h_h_ppd = np.einsum('mdf, mpf, mPf -> pPd',
+                            self._h_h_weights, hplus_hcross[m_inds],
+                            hplus_hcross[mprime_inds].conj()).real
+        h_h = np.einsum('pPd, npd, nPd -> n',
+                        h_h_ppd, fplus_fcross, fplus_fcross)
+
+        return np.reshape(np.abs(d_h)**2 / h_h / 2, shape)
+
     def _set_summary(self):
         """Set usual summary data plus ``_d_h_timeseries_weights``."""
         super()._set_summary()
@@ -300,21 +383,117 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
         par_dic = self._updated_intrinsic(mchirp, eta, chieff)
         return self.lnlike_max_amp_phase_time(par_dic)
 
-    def _optimize_m1m2s1zs2z_incoherently(self, seed):
+    def _minus_lnlike_incoherent(self, mchirp_eta_chieff):
+        """
+        Loss function for maximizing ``_lnlike_incoherent``, takes an
+        array with ``(mchirp, eta, chieff)``. Being a method, it can be
+        pickled to evaluate it in a pool of processes.
+        """
+        return -self._lnlike_incoherent(*mchirp_eta_chieff)
+
+    def _lnlike_incoherent_templates(self, hplus_hcross, chunk_size=256):
+        """
+        Vectorized version of ``lnlike_max_amp_phase_time`` over
+        templates, with the extrinsic parameters of ``self.par_dic_0``.
+        The matched-filter timeseries of each detector are computed for
+        a chunk of templates at a time as one matrix product against
+        the time-shifted summary weights.
+
+        Parameters
+        ----------
+        hplus_hcross: complex array of shape (n_templates, n_m, 2, n_f)
+            Waveforms on the ``self.fbin`` grid, by harmonic mode ``m``
+            (see ``TemplateBank``).
+
+        chunk_size: int
+            Number of templates processed at once, sets the memory
+            usage.
+
+        Return
+        ------
+        Array of length n_templates with the log likelihood maximized
+        over amplitude, phase and time incoherently across detectors.
+        """
+        detector_names = self.waveform_generator.detector_names
+        tgps = self.waveform_generator.tgps
+        fplus_fcross = gw_utils.fplus_fcross(  # pd
+            detector_names, self.par_dic_0['ra'], self.par_dic_0['dec'],
+            self.par_dic_0['psi'], tgps)
+        time_delays = gw_utils.time_delay_from_geocenter(
+            detector_names, self.par_dic_0['ra'], self.par_dic_0['dec'],
+            tgps)
+        shifts = np.exp(-2j*np.pi * self.fbin
+                        * (self.waveform_generator.tcoarse
+                           + time_delays[:, np.newaxis]))  # df
+
+        n_times, n_m, n_det, n_f = self._d_h_timeseries_weights.shape
+        d_h_weights = np.moveaxis(self._d_h_timeseries_weights, 2, 0
+                                  ).reshape(n_det, n_times, n_m * n_f)
+        m_inds, mprime_inds = self.waveform_generator.get_m_mprime_inds()
+
+        lnl = np.zeros(len(hplus_hcross))
+        for start in range(0, len(hplus_hcross), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            h_fbin = np.einsum('pd, nmpf, df -> dnmf',
+                               fplus_fcross, hplus_hcross[chunk], shifts)
+            d_h = d_h_weights @ np.conj(  # d, t, n
+                h_fbin.reshape(n_det, -1, n_m * n_f).transpose(0, 2, 1))
+            h_h = np.einsum('Mdf, dnMf -> dn',
+                            self._h_h_weights,
+                            h_fbin[:, :, m_inds]
+                            * h_fbin[:, :, mprime_inds].conj()).real
+            lnl[chunk] = np.sum(
+                np.divide(np.max(np.abs(d_h), axis=1)**2, 2 * h_h,
+                          out=np.zeros_like(h_h), where=h_h > 0),
+                axis=0)
+        return lnl
+
+    def _search_template_bank(self, n_processes=1, n_guesses=16):
+        """
+        Evaluate the incoherent likelihood on the templates of a
+        ``TemplateBank`` within ``self.mchirp_range`` and return the
+        ``(mchirp, eta, chieff)`` of the best `n_guesses`, as an array
+        of shape (n_guesses, 3).
+        """
+        template_bank = TemplateBank.get(
+            self.waveform_generator, self.fbin, self.mchirp_range,
+            self.eta_range, self.chieff_range, n_processes=n_processes)
+
+        mchirp = template_bank.intrinsic[:, 0]
+        inds = np.flatnonzero((mchirp >= self.mchirp_range[0])
+                              & (mchirp <= self.mchirp_range[1]))
+        if inds.size == 0:
+            return None
+
+        lnl = self._lnlike_incoherent_templates(
+            template_bank.hplus_hcross[inds])
+        best = inds[np.argsort(lnl)[::-1][:n_guesses]]
+        print(f'Searched {len(inds)} templates, best lnL = {np.max(lnl)}')
+        return template_bank.intrinsic[best]
+
+    def _optimize_m1m2s1zs2z_incoherently(self, seed, n_processes=1,
+                                          guesses=None):
         """
         Optimize mchirp, eta and chieff by likelihood maximized over
         amplitude, phase and time incoherently across detectors.
         Modify the entries of `self.par_dic_0` correspondig to
         `m1, m2, s1z, s2z` with the new solution (this will update the
         relative-binning summary data).
+        The population of differential evolution is evaluated over
+        `n_processes`. If `guesses` of ``(mchirp, eta, chieff)`` are
+        passed, they are added to the initial population, which is
+        otherwise made smaller.
         """
         print(f'Searching incoherent solution for {self.event_data.eventname}')
 
-        result = differential_evolution(
-            lambda mchirp_eta_chieff:
-                -self._lnlike_incoherent(*mchirp_eta_chieff),
+        # With good guesses a smaller population suffices:
+        popsize = 15 if guesses is None else 5
+
+        result = utils.differential_evolution(
+            self._minus_lnlike_incoherent,
             bounds=[self.mchirp_range, self.eta_range, self.chieff_range],
-            seed=seed, init='sobol')
+            guesses=guesses, popsize=popsize, seed=seed, init='sobol',
+            n_processes=n_processes)
 
         self.par_dic_0 = self._updated_intrinsic(*result.x)
         print(f'Set intrinsic parameters, lnL = {-result.fun}')
@@ -372,10 +551,14 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
                 t_refdet=t0_refdet, ra=ra, dec=dec)
             return self.par_dic_0 | {'ra': ra, 'dec': dec} | t_geocenter_dic
 
-        @np.vectorize
+        gmst = lal.GreenwichMeanSiderealTime(self.event_data.tgps)
+
         def lnlike_skyloc(thetanet, phinet):
-            par_dic = get_updated_par_dic(thetanet, phinet)
-            return self.lnlike_max_amp_phase(par_dic)
+            """Vectorized over `thetanet`, `phinet`."""
+            ra, dec = skyloc.thetaphinet_to_radec(thetanet, phinet)
+            t_geocenter = t0_refdet - gw_utils.get_time_delays(
+                detector_pair[0], ra, dec, gmst)[0]
+            return self.lnlike_max_amp_phase_skyloc(ra, dec, t_geocenter)
 
         # Maximize on a grid, then refine
         thetanets = np.linspace(0, np.pi, 40)
@@ -415,7 +598,8 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
 
         print(f'Set phase and distance, lnL = {max_lnl}')
 
-    def set_mchirp_range(self, lnl_drop=5., max_doublings=2, seed=0):
+    def set_mchirp_range(self, lnl_drop=5., max_doublings=2, seed=0,
+                         n_processes=1):
         """
         Set self._mchirp_range as `(mchirp_min, mchirp_max)`, bounds for
         the chirp mass that are deemed safe for parameter esimation
@@ -428,6 +612,9 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
         The chirp-mass range is expanded (roughly doubled) a maximum
         number of times given by `max_doublings`, if this is reached a
         warning is issued.
+        The maximization over ``(eta, chieff)`` evaluates the
+        population of differential evolution over `n_processes`,
+        the same pool is used for all values of ``mchirp``.
         """
         lnl_0 = self.lnlike_max_amp_phase_time(self.par_dic_0)
         mchirp_0 = gw_utils.m1m2_to_mchirp(self.par_dic_0['m1'],
@@ -435,30 +622,42 @@ class ReferenceWaveformFinder(RelativeBinningLikelihood):
         mchirp_range = list(
             gw_utils.estimate_mchirp_range(mchirp_0, snr=np.sqrt(2*lnl_0)))
 
-        def has_low_likelihood(mchirp):
-            """
-            Return boolean, whether the incoherent likelihood maximized
-            over ``(eta, chieff)`` drops by at least `lnl_drop` of its
-            value for the reference waveform.
-            """
-            lnl = -differential_evolution(
-                lambda eta_chieff:
-                    -self._lnlike_incoherent(mchirp, *eta_chieff),
-                bounds=[self.eta_range, self.chieff_range],
-                seed=seed, init='sobol').fun
-            return lnl < lnl_0 - lnl_drop
-
-        # Expand left and right edges of the range as necessary:
-        for i in (0, 1):
-            n_doublings = 0
-            while not has_low_likelihood(mchirp_range[i]):
-                if n_doublings >= max_doublings:
-                    warnings.warn('Reached maximum `mchirp_range` expansions.')
-                    break
-
-                mchirp_range[i] = gw_utils.estimate_mchirp_range.expand_range(
-                    mchirp_0, mchirp_range[i])
-                n_doublings += 1
+        with contextlib.ExitStack() as stack:
+            if n_processes == 1:
+                loss_function = self._minus_lnlike_incoherent
+                vectorized_kwargs = {}
+            else:
+                loss_function = stack.enter_context(utils.pool_vectorize(
+                    self._minus_lnlike_incoherent, n_processes))
+                vectorized_kwargs = {'vectorized': True,
+                                     'updating': 'deferred'}
+
+            def has_low_likelihood(mchirp):
+                """
+                Return boolean, whether the incoherent likelihood
+                maximized over ``(eta, chieff)`` drops by at least
+                `lnl_drop` of its value for the reference waveform.
+                """
+                lnl = -utils.differential_evolution(
+                    lambda eta_chieff: loss_function(np.concatenate(
+                        (np.full_like(eta_chieff[:1], mchirp), eta_chieff))),
+                    bounds=[self.eta_range, self.chieff_range],
+                    seed=seed, init='sobol', **vectorized_kwargs).fun
+                return lnl < lnl_0 - lnl_drop
+
+            # Expand left and right edges of the range as necessary:
+            for i in (0, 1):
+                n_doublings = 0
+                while not has_low_likelihood(mchirp_range[i]):
+                    if n_doublings >= max_doublings:
+                        warnings.warn(
+                            'Reached maximum `mchirp_range` expansions.')
+                        break
+
+                    mchirp_range[i] \
+                        = gw_utils.estimate_mchirp_range.expand_range(
+                            mchirp_0, mchirp_range[i])
+                    n_doublings += 1
 
         self._mchirp_range = tuple(mchirp_range)
         print(f'Set mchirp_range = {self.mchirp_range}')
@@ -24,6 +24,7 @@ from abc import ABC, abstractmethod
 import numpy as np
 import scipy.interpolate
 import scipy.sparse
+import lal
 
 from cogwheel import gw_utils
 from cogwheel import utils
@@ -37,8 +38,13 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
     Concrete classes need to specify how they construct their summary
     data.
     """
+    # Number of FFT frequencies per band when constructing summary data
+    # band by band, sets the size of temporary arrays:
+    SUMMARY_BAND_SIZE = 2**14
+
     def __init__(self, event_data, waveform_generator, par_dic_0,
-                 fbin=None, pn_phase_tol=None, spline_degree=3):
+                 fbin=None, pn_phase_tol=None, spline_degree=3,
+                 multiband_phase_tol=None):
         """
         Parameters
         ----------
@@ -62,6 +68,17 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
         spline_degree: int
             Degree of the spline used to interpolate the ratio between
             waveform and reference waveform for relative binning.
+
+        multiband_phase_tol: float or None
+            If passed, the reference waveform used to compute summary
+            data and ASD drift is generated on a multibanded frequency
+            grid with this phase tolerance [rad] and interpolated to
+            the FFT grid. This saves waveform evaluations, so the setup
+            is cheaper for long signals with expensive approximants.
+            Memory is not reduced: the data, the interpolated reference
+            waveform and the summary inputs remain on the full FFT
+            grid. ``None`` (default) uses the full FFT grid. See
+            ``data.EventData.get_multiband_inds``.
         """
         if (fbin is None) == (pn_phase_tol is None):
             raise ValueError('Pass exactly one of `fbin` or `pn_phase_tol`.')
@@ -70,8 +87,11 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
 
         self._coefficients = None  # Set by ``._set_splines``
         self._basis_splines = None  # Set by ``._set_splines``
+        self._spline_support = None  # Set by ``._set_splines``
 
         self._spline_degree = spline_degree
+        self._multiband_phase_tol = multiband_phase_tol
+        self._summary = None  # Set by ``._update_summary``
 
         # Backward compatibility fix, shouldn't happen in new code:
         if ({'s1x_n', 's1y_n', 's2x_n', 's2y_n'}.isdisjoint(par_dic_0.keys())
@@ -106,6 +126,46 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
         # Reset
         self.waveform_generator.disable_precession = disable_precession
 
+    def _update_summary(self):
+        """
+        Set the summary data with ``._set_summary``, unless it was
+        passed to ``from_artifacts``. Keep track of the attributes that
+        it sets, so ``get_artifacts`` can return them.
+        """
+        summary = self.__dict__.pop('_summary_artifacts', None)
+        if summary is None:
+            old_attributes = self.__dict__.copy()
+            self._set_summary()
+            summary = {key: value for key, value in self.__dict__.items()
+                       if old_attributes.get(key) is not value}
+        else:
+            self.__dict__.update(summary)
+        self._summary = summary
+
+    def get_artifacts(self):
+        """
+        Return dictionary with the summary data so it is saved along
+        with the json, or ``None`` if it is not made of arrays or was
+        edited since it was computed.
+        """
+        if self._summary is None or any(
+                not isinstance(value, np.ndarray)
+                or self.__dict__.get(key) is not value
+                for key, value in self._summary.items()):
+            return None
+        return self._summary
+
+    @classmethod
+    def from_artifacts(cls, init_kwargs, artifacts):
+        """
+        Instantiate using the summary data from ``get_artifacts``
+        instead of recomputing it.
+        """
+        likelihood = cls.__new__(cls)
+        likelihood._summary_artifacts = artifacts
+        likelihood.__init__(**init_kwargs)
+        return likelihood
+
     @property
     def pn_phase_tol(self):
         """
@@ -158,7 +218,7 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
         self._fbin = self.event_data.frequencies[fbin_ind]  # Bin edges
 
         self._set_splines()
-        self._set_summary()
+        self._update_summary()
         self._pn_phase_tol = None  # Erase potentially outdated information
 
     @property
@@ -169,7 +229,115 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
     @par_dic_0.setter
     def par_dic_0(self, par_dic_0):
         self._par_dic_0 = par_dic_0
-        self._set_summary()
+        self._update_summary()
+
+    @property
+    def multiband_phase_tol(self):
+        """
+        Phase tolerance [rad] of the multibanded frequency grid used to
+        generate the reference waveform, or ``None`` to use the full
+        FFT grid. Editing it will automatically recompute the summary
+        data.
+        """
+        return self._multiband_phase_tol
+
+    @multiband_phase_tol.setter
+    def multiband_phase_tol(self, multiband_phase_tol):
+        self._multiband_phase_tol = multiband_phase_tol
+        self._update_summary()
+
+    def _get_reference_h_f(self, par_dic, *, normalize=False, by_m=False):
+        """
+        Return waveform strain at detectors on the FFT frequency grid.
+        If ``multiband_phase_tol`` is set, the waveform is generated on
+        a multibanded grid adapted to its chirp, its time shift is
+        removed, it is interpolated to the FFT grid with local cubic
+        polynomials and the time shift is restored. The result is on
+        the full FFT grid either way.
+        """
+        inds = None
+        if self.multiband_phase_tol is not None:
+            # Higher modes at a given frequency are further from merger:
+            m_max = max(self.waveform_generator._harmonic_modes_by_m)
+            mchirp = gw_utils.m1m2_to_mchirp(par_dic['m1'], par_dic['m2'])
+            inds = self.event_data.get_multiband_inds(
+                lambda f: gw_utils.time_to_merger(2 * f / m_max, mchirp),
+                self.multiband_phase_tol)
+
+        if inds is None or len(inds) < 4:
+            return super()._get_reference_h_f(par_dic, normalize=normalize,
+                                              by_m=by_m)
+
+        f_coarse = self.event_data.frequencies[inds]
+        time_shifts = (self.waveform_generator.tcoarse
+                       + par_dic['t_geocenter']
+                       + gw_utils.time_delay_from_geocenter(
+                           self.event_data.detector_names, par_dic['ra'],
+                           par_dic['dec'], self.event_data.tgps))
+
+        h_coarse = (self.waveform_generator.get_strain_at_detectors(
+                        f_coarse, par_dic, by_m=True)
+                    * np.exp(2j*np.pi * np.outer(time_shifts, f_coarse)))
+
+        shape = ((len(self.waveform_generator._harmonic_modes_by_m),)
+                 + self.event_data.strain.shape)
+        h_f = np.zeros(shape, dtype=np.complex_)
+        fslice = self.event_data.fslice
+        f_fine = self.event_data.frequencies[fslice]
+        h_f[..., fslice] = (
+            self._interpolate_multiband(
+                inds, h_coarse, np.arange(fslice.start, fslice.stop))
+            * np.exp(-2j*np.pi * np.outer(time_shifts, f_fine)))
+
+        if not by_m:
+            h_f = np.sum(h_f, axis=0)
+        if normalize:
+            h_f /= np.sqrt(self._compute_h_h(h_f))[..., np.newaxis]
+        return h_f
+
+    @staticmethod
+    def _interpolate_multiband(inds, values, fine_inds):
+        """
+        Interpolate `values` known at frequency indices `inds` (a
+        multibanded grid) to `fine_inds`, with local cubic Lagrange
+        polynomials through the 4 nearest grid points.
+
+        Parameters
+        ----------
+        inds: 1-d int array
+            Increasing indices of the multibanded grid, at least 4.
+
+        values: array of shape (..., len(inds))
+            Values on the multibanded grid.
+
+        fine_inds: 1-d int array
+            Indices where to interpolate, within ``inds[[0, -1]]``.
+
+        Return
+        ------
+        Array of shape (..., len(fine_inds)).
+        """
+        # Nodes are inds[j-1 : j+3], with inds[j] <= fine_ind
+        j = np.clip(np.searchsorted(inds, fine_inds, 'right') - 1,
+                    1, len(inds) - 3)
+        columns = j + np.arange(-1, 3)[:, np.newaxis]  # (4, n_fine)
+        nodes = inds[columns]
+        weights = np.ones(columns.shape)
+        for a in range(4):
+            for b in range(4):
+                if b != a:
+                    weights[a] *= ((fine_inds - nodes[b])
+                                   / (nodes[a] - nodes[b]))
+
+        # Sparse interpolation matrix of shape (n_fine, len(inds))
+        interpolation_matrix = scipy.sparse.csr_matrix(
+            (weights.T.ravel(), columns.T.ravel(),
+             np.arange(0, weights.size + 1, 4)),
+            shape=(len(fine_inds), len(inds)))
+
+        *pre_shape, n_coarse = values.shape
+        return (interpolation_matrix @ values.reshape(-1, n_coarse).T
+                ).T.reshape(pre_shape + [len(fine_inds)])
 
     @property
     def spline_degree(self):
@@ -184,11 +352,12 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
     def spline_degree(self, spline_degree):
         self._spline_degree = spline_degree
         self._set_splines()
-        self._set_summary()
+        self._update_summary()
 
     def _set_splines(self):
         """
-        Set attributes `_basis_splines` and `_coefficients`.
+        Set attributes `_basis_splines`, `_spline_support` and
+        `_coefficients`.
         `_basis_splines` is a sparse array of shape `(nbin, nrfft)`
         whose rows are the B-spline basis elements for `fbin` evaluated
         on the FFT grid.
@@ -199,6 +368,8 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
         shape `(nbin, nrfft)` whose i-th row is a spline that interpolates
         on `fbin` an array of zeros with a one in the i-th place; this
         spline is evaluated on the RFFT grid.
+        `_spline_support` is a slice of the RFFT grid outside of which
+        `_basis_splines` vanish.
         """
         nbin = len(self.fbin)
         coefficients = np.empty((nbin, nbin))
@@ -209,20 +380,30 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
             coefficients[i_bin] = coeffs[:nbin]
         self._coefficients = coefficients
 
-        nrfft = len(self.event_data.frequencies)
-        basis_splines = scipy.sparse.lil_matrix((nbin, nrfft))
-        for i_bin in range(nbin):
-            element_knots = knots[i_bin : i_bin + self.spline_degree + 2]
-            basis_element = scipy.interpolate.BSpline.basis_element(
-                element_knots)
-            i_start, i_end = np.searchsorted(self.event_data.frequencies,
-                                             element_knots[[0, -1]])
-            basis_splines[i_bin, i_start : i_end] = basis_element(
-                self.event_data.frequencies[i_start : i_end])
-
-        self._basis_splines = basis_splines.tocsr()
+        # Evaluate all basis elements at once on [fbin[0], fbin[-1])
+        i_start, i_end = np.searchsorted(self.event_data.frequencies,
+                                         self.fbin[[0, -1]])
+        design_matrix = scipy.interpolate.BSpline.design_matrix(
+            self.event_data.frequencies[i_start : i_end], knots,
+            self.spline_degree).tocoo()
+        self._basis_splines = scipy.sparse.csc_matrix(
+            (design_matrix.data,
+             (design_matrix.col, design_matrix.row + i_start)),
+            shape=(nbin, len(self.event_data.frequencies)))
+        self._spline_support = slice(i_start, i_end)
+
+    def _get_summary_bands(self):
+        """
+        Return list of slices of the RFFT grid that partition the
+        support of the basis splines in bands of ``SUMMARY_BAND_SIZE``,
+        to compute summary data band by band (see
+        ``_get_summary_weights``).
+        """
+        start, stop = self._spline_support.start, self._spline_support.stop
+        return [slice(i, min(i + self.SUMMARY_BAND_SIZE, stop))
+                for i in range(start, stop, self.SUMMARY_BAND_SIZE)]
 
-    def _get_summary_weights(self, integrand):
+    def _get_summary_weights(self, integrand, band=None):
         """
         Return summary data to compute efficiently integrals of the form
             4 integral g(f) r(f) df,
@@ -237,7 +418,13 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
         integrand: array of shape (..., nrfft)
             g(f) in the above notation (the oscillatory part of the
             integrand), array whose last axis corresponds to the FFT
-            frequency grid.
+            frequency grid, or to `band` of it if passed.
+
+        band: slice, optional
+            Band of the FFT frequency grid where `integrand` is given.
+            Summary weights are additive over bands, so they can be
+            computed band by band without allocating arrays of the
+            size of the full grid (see ``_get_summary_bands``).
 
         Return
         ------
@@ -245,13 +432,13 @@ class BaseRelativeBinning(CBCLikelihood, ABC):
             array shaped like `integrand` except the last axis now
             correponds to the frequency bins.
         """
+        basis_splines = (self._basis_splines if band is None
+                         else self._basis_splines[:, band])
         # Broadcast manually
         *pre_shape, nrfft = integrand.shape
-        shape = pre_shape + [len(self.fbin)]
-        projected_integrand = np.zeros(shape, dtype=np.complex_)
-        for i, arr_f in enumerate(integrand.reshape(-1, nrfft)):
-            projected_integrand[np.unravel_index(i, pre_shape)] \
-                = self._basis_splines @ arr_f
+        projected_integrand = (
+            basis_splines @ integrand.reshape(-1, nrfft).T
+            ).T.reshape(pre_shape + [len(self.fbin)])
 
         return (4 * self.event_data.df
                 * projected_integrand.dot(self._coefficients.T))
@@ -407,7 +594,67 @@ class RelativeBinningLikelihood(BaseRelativeBinning):
                                        fplus_fcross, hh_phasor)
         return d_h, h_h
     
-    @utils.lru_cache(maxsize=16)
+    def lnlike_detectors_no_asd_drift_samples(self, samples):
+        """
+        Vectorized version of ``lnlike_detectors_no_asd_drift`` over
+        multiple samples. The summary inner products are computed
+        sample by sample, the dependence on ``ra, dec, psi, phi_ref``
+        and ``d_luminosity`` is vectorized.
+        Parameter bounds are not checked.
+
+        Parameters
+        ----------
+        samples: pandas.DataFrame
+            Columns should include ``self.params``.
+
+        Return
+        ------
+        Array of shape ``(n_samples, n_detectors)`` with the values of
+        `(d|h) - (h|h)/2`, no ASD-drift correction applied.
+        """
+        polarization_params = self.waveform_generator.polarization_params
+        d_h_mpd, h_h_mpd = map(np.array, zip(*(
+            self._get_dh_hh_by_m_polarization_detector(tuple(
+                (dict(zip(polarization_params, values))
+                 | self._FIDUCIAL_CONFIGURATION).items()))
+            for values in samples[polarization_params].itertuples(
+                index=False))))
+
+        dphi = (samples['phi_ref'].to_numpy()
+                - self._FIDUCIAL_CONFIGURATION['phi_ref'])
+        amp_ratio = (self._FIDUCIAL_CONFIGURATION['d_luminosity']
+                     / samples['d_luminosity'].to_numpy())
+
+        m_arr = np.fromiter(
+            self.waveform_generator._harmonic_modes_by_m, int)
+        m_inds, mprime_inds = self.waveform_generator.get_m_mprime_inds()
+        dh_phasor = np.exp(-1j * np.outer(dphi, m_arr))
+        hh_phasor = np.exp(1j * np.outer(dphi, m_arr[m_inds]
+                                               - m_arr[mprime_inds]))
+
+        fplus_fcross = self._get_fplus_fcross_samples(samples)  # npd
+
+        d_h = np.einsum('n, nmpd, npd, nm -> nd',
+                        amp_ratio, d_h_mpd, fplus_fcross, dh_phasor,
+                        optimize=True).real
+        h_h = np.einsum('n, nmpPd, npd, nPd, nm -> nd',
+                        amp_ratio**2, h_h_mpd, fplus_fcross, fplus_fcross,
+                        hh_phasor, optimize=True).real
+        return d_h - h_h/2
+
+    def _get_fplus_fcross_samples(self, samples):
+        """
+        Return array of shape ``(n_samples, 2, n_detectors)`` with the
+        antenna coefficients F+, Fx, vectorized over samples.
+        """
+        return gw_utils.get_fplus_fcross(
+            self.waveform_generator.detector_names,
+            samples['ra'].to_numpy(), samples['dec'].to_numpy(),
+            samples['psi'].to_numpy(),
+            lal.GreenwichMeanSiderealTime(self.waveform_generator.tgps))
+
+    @utils.lru_cache(maxsize=16, invalidated_by=('waveform',))
+    @utils.timed('summary')
     def _get_dh_hh_by_m_polarization_detector(self, par_dic_items):
         """
         Return ``d_h_0`` and ``h_h_0``, complex inner products for a
@@ -476,20 +723,26 @@ class RelativeBinningLikelihood(BaseRelativeBinning):
         disable_precession = self.waveform_generator.disable_precession
         self.waveform_generator.disable_precession = False
 
-        self._h0_f = self._get_h_f(self.par_dic_0, by_m=True)
+        self._h0_f = self._get_reference_h_f(self.par_dic_0, by_m=True)
         self._h0_fbin = self.waveform_generator.get_strain_at_detectors(
             self.fbin, self.par_dic_0, by_m=True)  # n_m x ndet x len(fbin)
 
-        d_h0 = self.event_data.blued_strain * self._h0_f.conj()
-        self._d_h_weights = (self._get_summary_weights(d_h0)
-                             / np.conj(self._h0_fbin))
-
+        # Construct summary data band by band to save memory
         m_inds, mprime_inds = self.waveform_generator.get_m_mprime_inds()
-        h0m_h0mprime = (self._h0_f[m_inds] * self._h0_f[mprime_inds].conj()
-                        * self.event_data.wht_filter ** 2)
-        self._h_h_weights = (self._get_summary_weights(h0m_h0mprime)
-                             / (self._h0_fbin[m_inds]
-                                * self._h0_fbin[mprime_inds].conj()))
+        d_h_summary = 0
+        h_h_summary = 0
+        for band in self._get_summary_bands():
+            h0_f = self._h0_f[..., band]
+            d_h0 = self.event_data.blued_strain[:, band] * h0_f.conj()
+            d_h_summary += self._get_summary_weights(d_h0, band)
+
+            h0m_h0mprime = (h0_f[m_inds] * h0_f[mprime_inds].conj()
+                            * self.event_data.wht_filter[:, band] ** 2)
+            h_h_summary += self._get_summary_weights(h0m_h0mprime, band)
+
+        self._d_h_weights = d_h_summary / np.conj(self._h0_fbin)
+        self._h_h_weights = h_h_summary / (self._h0_fbin[m_inds]
+                                           * self._h0_fbin[mprime_inds].conj())
         # Count off-diagonal terms twice:
         self._h_h_weights[~np.equal(m_inds, mprime_inds)] *= 2
 
@@ -0,0 +1,164 @@
+"""
+Provide class ``TemplateBank``, a coarse bank of waveforms on a
+relative-binning frequency grid. It is used by
+``ReferenceWaveformFinder`` to seed the maximization of the likelihood
+over intrinsic parameters.
+
+Banks are cached to disk in ``TEMPLATE_BANKS_DIR`` (one subdirectory
+per bank, identified by a hash of its settings) and memory-mapped on
+load, so they are generated only once per approximant and frequency
+grid.
+"""
+import functools
+import hashlib
+import json
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+from scipy.stats import qmc
+
+from cogwheel import gw_utils
+from cogwheel import utils
+
+TEMPLATE_BANKS_DIR = pathlib.Path(__file__).parent/'template_banks'
+
+
+class TemplateBank:
+    """
+    Bank of ``(h+, hx)`` waveforms by harmonic mode ``m``, evaluated on
+    a frequency grid, with aligned, equal spins
+    ``s1z = s2z = chieff``. Templates are a scrambled Sobol sequence in
+    ``(log(mchirp), eta, chieff)``, so any subset of the bank covers the
+    space roughly uniformly.
+
+    Attributes
+    ----------
+    intrinsic: float array of shape (n_templates, 3)
+        ``(mchirp, eta, chieff)`` of the templates.
+
+    hplus_hcross: complex array of shape (n_templates, n_m, 2, n_f)
+        Memory-mapped waveforms, at ``d_luminosity = 1 Mpc`` and the
+        fixed parameters ``FIXED_PAR_DIC``.
+    """
+    FIXED_PAR_DIC = {'iota': 1., 'phi_ref': 0., 'd_luminosity': 1.,
+                     'f_ref': 100., 'l1': 0., 'l2': 0.,
+                     's1x_n': 0., 's1y_n': 0., 's2x_n': 0., 's2y_n': 0.}
+    METADATA_FILENAME = 'metadata.json'
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(self.path/self.METADATA_FILENAME,
+                  encoding='utf-8') as metadata_file:
+            self.metadata = json.load(metadata_file)
+        self.intrinsic = np.load(self.path/'intrinsic.npy')
+        self.hplus_hcross = np.load(self.path/'hplus_hcross.npy',
+                                    mmap_mode='r')
+
+    @classmethod
+    def get(cls, waveform_generator, fbin, mchirp_range, eta_range,
+            chieff_range, n_templates=2**12, n_processes=1):
+        """
+        Load a bank with the requested settings from
+        ``TEMPLATE_BANKS_DIR``, generating and saving it first if it
+        does not exist.
+
+        Parameters
+        ----------
+        waveform_generator: waveform.WaveformGenerator
+            Its approximant and harmonic modes are used.
+
+        fbin: 1-d array
+            Frequencies at which to evaluate the waveforms (Hz).
+
+        mchirp_range, eta_range, chieff_range: (float, float)
+            Bounds of the bank. `mchirp_range` is expanded to powers of
+            2 so that events with similar chirp mass share the bank.
+
+        n_templates: int
+            Number of templates, should be a power of 2.
+
+        n_processes: int
+            Number of processes to generate the waveforms.
+
+        Return
+        ------
+        Instance of ``TemplateBank``.
+        """
+        mchirp_range = tuple(2.**np.array([np.floor(np.log2(mchirp_range[0])),
+                                           np.ceil(np.log2(mchirp_range[1]))]))
+        metadata = {
+            'approximant': waveform_generator.approximant,
+            'harmonic_modes': waveform_generator.harmonic_modes,
+            'lalsimulation_commands':
+                waveform_generator.lalsimulation_commands,
+            'fbin': np.asarray(fbin).tolist(),
+            'mchirp_range': mchirp_range,
+            'eta_range': tuple(eta_range),
+            'chieff_range': tuple(chieff_range),
+            'n_templates': n_templates,
+            'fixed_par_dic': cls.FIXED_PAR_DIC}
+        key = hashlib.sha1(json.dumps(metadata, cls=utils.NumpyEncoder,
+                                      sort_keys=True).encode()
+                           ).hexdigest()[:16]
+        path = TEMPLATE_BANKS_DIR/f'{waveform_generator.approximant}_{key}'
+
+        if not (path/cls.METADATA_FILENAME).exists():
+            cls._generate(path, metadata, waveform_generator, n_processes)
+        return cls(path)
+
+    @classmethod
+    def _get_hplus_hcross(cls, waveform_generator, fbin, mchirp_eta_chieff):
+        """
+        Return array of shape ``(n_m, 2, len(fbin))`` with the template
+        of parameters `mchirp_eta_chieff`, zeros if LAL fails.
+        """
+        mchirp, eta, chieff = mchirp_eta_chieff
+        m1, m2 = gw_utils.mchirpeta_to_m1m2(mchirp, eta)
+        par_dic = cls.FIXED_PAR_DIC | dict(m1=m1, m2=m2,
+                                           s1z=chieff, s2z=chieff)
+        try:
+            return waveform_generator.get_hplus_hcross(fbin, par_dic,
+                                                       by_m=True)
+        except RuntimeError:  # LAL error, e.g. out of domain
+            return np.zeros((len(waveform_generator._harmonic_modes_by_m),
+                             2, len(fbin)), complex)
+
+    @classmethod
+    def _generate(cls, path, metadata, waveform_generator, n_processes):
+        """Compute the waveforms and save the bank atomically."""
+        print(f'Generating template bank {path.name}...')
+        unit_cube = qmc.Sobol(3, seed=0).random(metadata['n_templates'])
+        log_mchirp_range = np.log(metadata['mchirp_range'])
+        intrinsic = qmc.scale(unit_cube,
+                              *zip(log_mchirp_range,
+                                   metadata['eta_range'],
+                                   metadata['chieff_range']))
+        intrinsic[:, 0] = np.exp(intrinsic[:, 0])
+
+        get_hplus_hcross = functools.partial(
+            cls._get_hplus_hcross, waveform_generator,
+            np.array(metadata['fbin']))
+
+        if n_processes == 1:
+            hplus_hcross = np.array(list(map(get_hplus_hcross, intrinsic)))
+        else:
+            with utils.pool_vectorize(get_hplus_hcross, n_processes
+                                      ) as vectorized_get_hplus_hcross:
+                hplus_hcross = vectorized_get_hplus_hcross(intrinsic.T)
+
+        utils.mkdirs(path.parent)
+        tmpdir = pathlib.Path(tempfile.mkdtemp(dir=path.parent,
+                                               prefix=f'.{path.name}.'))
+        np.save(tmpdir/'intrinsic.npy', intrinsic)
+        np.save(tmpdir/'hplus_hcross.npy', hplus_hcross)
+        with open(tmpdir/cls.METADATA_FILENAME, 'w',
+                  encoding='utf-8') as metadata_file:
+            json.dump(metadata, metadata_file, cls=utils.NumpyEncoder)
+        try:
+            tmpdir.rename(path)
+        except OSError:  # Written concurrently by another process
+            shutil.rmtree(tmpdir)
+            if not path.exists():
+                raise
@@ -253,6 +253,129 @@ def get_edges(arr):
     return np.concatenate(([arr[0] - half_dx], arr + half_dx))
 
 
+# ----------------------------------------------------------------------
+# Histograms
+
+class BinnedSamples:
+    """
+    Samples digitized once into histogram bins, from which 1-d and 2-d
+    histograms are computed with ``np.bincount`` and cached.
+
+    Indexing with a list of parameters returns a ``BinnedSamples`` with
+    a subset of the columns that shares the binned data and histograms,
+    so corner plots of different parameter subsets (or re-plots with
+    different limits) do not need to re-bin the samples.
+    """
+    def __init__(self, samples: pd.DataFrame, bins=None, weights=None):
+        """
+        Parameters
+        ----------
+        samples: pandas DataFrame
+            Columns are parameters and rows correspond to samples.
+
+        bins: int, str or sequence of floats
+            Passed to ``np.histogram_bin_edges`` for each parameter.
+            Defaults to ``'sturges'`` if `weights` is ``None``, else 40.
+
+        weights: sequence of floats, optional
+            An array of weights, of the same length as `samples`.
+        """
+        if bins is None:
+            bins = 'sturges' if weights is None else 40
+
+        self.weights = None if weights is None else np.asarray(weights,
+                                                               float)
+        self.bin_edges = {}
+        self.indices = {}
+        for par, values in samples.items():
+            values = np.asarray(values, float)
+            self.bin_edges[par] = np.histogram_bin_edges(values, bins,
+                                                         weights=weights)
+            self.indices[par] = self._digitize(values, self.bin_edges[par])
+
+        self._histograms_1d = {}
+        self._histograms_2d = {}
+
+    @property
+    def params(self):
+        """List of parameter names."""
+        return list(self.bin_edges)
+
+    def __getitem__(self, params):
+        """Return ``BinnedSamples`` with a subset of the parameters."""
+        if isinstance(params, slice):
+            params = self.params[params]
+
+        subset = object.__new__(type(self))
+        subset.__dict__.update(self.__dict__)
+        subset.bin_edges = {par: self.bin_edges[par] for par in params}
+        subset.indices = {par: self.indices[par] for par in params}
+        return subset  # Histogram caches are shared
+
+    @staticmethod
+    def _digitize(values, bin_edges):
+        """
+        Return array of bin indices of `values`, consistent with
+        ``np.histogram``: the last bin includes its right edge. Values
+        outside the bins get index ``len(bin_edges) - 1``, i.e. an
+        overflow bin that is later discarded.
+        """
+        n_bins = len(bin_edges) - 1
+        indices = np.searchsorted(bin_edges, values, side='right') - 1
+        indices[values == bin_edges[-1]] = n_bins - 1
+        indices[(indices < 0) | (indices >= n_bins)] = n_bins
+        return indices.astype(np.min_scalar_type(n_bins))
+
+    def get_histogram_1d(self, par, density=True):
+        """
+        Return weighted counts in the bins of parameter `par`, as
+        ``np.histogram`` would.
+
+        Parameters
+        ----------
+        par: str
+            Parameter name from ``self.params``.
+
+        density: bool
+            Whether to normalize the histogram to integrate to 1.
+        """
+        if par not in self._histograms_1d:
+            n_bins = len(self.bin_edges[par]) - 1
+            histogram = np.bincount(self.indices[par], self.weights,
+                                    minlength=n_bins + 1)[:n_bins]
+            histogram.flags.writeable = False
+            self._histograms_1d[par] = histogram
+
+        histogram = self._histograms_1d[par]
+        if density:
+            return (histogram / np.diff(self.bin_edges[par])
+                    / histogram.sum())
+        return histogram
+
+    def get_histogram_2d(self, xpar, ypar):
+        """
+        Return array of shape ``(n_xbins, n_ybins)`` with the weighted
+        counts in the bins of parameters `xpar`, `ypar`, as
+        ``np.histogram2d`` would. Read-only, since it is cached.
+        """
+        if (ypar, xpar) in self._histograms_2d:
+            return self._histograms_2d[ypar, xpar].T
+
+        if (xpar, ypar) not in self._histograms_2d:
+            n_xbins = len(self.bin_edges[xpar]) - 1
+            n_ybins = len(self.bin_edges[ypar]) - 1
+            flat_indices = (self.indices[xpar].astype(np.intp) * (n_ybins + 1)
+                            + self.indices[ypar])
+            histogram = np.bincount(
+                flat_indices, self.weights,
+                minlength=(n_xbins + 1) * (n_ybins + 1)
+                ).reshape(n_xbins + 1, n_ybins + 1)[:n_xbins, :n_ybins]
+            histogram.flags.writeable = False
+            self._histograms_2d[xpar, ypar] = histogram
+
+        return self._histograms_2d[xpar, ypar]
+
+
 # ----------------------------------------------------------------------
 # Plotting class
 
@@ -264,20 +387,24 @@ class CornerPlot:
     DEFAULT_LATEX_LABELS = LatexLabels()
     MARGIN_INCHES = .8
 
-    def __init__(self, samples: pd.DataFrame, plotstyle=None, bins=None,
-                 density=True, weights=None, latex_labels=None):
+    def __init__(self, samples, plotstyle=None, bins=None, density=True,
+                 weights=None, latex_labels=None):
         """
         Parameters
         ----------
-        samples: pandas DataFrame
+        samples: pandas DataFrame or ``BinnedSamples``
             Columns determine the parameters to plot and rows correspond
-            to samples.
+            to samples. Pass a ``BinnedSamples`` instance to reuse
+            samples that were already binned (e.g. to plot a subset of
+            parameters), in that case `bins` and `weights` must be
+            ``None``.
 
         plotstyle: PlotStyle instance, optional
             Determines the colors, linestyles, etc.
 
         bins: int
             How many histogram bins to use, the same for all parameters.
+            Defaults to ``'sturges'`` if `weights` is ``None``, else 40.
 
         density: bool
             Whether to normalize the 1-d histograms to integrate to 1.
@@ -293,29 +420,23 @@ class CornerPlot:
         self.latex_labels = latex_labels or self.DEFAULT_LATEX_LABELS
         self.plotstyle = plotstyle or PlotStyle()
 
-        bin_edges = {}
-        self.arrs_1d = {}
-        self.pdfs_1d = {}
+        if not isinstance(samples, BinnedSamples):
+            samples = BinnedSamples(samples, bins, weights)
+        elif bins is not None or weights is not None:
+            raise ValueError('`bins` and `weights` cannot be passed with '
+                             '`BinnedSamples`, they are already set.')
+        self.binned_samples = samples
+
+        self.arrs_1d = {par: get_midpoints(samples.bin_edges[par])
+                        for par in samples.params}
+        self.pdfs_1d = {par: samples.get_histogram_1d(par, density)
+                        for par in samples.params}
         self.pdfs_2d = {}
-
-        if bins is None:
-            if weights is None:
-                bins = 'sturges'
-            else:
-                bins = 40
-
-        for par, values in samples.items():
-            self.pdfs_1d[par], bin_edges[par] = np.histogram(
-                values, bins=bins, density=density, weights=weights)
-            self.arrs_1d[par] = get_midpoints(bin_edges[par])
-
-        for xpar, ypar in itertools.combinations(samples, 2):
-            histogram_2d, _, _ = np.histogram2d(
-                samples[xpar], samples[ypar],
-                bins=(bin_edges[xpar], bin_edges[ypar]), weights=weights)
+        for xpar, ypar in itertools.combinations(samples.params, 2):
+            histogram_2d = samples.get_histogram_2d(xpar, ypar)
             # Jitter to break contour degeneracy if we have few samples:
-            histogram_2d += np.random.normal(scale=1e-10,
-                                             size=histogram_2d.shape)
+            histogram_2d = histogram_2d + np.random.normal(
+                scale=1e-10, size=histogram_2d.shape)
             self.pdfs_2d[xpar, ypar] = histogram_2d.T  # Cartesian convention
 
         self.fig = None
@@ -621,8 +742,11 @@ class MultiCornerPlot:
         """
         Parameters
         ----------
-        dataframes: sequence of ``pandas.DataFrame`` instances
-            Samples from the distributions to be plotted.
+        dataframes: sequence of ``pandas.DataFrame`` or
+                    ``BinnedSamples`` instances
+            Samples from the distributions to be plotted. Already
+            binned samples are reused, ignoring `bins` and
+            `weights_col`.
 
         labels: sequence of strings, optional
             Legend labels corresponding to the different distributions.
@@ -658,10 +782,13 @@ class MultiCornerPlot:
         params = params or slice(None)
         plotstyles = PlotStyle.get_many(len(dataframes),
                                         **plotstyle_kwargs)
-        self.corner_plots = [
-            self.corner_plot_cls(samples[params], next(plotstyles), bins,
-                                 density, weights=samples.get(weights_col))
-            for samples in dataframes]
+        self.corner_plots = []
+        for samples in dataframes:
+            if not isinstance(samples, BinnedSamples):
+                samples = BinnedSamples(samples[params], bins,
+                                        samples.get(weights_col))
+            self.corner_plots.append(self.corner_plot_cls(
+                samples[params], next(plotstyles), density=density))
 
     def plot(self, max_figsize=10., max_n_ticks=4, tightness=None,
              title=None):
@@ -5,6 +5,7 @@ the maximum likelihood solution on the full parameter space.
 """
 
 import argparse
+import functools
 import inspect
 import json
 import numpy as np
@@ -130,7 +131,8 @@ class Posterior(utils.JSONMixin):
                                                            **prior_kwargs)
         return cls(prior, likelihood)
 
-    def refine_reference_waveform(self, seed=None, params=None):
+    def refine_reference_waveform(self, seed=None, params=None,
+                                  n_processes=1):
         """
         Reset relative-binning reference waveform, using differential
         evolution to find a good fit.
@@ -147,6 +149,10 @@ class Posterior(utils.JSONMixin):
         params: list of str, optional
             Which parameters to maximize over. If provided, must be
             keys from ``self.prior.sampled_params``.
+
+        n_processes: int
+            Number of processes used to evaluate the population of
+            differential evolution in parallel.
         """
         print(f'Old lnl = {self.likelihood.lnlike(self.likelihood.par_dic_0)}')
 
@@ -156,30 +162,19 @@ class Posterior(utils.JSONMixin):
         folded_par_vals_0 = self.prior.fold(
             **self.prior.inverse_transform(**self.likelihood.par_dic_0))
 
-        lnlike_unfolds = self.prior.unfold_apply(
-            lambda *pars: self.likelihood.lnlike(self.prior.transform(*pars)))
-
-        folded_par_vals = folded_par_vals_0.copy()
-        def loss_function(pars):
-            """
-            Take parameter values on the folded space corresponding to
-            ``params``, complete the remaining coordinates using the
-            reference ``folded_par_vals``, return minus the maximum log
-            likelihood over unfolds .
-            """
-            folded_par_vals[inds] = pars
-            try:
-                return -max(lnlike_unfolds(*folded_par_vals))
-            except RuntimeError:
-                return np.inf
-
         result = utils.differential_evolution_with_guesses(
-            func=loss_function,
+            func=functools.partial(self._folded_loss, inds=inds,
+                                   folded_par_vals_0=folded_par_vals_0),
             bounds=list(zip(self.prior.cubemin[inds],
                             (self.prior.cubemin
                              + self.prior.folded_cubesize)[inds])),
-            guesses=folded_par_vals_0[inds], seed=seed, init='sobol').x
+            guesses=folded_par_vals_0[inds], seed=seed, init='sobol',
+            n_processes=n_processes).x
 
+        lnlike_unfolds = self.prior.unfold_apply(
+            lambda *pars: self.likelihood.lnlike(self.prior.transform(*pars)))
+
+        folded_par_vals = folded_par_vals_0.copy()
         folded_par_vals[inds] = result
         i_fold = np.argmax(lnlike_unfolds(*folded_par_vals))
 
@@ -188,6 +183,22 @@ class Posterior(utils.JSONMixin):
 
         self.likelihood.par_dic_0 = self.likelihood.par_dic_0 | par_dic_0
 
+    def _folded_loss(self, pars, inds, folded_par_vals_0):
+        """
+        Loss function for ``refine_reference_waveform``.
+        Take parameter values on the folded space at indices `inds`,
+        complete the remaining coordinates using `folded_par_vals_0`,
+        return minus the maximum log likelihood over unfolds.
+        Being a method, it can be sent to worker processes.
+        """
+        folded_par_vals = folded_par_vals_0.copy()
+        folded_par_vals[inds] = pars
+        try:
+            return -max(self.likelihood.lnlike(self.prior.transform(*unfold))
+                        for unfold in self.prior.unfold(folded_par_vals))
+        except RuntimeError:
+            return np.inf
+
     def get_eventdir(self, parentdir):
         """
         Return directory name in which the Posterior instance should be
@@ -278,7 +289,7 @@ def submit_likelihood_maximization(
 
 
 def main(eventname, mchirp_guess, approximant, prior_name, parentdir,
-         overwrite, kwargs_filename=None, refine=False):
+         overwrite, kwargs_filename=None, refine=False, n_processes=1):
     """
     Construct a Posterior instance, optionally refine its reference
     waveform and save it to JSON.
@@ -311,16 +322,22 @@ def main(eventname, mchirp_guess, approximant, prior_name, parentdir,
     refine: bool
         Whether to apply an expensive likelihood maximization over all
         parameters.
+
+    n_processes: int
+        Number of processes used to evaluate the likelihood in parallel
+        during the maximizations.
     """
     kwargs = {}
     if kwargs_filename:
         with open(kwargs_filename, encoding='utf-8') as kwargs_file:
             kwargs = json.load(kwargs_file)
 
+    kwargs['ref_wf_finder_kwargs'] = ({'n_processes': n_processes}
+                                      | kwargs.get('ref_wf_finder_kwargs', {}))
     post = Posterior.from_event(eventname, mchirp_guess, approximant,
                                 prior_name, **kwargs)
     if refine:
-        post.refine_reference_waveform()
+        post.refine_reference_waveform(n_processes=n_processes)
     post.to_json(post.get_eventdir(parentdir), overwrite=overwrite)
 
 
@@ -343,5 +360,7 @@ if __name__ == '__main__':
                         help='pass to overwrite existing json file')
     parser.add_argument('--refine', action='store_true',
                         help='pass to refine reference solution')
+    parser.add_argument('--n_processes', type=int, default=1,
+                        help='number of processes for likelihood evaluation')
 
     main(**vars(parser.parse_args()))
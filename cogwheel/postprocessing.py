@@ -11,9 +11,16 @@ single parameter estimation run.
 """
 
 import argparse
+import contextlib
 import copy
+import functools
+import hashlib
 import json
+import multiprocessing
+import multiprocessing.pool
+import os
 import pathlib
+import shutil
 from pstats import Stats
 from scipy.cluster.vq import kmeans
 import numpy as np
@@ -23,14 +30,52 @@ import matplotlib as mpl
 import pandas as pd
 
 from cogwheel import gw_plotting
+from cogwheel import plotting
 from cogwheel import utils
 from cogwheel import sampling
 from cogwheel import prior
+from cogwheel.likelihood import (RelativeBinningLikelihood,
+                                 MarginalizedDistanceLikelihood)
 
 TESTS_FILENAME = 'postprocessing_tests.json'
 
+# Likelihood and boosted-resolution likelihood used by the ``_worker_*``
+# functions in pool processes. Set by ``_init_worker``.
+_worker_likelihoods = {}
 
-def postprocess_rundir(rundir, relative_binning_boost=4):
+
+def _init_worker(rundir, relative_binning_boost):
+    """
+    Initializer for pool processes. Load the likelihood from the
+    sampler's json file once per process.
+    """
+    sampler = utils.read_json(
+        pathlib.Path(rundir)/sampling.Sampler.JSON_FILENAME)
+    _worker_likelihoods['likelihood'] = sampler.posterior.likelihood
+    _worker_likelihoods['relative_binning_boost'] = relative_binning_boost
+
+
+def _worker_lnl(samples):
+    """Picklable proxy to ``PostProcessor._compute_lnl_chunk``."""
+    return PostProcessor._compute_lnl_chunk(
+        _worker_likelihoods['likelihood'], samples)
+
+
+def _worker_lnl_aux(samples):
+    """
+    Picklable proxy to ``PostProcessor._compute_lnl_aux_chunk``, the
+    boosted likelihood is built in the first call.
+    """
+    if 'boosted_likelihood' not in _worker_likelihoods:
+        _worker_likelihoods['boosted_likelihood'] \
+            = PostProcessor.boost_relative_binning(
+                _worker_likelihoods['likelihood'],
+                _worker_likelihoods['relative_binning_boost'])
+    return PostProcessor._compute_lnl_aux_chunk(
+        _worker_likelihoods['boosted_likelihood'], samples)
+
+
+def postprocess_rundir(rundir, relative_binning_boost=4, n_processes=1):
     """
     Postprocess posterior samples from a single run.
 
@@ -44,8 +89,11 @@ def postprocess_rundir(rundir, relative_binning_boost=4):
           reference waveform choice for setting ASD-drift
         * Tests for log likelihood differences arising from
           relative binning accuracy.
+
+    The likelihood evaluations can be parallelized over `n_processes`.
     """
-    PostProcessor(rundir, relative_binning_boost).process_samples()
+    PostProcessor(rundir, relative_binning_boost,
+                  n_processes).process_samples()
 
 
 class PostProcessor:
@@ -55,21 +103,46 @@ class PostProcessor:
     The method `process_samples` executes all the functionality of the
     class. It is suggested to use the top-level function
     `postprocess_rundir` for simple usage.
+
+    Likelihood evaluations are done in chunks of `chunk_size` samples,
+    which are distributed over `n_processes`. Each process loads the
+    likelihood (and builds the one with boosted relative-binning
+    resolution) once. Likelihoods that support it (see
+    ``RelativeBinningLikelihood.lnlike_detectors_no_asd_drift_samples``)
+    are evaluated vectorized over the samples of a chunk.
+
+    Processing can be resumed: the results of each chunk are saved to
+    ``CHECKPOINT_DIRNAME`` as they are computed, and the samples file is
+    saved after each stage. Only rows with missing values are computed,
+    so appending samples to a processed run only costs the new work.
     """
     LNL_COL = 'lnl'
+    CHECKPOINT_DIRNAME = 'postprocessing_checkpoints'
 
-    def __init__(self, rundir, relative_binning_boost: int = 4):
+    def __init__(self, rundir, relative_binning_boost: int = 4,
+                 n_processes: int = 1, chunk_size: int = 1024):
         super().__init__()
 
         self.rundir = pathlib.Path(rundir)
         self.relative_binning_boost = relative_binning_boost
+        self.n_processes = n_processes
+        self.chunk_size = chunk_size
+        self.checkpoint_dir = self.rundir/self.CHECKPOINT_DIRNAME
 
         sampler = utils.read_json(self.rundir/sampling.Sampler.JSON_FILENAME)
         self.posterior = sampler.posterior
-        self.samples_path = self.rundir/sampling.SAMPLES_FILENAME
-        if not self.samples_path.exists():
-            sampler.load_samples().to_feather(self.samples_path)
-        self.samples = pd.read_feather(self.samples_path)
+        self.sample_store = sampling.get_sample_store(self.rundir)
+        if not sampling.Sampler.completed(self.rundir):
+            self.sample_store.append(sampler.load_samples())
+        if self.sample_store.exists():
+            self.samples = self.sample_store.read()
+        else:  # Convert from legacy format
+            self.samples = sampling.read_samples(self.rundir)
+            self.sample_store.append(self.samples)
+
+        # Columns and rows modified since the samples were last saved:
+        self._updated_columns = set()
+        self._updated_rows = np.zeros(len(self.samples), bool)
 
         try:
             with open(self.rundir/TESTS_FILENAME, encoding='utf-8') as file:
@@ -85,6 +158,7 @@ class PostProcessor:
             self.posterior.likelihood.event_data.detector_names)
 
         self._asd_drifts_subset = None
+        self._boosted_likelihood = None
 
     @staticmethod
     def get_lnl_aux_cols(detector_names):
@@ -104,62 +178,232 @@ class PostProcessor:
               reference waveform choice for setting ASD-drift
             * Tests for log likelihood differences arising from
               relative binning accuracy.
+
+        Unless `force_update` is ``True``, columns already computed
+        are reused (only rows with missing values are processed) and
+        so are checkpoints from an interrupted previous call.
         """
         print(f'Processing {self.rundir}')
+        if force_update:
+            self.clear_checkpoints()
 
         print(' * Adding standard parameters...')
-        self.posterior.prior.transform_samples(
-            self.samples, force_update=force_update)
-        self.posterior.likelihood.postprocess_samples(
-            self.samples, force_update=force_update)
+        self.add_standard_params(force_update=force_update)
+        self.save_samples()
         print(' * Computing relative-binning likelihood...')
         self.compute_lnl(force_update=force_update)
+        self.save_samples()
         print(' * Computing auxiliary likelihood products...')
-        self.compute_lnl_aux()
+        self.compute_lnl_aux(force_update=force_update)
+        self.save_samples()
         print(' * Testing ASD-drift correction...')
         self.test_asd_drift()
         print(' * Testing relative binning...')
         self.test_relative_binning()
         self.save_tests_and_samples()
+        self.clear_checkpoints()
+
+    def add_standard_params(self, force_update=True):
+        """
+        Add columns to `self.samples` with standard parameters and
+        those added by the likelihood's ``postprocess_samples`` (e.g.
+        un-marginalized parameters). If `force_update` is ``False``,
+        only rows with missing waveform parameters are processed.
+        """
+        rows = self._rows_to_compute(
+            self.posterior.prior.standard_params
+            + self.posterior.likelihood.waveform_generator.params,
+            force_update)
+
+        if rows.all():
+            self.posterior.prior.transform_samples(self.samples)
+            self.posterior.likelihood.postprocess_samples(self.samples)
+            self._updated_columns.update(
+                set(self.samples.columns)
+                - set(self.posterior.prior.sampled_params))
+            self._updated_rows[:] = True
+        elif rows.any():
+            samples = self.samples[rows].reset_index(drop=True)
+            self.posterior.prior.transform_samples(samples)
+            self.posterior.likelihood.postprocess_samples(samples)
+            self._set_rows(rows, samples)
 
     def compute_lnl(self, force_update=True):
         """
         Add column to `self.samples` with log likelihood computed
-        at original relative binning resolution
-        """
-        if force_update or (self.LNL_COL not in self.samples.columns):
-            lnlike = getattr(
-                self.posterior.likelihood,
-                'lnlike_no_marginalization',
-                self.posterior.likelihood.lnlike)
-            self.samples[self.LNL_COL] = list(
-                map(lnlike, self._standard_samples()))
+        at original relative binning resolution.
+        If `force_update` is ``False``, only rows with missing values
+        are computed.
+        """
+        rows = self._rows_to_compute([self.LNL_COL], force_update)
+        if rows.any():
+            lnl = self._map_chunks(
+                self.samples[rows], 'lnl', _worker_lnl,
+                functools.partial(self._compute_lnl_chunk,
+                                  self.posterior.likelihood))
+            self._set_rows(rows, pd.DataFrame({self.LNL_COL: lnl}))
         self.tests['lnl_max'] = max(self.samples[self.LNL_COL])
 
-    def compute_lnl_aux(self):
+    def compute_lnl_aux(self, force_update=True):
         """
         Add columns `self._lnl_aux_cols` to `self.samples` with log
         likelihood computed by detector, at high relative binning
         resolution, with no ASD-drift correction applied.
+        If `force_update` is ``False``, only rows with missing values
+        are computed.
+        """
+        rows = self._rows_to_compute(self._lnl_aux_cols, force_update)
+        if rows.any():
+            lnl_aux = self._map_chunks(
+                self.samples[rows],
+                f'lnl_aux_boost{self.relative_binning_boost}',
+                _worker_lnl_aux,
+                self._compute_lnl_aux_chunk_boosted)
+            self._set_rows(rows,
+                           pd.DataFrame(lnl_aux, columns=self._lnl_aux_cols))
+
+    def clear_checkpoints(self):
+        """Delete the chunk checkpoints from previous computations."""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    @staticmethod
+    def boost_relative_binning(likelihood, relative_binning_boost):
+        """
+        Return a copy of `likelihood` with the relative-binning
+        frequency resolution increased by `relative_binning_boost`.
         """
-        # Increase the relative-binning frequency resolution:
         try:  # few seconds faster...
-            likelihood = copy.deepcopy(self.posterior.likelihood)
+            likelihood = copy.deepcopy(likelihood)
         except TypeError:  # ...but likelihood might be un-pickleable
-            likelihood = self.posterior.likelihood.reinstantiate()
+            likelihood = likelihood.reinstantiate()
 
         if likelihood.pn_phase_tol:
-            likelihood.pn_phase_tol /= self.relative_binning_boost
+            likelihood.pn_phase_tol /= relative_binning_boost
         else:
-            num = self.relative_binning_boost * (len(likelihood.fbin) - 1) + 1
-            likelihood.fbin = np.interp(np.linspace(0, 1, num),
-                                        np.linspace(0, 1, len(likelihood.fbin)),
-                                        likelihood.fbin)
+            num = relative_binning_boost * (len(likelihood.fbin) - 1) + 1
+            likelihood.fbin = np.interp(
+                np.linspace(0, 1, num),
+                np.linspace(0, 1, len(likelihood.fbin)),
+                likelihood.fbin)
+        return likelihood
+
+    def _rows_to_compute(self, columns, force_update):
+        """
+        Return boolean array of length ``len(self.samples)``, ``True``
+        for rows where some of `columns` are missing, or for all rows
+        if `force_update`.
+        """
+        if force_update or not set(columns) <= set(self.samples.columns):
+            return np.ones(len(self.samples), bool)
+        return self.samples[columns].isna().any(axis=1).to_numpy()
+
+    def _set_rows(self, rows, values: pd.DataFrame):
+        """
+        Set `values` in the `rows` (boolean array) of `self.samples`,
+        adding columns as needed.
+        """
+        for col in values.columns.difference(self.samples.columns):
+            self.samples[col] = np.nan
+        self.samples.loc[rows, values.columns] = values.to_numpy()
+        self._updated_columns.update(values.columns)
+        self._updated_rows |= rows
+
+    def _map_chunks(self, samples, stage, worker_func, func):
+        """
+        Apply a function to chunks of `samples` (restricted to the
+        waveform parameters) and concatenate the resulting arrays.
+        Use `worker_func` in a pool of ``self.n_processes`` processes
+        if ``self.n_processes > 1``, otherwise `func`.
+
+        The result of each chunk is saved in ``self.checkpoint_dir``,
+        identified by `stage` and the chunk contents, and loaded
+        instead of recomputed if available.
+        """
+        samples = samples[self.posterior.likelihood.waveform_generator.params]
+        chunks = [samples.iloc[i : i + self.chunk_size]
+                  for i in range(0, len(samples), self.chunk_size)]
+        paths = [self._get_checkpoint_path(stage, chunk) for chunk in chunks]
+        missing = [i for i, path in enumerate(paths) if not path.exists()]
+
+        if missing:
+            self.checkpoint_dir.mkdir(exist_ok=True)
+            with contextlib.ExitStack() as stack:
+                if self.n_processes == 1:
+                    results = map(func, (chunks[i] for i in missing))
+                else:
+                    pool = stack.enter_context(multiprocessing.Pool(
+                        self.n_processes, initializer=_init_worker,
+                        initargs=(self.rundir, self.relative_binning_boost)))
+                    results = pool.imap(worker_func,
+                                        [chunks[i] for i in missing])
+
+                for i, result in zip(missing, results):
+                    tmp_path = paths[i].with_suffix('.tmp')
+                    with open(tmp_path, 'wb') as file:
+                        np.save(file, result)
+                    tmp_path.replace(paths[i])
+
+        return np.concatenate([np.load(path) for path in paths])
+
+    def _get_checkpoint_path(self, stage, chunk):
+        """
+        Return path to the checkpoint file of a `stage` computation on
+        a `chunk` of samples.
+        """
+        key = hashlib.sha1(stage.encode())
+        key.update(' '.join(chunk.columns).encode())
+        key.update(np.ascontiguousarray(chunk.to_numpy(float)).tobytes())
+        return self.checkpoint_dir/f'{stage}_{key.hexdigest()}.npy'
+
+    @staticmethod
+    def _supports_batching(lnlike):
+        """
+        Return whether the bound method `lnlike` computes the relative
+        binning likelihood with no marginalization, so it can be
+        evaluated with ``lnlike_detectors_no_asd_drift_samples``.
+        """
+        return getattr(lnlike, '__func__', None) in (
+            RelativeBinningLikelihood.lnlike,
+            MarginalizedDistanceLikelihood.lnlike_no_marginalization)
+
+    @classmethod
+    def _compute_lnl_chunk(cls, likelihood, samples):
+        """
+        Return array with the log likelihood of `samples` (a DataFrame
+        with the waveform parameters), with no marginalization.
+        """
+        lnlike = getattr(likelihood, 'lnlike_no_marginalization',
+                         likelihood.lnlike)
+        if cls._supports_batching(lnlike):
+            return (likelihood.lnlike_detectors_no_asd_drift_samples(samples)
+                    @ likelihood.asd_drift**-2)
+        return np.fromiter(map(lnlike, cls._iter_dicts(samples)),
+                           float, len(samples))
+
+    def _compute_lnl_aux_chunk_boosted(self, samples):
+        """
+        Return ``_compute_lnl_aux_chunk`` of `samples` with the boosted
+        likelihood, which is built in the first call.
+        """
+        if self._boosted_likelihood is None:
+            self._boosted_likelihood = self.boost_relative_binning(
+                self.posterior.likelihood, self.relative_binning_boost)
+        return self._compute_lnl_aux_chunk(self._boosted_likelihood, samples)
 
-        lnl_aux = pd.DataFrame(map(likelihood.lnlike_detectors_no_asd_drift,
-                                   self._standard_samples()),
-                               columns=self._lnl_aux_cols)
-        utils.update_dataframe(self.samples, lnl_aux)
+    @classmethod
+    def _compute_lnl_aux_chunk(cls, likelihood, samples):
+        """
+        Return array of shape ``(len(samples), n_detectors)`` with the
+        log likelihood by detector of `samples` (a DataFrame with the
+        waveform parameters), no ASD-drift correction applied.
+        Likelihoods that override ``lnlike_detectors_no_asd_drift`` are
+        evaluated sample by sample.
+        """
+        if (type(likelihood).lnlike_detectors_no_asd_drift
+                is RelativeBinningLikelihood.lnlike_detectors_no_asd_drift):
+            return likelihood.lnlike_detectors_no_asd_drift_samples(samples)
+        return np.array(list(map(likelihood.lnlike_detectors_no_asd_drift,
+                                 cls._iter_dicts(samples))))
 
     def test_asd_drift(self):
         """
@@ -167,6 +411,7 @@ class PostProcessor:
         arising from the choice of somewhat-parameter-dependent
         asd_drift correction. Store in `self.tests['asd_drift']`.
         """
+        self.tests['asd_drift'] = []
         ref_lnl = self._apply_asd_drift(self.posterior.likelihood.asd_drift)
         for asd_drift in self._get_representative_asd_drifts():
             lnl = self._apply_asd_drift(asd_drift)
@@ -197,16 +442,30 @@ class PostProcessor:
         with open(self.rundir/TESTS_FILENAME, 'w', encoding='utf-8') as file:
             json.dump(self.tests, file, cls=utils.NumpyEncoder)
 
-        self.samples.to_feather(self.rundir/sampling.SAMPLES_FILENAME)
+        self.save_samples()
 
-    def _get_representative_asd_drifts(self, n_kmeans=5, n_subset=100,
+    def save_samples(self):
+        """
+        Write the columns of `self.samples` that were modified to the
+        sample store, only for the chunks of rows that changed.
+        """
+        self.sample_store.write_columns(
+            self.samples[[col for col in self.samples.columns
+                          if col in self._updated_columns]],
+            self._updated_rows)
+        self._updated_columns = set()
+        self._updated_rows[:] = False
+
+    def _get_representative_asd_drifts(self, n_kmeans=5, n_subset=256,
                                        decimals=3):
         """
         Return `n_kmeans` sets of `asd_drift` generated with via k-means
-        from the asd_drift of `n_subset` random samples.
+        from the asd_drift of `n_subset` random draws from the samples
+        (no more than the number of samples).
         Each asd_drift is a float array of length n_detectors.
         asd_drifts are rounded to `decimals` places.
         """
+        n_subset = min(n_subset, len(self.samples))
         if (self._asd_drifts_subset is None
                 or len(self._asd_drifts_subset) != n_subset):
             self._gen_asd_drifts_subset(n_subset)
@@ -228,21 +487,34 @@ class PostProcessor:
         """
         Compute asd_drifts for a random subset of the samples, store
         them in `self._asd_drifts_subset`.
+        The subset is drawn with replacement (weighted samples can be
+        dominated by a few), the asd_drift of repeated samples is only
+        computed once. The FFTs use ``self.n_processes`` threads.
         """
         subset = self.samples.sample(
-            n_subset, weights=self.samples.get(utils.WEIGHTS_NAME))
-        self._asd_drifts_subset = [
-            self.posterior.likelihood.compute_asd_drift(sample)
-            for sample in self._standard_samples(subset)]
+            n_subset, replace=True,
+            weights=self.samples.get(utils.WEIGHTS_NAME))
+        unique = subset[~subset.index.duplicated()]
+        asd_drifts = self.posterior.likelihood.compute_asd_drifts(
+            self._standard_samples(unique), workers=self.n_processes)
+        self._asd_drifts_subset = asd_drifts[
+            unique.index.get_indexer(subset.index)]
 
     def _standard_samples(self, samples=None):
         """Iterator over standard parameter samples."""
         samples = samples if samples is not None else self.samples
-        return (dict(sample) for _, sample in samples[
-            self.posterior.likelihood.waveform_generator.params].iterrows())
+        return self._iter_dicts(
+            samples[self.posterior.likelihood.waveform_generator.params])
 
+    @staticmethod
+    def _iter_dicts(samples):
+        """Iterator over rows of a DataFrame, as dicts."""
+        return (dict(zip(samples.columns, values))
+                for values in samples.itertuples(index=False))
 
-def diagnostics(eventdir, reference_rundir=None, outfile=None):
+
+def diagnostics(eventdir, reference_rundir=None, outfile=None,
+                n_workers=None):
     """
     Make diagnostics plots aggregating multiple runs of an event and
     save them to pdf format.
@@ -257,8 +529,11 @@ def diagnostics(eventdir, reference_rundir=None, outfile=None):
                       name.
     outfile: path to save output as pdf. Defaults to
              `eventdir/Diagnostics.DIAGNOSTICS_FILENAME`.
+    n_workers: number of threads used to collect the summaries of the
+               runs, defaults to one per rundir (up to 32).
     """
-    Diagnostics(eventdir, reference_rundir).diagnostics(outfile)
+    Diagnostics(eventdir, reference_rundir,
+                n_workers=n_workers).diagnostics(outfile)
 
 
 class Diagnostics:
@@ -269,8 +544,16 @@ class Diagnostics:
     The method `diagnostics` executes all the functionality of the
     class. It is suggested to use the top-level function `diagnostics`
     for simple usage.
+
+    The summary of each run is cached in
+    `{rundir}/{sampling.REPORTS_DIRNAME}/{SUMMARY_FILENAME}` and
+    recomputed only if the files it is derived from were modified,
+    so that tables of many runs (see `make_catalog_table`) are fast to
+    remake.
     """
     DIAGNOSTICS_FILENAME = 'diagnostics.pdf'
+    SUMMARY_FILENAME = 'diagnostics_summary.json'
+    _MAX_WORKERS = 32
     DEFAULT_TOLERANCE_PARAMS = {'asd_drift_dlnl_std': .1,
                                 'asd_drift_dlnl_max': .5,
                                 'lnl_max_exceeds_lnl_0': 15.,
@@ -288,7 +571,7 @@ class Diagnostics:
       'relative_binning_dlnl_max': r'$\max|\Delta\ln\mathcal{L}_{\rm RB}|$'}
 
     def __init__(self, eventdir, reference_rundir=None,
-                 tolerance_params=None):
+                 tolerance_params=None, n_workers=None):
         """
         Parameters
         ----------
@@ -323,8 +606,12 @@ class Diagnostics:
             * 'relative_binning_dlnl_max'
                 Tolerable maximum log likelihood fluctuation due to
                 the relative binning approximation.
+
+        n_workers: number of threads used to collect the summaries of
+                   the runs, defaults to one per rundir (up to 32).
         """
         self.eventdir = pathlib.Path(eventdir)
+        self.n_workers = n_workers
         self.rundirs = self.get_rundirs()
         self.table = self.make_table()
         self.reference_rundir = reference_rundir
@@ -372,9 +659,13 @@ class Diagnostics:
             except prior.PriorError:
                 sampled_par_dic_0 = None
 
-            ref_samples = pd.read_feather(refdir/'samples.feather')
+            columns = sampled_params + [utils.WEIGHTS_NAME]
+            ref_samples = self._read_samples(refdir, columns)
+            ref_samples = plotting.BinnedSamples(  # Bin once, reuse
+                ref_samples[sampled_params], bins=40,
+                weights=ref_samples.get(utils.WEIGHTS_NAME))
             for otherdir in otherdirs:
-                other_samples = pd.read_feather(otherdir/'samples.feather')
+                other_samples = self._read_samples(otherdir, columns)
                 cornerplot = gw_plotting.MultiCornerPlot(
                     [ref_samples, other_samples],
                     labels=[refdir.name, otherdir.name],
@@ -390,9 +681,17 @@ class Diagnostics:
         Return a list of rundirs in `self.eventdir` for which sampling
         has completed. Ignores incomplete runs, printing a warning.
         """
+        return self._find_rundirs(self.eventdir)
+
+    @staticmethod
+    def _find_rundirs(eventdir):
+        """
+        Return a list of postprocessed rundirs in `eventdir`, printing
+        a warning for the others.
+        """
         rundirs = []
         for rundir in utils.sorted_rundirs(
-                self.eventdir.glob(f'{utils.RUNDIR_PREFIX}*')):
+                pathlib.Path(eventdir).glob(f'{utils.RUNDIR_PREFIX}*')):
             if (rundir/TESTS_FILENAME).exists():
                 rundirs.append(rundir)
             else:
@@ -412,75 +711,273 @@ class Diagnostics:
                  directories.
         """
         rundirs = rundirs or self.rundirs
+        summaries = self.collect_summaries(rundirs, self.n_workers)
 
         table = pd.DataFrame()
         table['run'] = [x.name for x in rundirs]
-        utils.update_dataframe(table, self._collect_run_kwargs(rundirs))
+        run_kwargs = pd.DataFrame([summary['run_kwargs']
+                                   for summary in summaries])
+        const_cols = [col for col, (first, *others) in run_kwargs.items()
+                      if all(first == other for other in others)]
+        utils.update_dataframe(table, run_kwargs.drop(columns=const_cols))
+        self._add_summary_columns(table, summaries)
+        return table
 
-        table['n_effective'] = [round(self._get_n_effective(rundir))
-                                for rundir in rundirs]
-        table['runtime'] = [
-            Stats(str(rundir/sampling.Sampler.PROFILING_FILENAME)).total_tt
-            / 3600
-            for rundir in rundirs]
-        utils.update_dataframe(table, self._collect_tests(rundirs))
+    @classmethod
+    def make_catalog_table(cls, eventdirs, n_workers=None):
+        """
+        Return a pandas DataFrame summarizing all the postprocessed
+        runs in multiple event directories, e.g. to review a catalog.
+        Unlike `make_table`, all settings of the runs are reported,
+        and no plots are made.
 
+        Parameters
+        ----------
+        eventdirs: sequence of paths to event directories.
+        n_workers: number of threads used to collect the summaries of
+                   the runs, defaults to one per rundir (up to 32).
+        """
+        rundirs = [rundir for eventdir in eventdirs
+                   for rundir in cls._find_rundirs(eventdir)]
+        summaries = cls.collect_summaries(rundirs, n_workers)
+
+        table = pd.DataFrame()
+        table['event'] = [rundir.parent.name for rundir in rundirs]
+        table['run'] = [rundir.name for rundir in rundirs]
+        utils.update_dataframe(table, pd.DataFrame(
+            [summary['run_kwargs'] for summary in summaries]))
+        cls._add_summary_columns(table, summaries)
         return table
 
+    @classmethod
+    def collect_summaries(cls, rundirs, n_workers=None):
+        """
+        Return list of summaries of `rundirs` (see `get_summary`),
+        gathered by a pool of `n_workers` threads. Defaults to one
+        thread per rundir, up to 32.
+        """
+        if not rundirs:
+            return []
+        n_workers = n_workers or min(len(rundirs), cls._MAX_WORKERS)
+        if n_workers == 1:
+            return list(map(cls.get_summary, rundirs))
+        with multiprocessing.pool.ThreadPool(n_workers) as pool:
+            return pool.map(cls.get_summary, rundirs)
+
+    @classmethod
+    def get_summary(cls, rundir):
+        """
+        Return dict with the sampler settings, effective number of
+        samples, runtime and postprocessing tests of a run.
+
+        The summary is cached in
+        `{rundir}/{sampling.REPORTS_DIRNAME}/{SUMMARY_FILENAME}`, and
+        only recomputed if the files it derives from changed since.
+        """
+        rundir = pathlib.Path(rundir)
+        summary_path = rundir/sampling.REPORTS_DIRNAME/cls.SUMMARY_FILENAME
+        mtimes = cls._get_source_mtimes(rundir)
+        try:
+            with open(summary_path, encoding='utf-8') as summary_file:
+                summary = json.load(summary_file)
+            if summary['mtimes'] == mtimes:
+                return summary
+        except (OSError, ValueError, KeyError):
+            pass
+
+        summary = {'mtimes': mtimes,
+                   'run_kwargs': cls._get_run_kwargs(rundir),
+                   'n_effective': float(cls._get_n_effective(rundir)),
+                   'runtime': float(cls._get_runtime(rundir)),
+                   'tests': cls._get_tests_summary(rundir)}
+        try:
+            summary_path.parent.mkdir(exist_ok=True)
+            tmp_path = summary_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as summary_file:
+                json.dump(summary, summary_file, cls=utils.NumpyEncoder)
+            os.replace(tmp_path, summary_path)
+        except OSError:
+            pass  # E.g. no write permissions, just don't cache
+        return summary
+
+    @staticmethod
+    def _get_source_mtimes(rundir):
+        """
+        Return dict with the modification times of the files from
+        which the summary of a run derives (``None`` if missing).
+        """
+        store = sampling.get_sample_store(rundir)
+        paths = [rundir/sampling.Sampler.JSON_FILENAME,
+                 rundir/TESTS_FILENAME,
+                 store.path/store.METADATA_FILENAME,
+                 rundir/sampling.SAMPLES_FILENAME,
+                 (rundir/sampling.REPORTS_DIRNAME
+                  /sampling.Sampler.TIMING_FILENAME),
+                 rundir/sampling.Sampler.PROFILING_FILENAME]
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path.relative_to(rundir).as_posix()] \
+                    = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                mtimes[path.relative_to(rundir).as_posix()] = None
+        return mtimes
+
+    @staticmethod
+    def _add_summary_columns(table, summaries):
+        """
+        Add columns to `table` with the effective number of samples,
+        runtime (hours) and tests from `summaries`.
+        """
+        table['n_effective'] = [round(summary['n_effective'])
+                                for summary in summaries]
+        table['runtime'] = [summary['runtime'] / 3600
+                            for summary in summaries]
+        utils.update_dataframe(table, pd.DataFrame(
+            [summary['tests'] for summary in summaries]))
+
+    @staticmethod
+    def load_telemetry(rundir):
+        """
+        Return a pandas DataFrame with the telemetry records appended by
+        the sampler to `rundir` (see ``sampling.Sampler``). The
+        sampler-specific progress is in columns named 'progress.<key>'.
+        The run need not have finished.
+        """
+        path = pathlib.Path(rundir)/sampling.Sampler.TELEMETRY_FILENAME
+        if not path.exists():
+            return pd.DataFrame()
+
+        with open(path, encoding='utf-8') as telemetry_file:
+            records = [json.loads(line) for line in telemetry_file]
+        telemetry = pd.json_normalize(records)
+        telemetry['timestamp'] = pd.to_datetime(telemetry['timestamp'])
+        return telemetry
+
+    @classmethod
+    def make_telemetry_table(cls, rundirs):
+        """
+        Return a pandas DataFrame summarizing the latest telemetry of
+        each run in `rundirs`, which may be in progress. Useful to spot
+        slow or stalled runs.
+        Throughput and memory are summed over the processes of a run,
+        'seconds_since_update' is the time elapsed since the latest
+        record (large values of it for unfinished runs indicate that
+        they stalled or died). The latest sampler-specific progress
+        reported is also included.
+
+        Parameters
+        ----------
+        rundirs: sequence of paths to run directories.
+        """
+        rows = []
+        for rundir in map(pathlib.Path, rundirs):
+            telemetry = cls.load_telemetry(rundir)
+            if telemetry.empty:
+                continue
+
+            latest = telemetry.groupby('pid').last()
+            progress = telemetry.filter(like='progress.').dropna(how='all')
+            rows.append({
+                'run': rundir.name,
+                'finished': sampling.Sampler.completed(rundir),
+                'n_processes': len(latest),
+                'n_evaluations': latest['n_evaluations'].sum(),
+                'evaluations_per_second':
+                    latest['evaluations_per_second'].sum(),
+                'mean_latency': latest['mean_latency'].mean(),
+                'waveform_cache_hit_rate':
+                    latest['waveform_cache_hit_rate'].mean(),
+                'memory_mib': latest['memory_mib'].sum(),
+                'seconds_since_update': (
+                    pd.Timestamp.now() - telemetry['timestamp'].max()
+                    ).total_seconds(),
+                **(progress.iloc[-1].rename(lambda key: key[9:]).to_dict()
+                   if not progress.empty else {})})
+        return pd.DataFrame(rows)
+
     @staticmethod
     def _get_n_effective(rundir):
-        samples = pd.read_feather(rundir/sampling.SAMPLES_FILENAME)
+        store = sampling.get_sample_store(rundir)
+        if store.exists():
+            return store.n_effective()  # From metadata, no rows read
+
+        samples = sampling.read_samples(rundir)
         weights = samples.get(utils.WEIGHTS_NAME, np.ones(len(samples)))
         return utils.n_effective(weights)
 
     @staticmethod
-    def _collect_run_kwargs(rundirs):
-        """
-        Return a DataFrame aggregating run_kwargs used in sampling.
-        """
-        run_kwargs = []
-        for rundir in rundirs:
-            with open(rundir/sampling.Sampler.JSON_FILENAME,
-                      encoding='utf-8') as sampler_file:
-                dic = json.load(sampler_file)
-                sampler_cls = utils.class_registry[dic['__cogwheel_class__']]
-                init_kwargs = dic['init_kwargs']
-                settings = {key: val
-                            for key, val in init_kwargs['run_kwargs'].items()
-                            if val != sampler_cls.DEFAULT_RUN_KWARGS.get(key)}
-                run_kwargs.append({'sampler': sampler_cls.__name__,
-                                   'sample_prior': init_kwargs['sample_prior'],
-                                   **settings})
-
-        run_kwargs = pd.DataFrame(run_kwargs)
-        const_cols = [col for col, (first, *others) in run_kwargs.items()
-                      if all(first == other for other in others)]
-        drop_cols = const_cols + ['outputfiles_basename', 'wrapped_params']
-        return run_kwargs.drop(columns=drop_cols, errors='ignore')
+    def _read_samples(rundir, columns):
+        """
+        Return DataFrame with the samples of a run, only with those of
+        `columns` that are available.
+        """
+        store = sampling.get_sample_store(rundir)
+        if store.exists():
+            return store.read([col for col in columns
+                               if col in store.columns])
+
+        samples = sampling.read_samples(rundir)
+        return samples[[col for col in columns if col in samples]]
 
     @staticmethod
-    def _collect_tests(rundirs):
-        """Return a DataFrame aggregating postprocessing tests."""
-        tests = []
-        for rundir in rundirs:
-            with open(rundir/TESTS_FILENAME, encoding='utf-8') as tests_file:
-                dic = json.load(tests_file)
-
-                asd_drift_dlnl_std = np.sqrt(np.mean(
-                    [val['dlnl_std']**2 for val in dic['asd_drift']]))
-
-                asd_drift_dlnl_max = max(
-                    val['dlnl_max'] for val in dic['asd_drift'])
-
-                tests.append({'lnl_max': dic['lnl_max'],
-                              'lnl_0': dic['lnl_0'],
-                              'asd_drift_dlnl_std': asd_drift_dlnl_std,
-                              'asd_drift_dlnl_max': asd_drift_dlnl_max,
-                              'relative_binning_dlnl_std':
-                                  dic['relative_binning']['dlnl_std'],
-                              'relative_binning_dlnl_max':
-                                  dic['relative_binning']['dlnl_max']})
-        return pd.DataFrame(tests)
+    def _get_runtime(rundir):
+        """
+        Return runtime of a run in seconds, from the timing report or
+        otherwise the profiling statistics, NaN if neither is available.
+        """
+        timing_path = (rundir/sampling.REPORTS_DIRNAME
+                       /sampling.Sampler.TIMING_FILENAME)
+        if timing_path.exists():
+            with open(timing_path, encoding='utf-8') as timing_file:
+                return json.load(timing_file)['wall_time']
+        profiling_path = rundir/sampling.Sampler.PROFILING_FILENAME
+        if profiling_path.exists():
+            return Stats(str(profiling_path)).total_tt
+        return np.nan
+
+    @staticmethod
+    def _get_run_kwargs(rundir):
+        """
+        Return dict with the sampler class, `sample_prior` and the
+        `run_kwargs` that differ from the sampler's defaults.
+        """
+        with open(rundir/sampling.Sampler.JSON_FILENAME,
+                  encoding='utf-8') as sampler_file:
+            dic = json.load(sampler_file)
+        sampler_cls = utils.class_registry[dic['__cogwheel_class__']]
+        init_kwargs = dic['init_kwargs']
+        drop_keys = {'outputfiles_basename', 'wrapped_params',
+                     'checkpoint_file', 'weighted_samples_dirname',
+                     'chains_file'}
+        settings = {key: val
+                    for key, val in init_kwargs['run_kwargs'].items()
+                    if val != sampler_cls.DEFAULT_RUN_KWARGS.get(key)
+                    and key not in drop_keys}
+        return {'sampler': sampler_cls.__name__,
+                'sample_prior': init_kwargs['sample_prior'],
+                **settings}
+
+    @staticmethod
+    def _get_tests_summary(rundir):
+        """Return dict summarizing the postprocessing tests of a run."""
+        with open(rundir/TESTS_FILENAME, encoding='utf-8') as tests_file:
+            dic = json.load(tests_file)
+
+        asd_drift_dlnl_std = np.sqrt(np.mean(
+            [val['dlnl_std']**2 for val in dic['asd_drift']]))
+
+        asd_drift_dlnl_max = max(
+            val['dlnl_max'] for val in dic['asd_drift'])
+
+        return {'lnl_max': dic['lnl_max'],
+                'lnl_0': dic['lnl_0'],
+                'asd_drift_dlnl_std': asd_drift_dlnl_std,
+                'asd_drift_dlnl_max': asd_drift_dlnl_max,
+                'relative_binning_dlnl_std':
+                    dic['relative_binning']['dlnl_std'],
+                'relative_binning_dlnl_max':
+                    dic['relative_binning']['dlnl_max']}
 
     def _display_table(self, cell_size=(1., .3)):
         """Make a matplotlib figure and display the table in it."""
@@ -544,18 +1041,22 @@ class Diagnostics:
 def submit_postprocess_rundir_slurm(
         rundir, job_name=None, n_hours_limit=2, stdout_path=None,
         stderr_path=None, sbatch_cmds=('--mem-per-cpu=16G',),
-        batch_path=None):
+        batch_path=None, n_processes=1):
     """
     Submit a slurm job to postprocess a run directory where a
     `sampling.Sampler` has been run.
     Note this may not be necessary if the parameter estimation run was
     done through `sampling.main` with `postprocess=True`.
+    The likelihood evaluations are parallelized over `n_processes`
+    CPUs.
     """
     rundir = pathlib.Path(rundir)
     job_name = job_name or f'{rundir.name}_postprocessing'
     stdout_path = stdout_path or rundir/'postprocessing.out'
     stderr_path = stderr_path or rundir/'postprocessing.err'
-    args = f'--rundir {rundir.resolve()}'
+    args = f'--rundir {rundir.resolve()} --n_processes {n_processes}'
+    if n_processes > 1:
+        sbatch_cmds = (*sbatch_cmds, f'--cpus-per-task={n_processes}')
     utils.submit_slurm(job_name, n_hours_limit, stdout_path, stderr_path, args,
                        sbatch_cmds, batch_path)
 
@@ -577,7 +1078,7 @@ def submit_diagnostics_eventdir_slurm(
                        sbatch_cmds, batch_path)
 
 
-def main(*, rundir=None, eventdir=None):
+def main(*, rundir=None, eventdir=None, n_processes=1):
     """
     Postprocess a run directory or an event directory.
 
@@ -592,16 +1093,25 @@ def main(*, rundir=None, eventdir=None):
     ----------
     rundir: path to a run directory to postprocess, can't be set
             simultaneously with `eventdir` or a `ValueError` is raised.
-    eventdir: path to an event directory to postprocess, can't be set
-              simultaneously with `rundir` or a `ValueError` is raised.
+    eventdir: path to an event directory to postprocess, or sequence
+              of them. Can't be set simultaneously with `rundir` or a
+              `ValueError` is raised.
+    n_processes: number of processes to postprocess a run directory,
+                 or over which to distribute the event directories.
     """
     if (rundir is None) == (eventdir is None):
         raise ValueError('Pass exactly one of `rundir` or `eventdir`.')
 
     if rundir:
-        postprocess_rundir(rundir)
-    else:
+        postprocess_rundir(rundir, n_processes=n_processes)
+    elif isinstance(eventdir, (str, os.PathLike)):
         diagnostics(eventdir)
+    elif n_processes > 1:
+        with multiprocessing.Pool(n_processes) as pool:
+            pool.map(diagnostics, eventdir)
+    else:
+        for path in eventdir:
+            diagnostics(path)
 
 
 if __name__ == '__main__':
@@ -609,7 +1119,10 @@ if __name__ == '__main__':
         description='postprocess either a rundir or an eventdir.')
     parser.add_argument('--rundir', help='''path to a run directory where a
                                             `sampling.Sampler` was run.''')
-    parser.add_argument('--eventdir',
-                        help='''path to an event directory containing
+    parser.add_argument('--eventdir', nargs='+',
+                        help='''path(s) to event directories containing
                                 postprocessed rundirs.''')
+    parser.add_argument('--n_processes', type=int, default=1,
+                        help='''number of processes to postprocess a
+                                rundir or the eventdirs.''')
     main(**vars(parser.parse_args()))
@@ -344,6 +344,16 @@ class Prior(ABC, utils.JSONMixin):
 
         self.fold = fold
 
+    def __getstate__(self):
+        """Drop the folding transforms for pickling, they are closures."""
+        state = self.__dict__.copy()
+        state['fold'] = state['unfold'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup_folding_transforms()
+
     @classmethod
     def init_parameters(cls, include_optional=True):
         """
@@ -580,7 +590,8 @@ class CombinedPrior(Prior):
 
         cls.transform = transform
         cls.inverse_transform = inverse_transform
-        cls.lnprior_and_transform = lnprior_and_transform
+        cls.lnprior_and_transform = utils.timed('prior')(
+            lnprior_and_transform)
         cls.lnprior = lnprior
 
     @classmethod
@@ -0,0 +1,209 @@
+"""
+Append-only, chunked, columnar storage of samples.
+
+A ``SampleStore`` is a directory of Arrow IPC files, each holding some
+columns of a contiguous chunk of rows. Rows are added by appending
+chunks, and columns are added (or updated) by writing new files for the
+affected chunks, so neither operation rewrites existing data. Readers
+memory-map the files and only load the requested columns.
+A json file keeps track of the chunks and of summary statistics (number
+of samples, columns, sums of weights), so a store can be summarized
+without reading any rows.
+"""
+
+import json
+import os
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cogwheel import utils
+
+
+class SampleStore:
+    """
+    Chunked columnar store of samples in a directory.
+
+    Example
+    -------
+    >>> store = SampleStore(rundir/'samples')
+    >>> store.append(samples)  # Add rows
+    >>> store.write_columns(samples[['lnl']])  # Add or update columns
+    >>> store.read(['m1', 'm2'])  # Memory-mapped, column-wise read
+    >>> store.n_samples, store.n_effective()  # From metadata
+    """
+    METADATA_FILENAME = 'metadata.json'
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._metadata = None
+
+    @property
+    def metadata(self):
+        """
+        Dict with a list of chunks. Each chunk has its number of rows,
+        the files (and their columns) that hold its data, and the sum
+        and sum of squares of its weights if available.
+        """
+        if self._metadata is None:
+            if self.exists():
+                with open(self.path/self.METADATA_FILENAME,
+                          encoding='utf-8') as metadata_file:
+                    self._metadata = json.load(metadata_file)
+            else:
+                self._metadata = {'chunks': []}
+        return self._metadata
+
+    def exists(self):
+        """Whether the store has been written to disk."""
+        return (self.path/self.METADATA_FILENAME).exists()
+
+    @property
+    def n_samples(self):
+        """Number of rows in the store."""
+        return sum(chunk['n_rows'] for chunk in self.metadata['chunks'])
+
+    @property
+    def columns(self):
+        """List of column names in the store, in order of creation."""
+        columns = {}
+        for chunk in self.metadata['chunks']:
+            for file in chunk['files']:
+                columns.update(dict.fromkeys(file['columns']))
+        return list(columns)
+
+    def n_effective(self):
+        """
+        Return effective sample size computed from the weights
+        metadata, or the number of samples if there are no weights.
+        """
+        chunks = self.metadata['chunks']
+        if not chunks or any('weights' not in chunk for chunk in chunks):
+            return float(self.n_samples)
+        weights_sum = sum(chunk['weights']['sum'] for chunk in chunks)
+        weights_sum2 = sum(chunk['weights']['sum2'] for chunk in chunks)
+        return weights_sum**2 / weights_sum2 if weights_sum2 else 0.
+
+    def append(self, samples: pd.DataFrame):
+        """
+        Add rows to the store, as a new chunk. `samples` may lack some
+        of the columns of the store, their values are missing in the
+        new rows.
+        """
+        if samples.empty:
+            return
+        i_chunk = len(self.metadata['chunks'])
+        chunk = {'n_rows': len(samples), 'files': []}
+        self.metadata['chunks'].append(chunk)
+        self._write_chunk_file(i_chunk, samples.reset_index(drop=True))
+        self._save_metadata()
+
+    def write_columns(self, samples: pd.DataFrame, rows=None):
+        """
+        Add or update columns for all rows of the store.
+
+        Parameters
+        ----------
+        samples: pandas.DataFrame
+            Values of the columns to write, must have as many rows as
+            the store.
+
+        rows: boolean array, optional
+            Rows that changed. Only the chunks that contain some of
+            these rows are written. Defaults to all rows.
+        """
+        if len(samples) != self.n_samples:
+            raise ValueError(f'`samples` has {len(samples)} rows, expected '
+                             f'{self.n_samples}.')
+        if samples.columns.empty:
+            return
+
+        samples = samples.reset_index(drop=True)
+        start = 0
+        for i_chunk, chunk in enumerate(self.metadata['chunks']):
+            stop = start + chunk['n_rows']
+            if rows is None or np.any(rows[start : stop]):
+                self._write_chunk_file(
+                    i_chunk, samples.iloc[start : stop].reset_index(drop=True))
+            start = stop
+        self._save_metadata()
+
+    def read(self, columns=None) -> pd.DataFrame:
+        """
+        Return a ``pandas.DataFrame`` with the requested `columns`
+        (defaults to all) for all rows.
+        """
+        return self.read_table(columns).to_pandas()
+
+    def read_table(self, columns=None) -> pa.Table:
+        """
+        Return a ``pyarrow.Table`` with the requested `columns`
+        (defaults to all) for all rows. Data is memory-mapped from the
+        files and only the requested columns are read.
+        """
+        columns = self.columns if columns is None else list(columns)
+        if missing := set(columns) - set(self.columns):
+            raise KeyError(f'Columns not in store: {missing}')
+
+        tables = {}  # Memory-mapped tables, by filename
+        arrays = {column: [] for column in columns}
+        types = {}
+        for chunk in self.metadata['chunks']:
+            for column in columns:
+                # Later files take precedence:
+                filename = next((file['filename']
+                                 for file in reversed(chunk['files'])
+                                 if column in file['columns']), None)
+                if filename is None:
+                    arrays[column].append(chunk['n_rows'])  # Fill later
+                    continue
+                if filename not in tables:
+                    tables[filename] = pa.ipc.open_file(
+                        pa.memory_map(str(self.path/filename))).read_all()
+                array = tables[filename].column(column)
+                types.setdefault(column, array.type)
+                arrays[column].extend(array.chunks)
+
+        return pa.table({
+            column: pa.chunked_array(
+                [pa.nulls(array, types.get(column, pa.float64()))
+                 if isinstance(array, int) else array
+                 for array in column_arrays],
+                type=types.get(column, pa.float64()))
+            for column, column_arrays in arrays.items()})
+
+    def clear(self):
+        """Delete all the contents of the store."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._metadata = None
+
+    def _write_chunk_file(self, i_chunk, samples):
+        """
+        Write an Arrow IPC file with the columns of `samples` for chunk
+        `i_chunk`, and register it in the metadata.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        chunk = self.metadata['chunks'][i_chunk]
+        filename = f'chunk{i_chunk}_{len(chunk["files"])}.arrow'
+
+        table = pa.Table.from_pandas(samples, preserve_index=False)
+        with pa.OSFile(str(self.path/filename), 'wb') as sink, \
+                pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        chunk['files'].append({'filename': filename,
+                               'columns': list(samples.columns)})
+        if utils.WEIGHTS_NAME in samples:
+            weights = samples[utils.WEIGHTS_NAME].to_numpy()
+            chunk['weights'] = {'sum': float(np.sum(weights)),
+                                'sum2': float(np.sum(weights**2))}
+
+    def _save_metadata(self):
+        """Write the metadata atomically."""
+        tmp_path = self.path/f'{self.METADATA_FILENAME}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as metadata_file:
+            json.dump(self.metadata, metadata_file, indent=2)
+        os.replace(tmp_path, self.path/self.METADATA_FILENAME)
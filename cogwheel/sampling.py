@@ -2,12 +2,19 @@
 
 import abc
 import argparse
+import contextlib
 import datetime
+import hashlib
 import inspect
+import json
+import multiprocessing
 import pathlib
 import os
+import resource
 import sys
 import textwrap
+import threading
+import time
 from cProfile import Profile
 from functools import wraps
 import numpy as np
@@ -19,11 +26,180 @@ import pymultinest
 # import ultranest
 # import ultranest.stepsampler
 
+from cogwheel import gw_utils
+from cogwheel import pn_coordinates
 from cogwheel import postprocessing
 from cogwheel import utils
+from cogwheel.sample_store import SampleStore
 
-SAMPLES_FILENAME = 'samples.feather'
+SAMPLES_DIRNAME = 'samples'
+SAMPLES_FILENAME = 'samples.feather'  # Legacy format
 FINISHED_FILENAME = 'FINISHED.out'
+# Subdirectory of the run directory for json reports, so that the
+# sampler's json file is the only one in the run directory:
+REPORTS_DIRNAME = 'reports'
+
+# Sampler used by the ``_worker_*`` functions in pool processes. Set by
+# ``_init_worker``, the main process calls the sampler's methods instead.
+_worker_sampler = None
+
+
+def _init_worker(sampler_path, telemetry_counters=None):
+    """
+    Initializer for pool processes. Instantiate the sampler from its
+    json file once per process, so the posterior (which is expensive to
+    transfer, and not picklable) need not be sent to the workers.
+    Evaluations are registered in `telemetry_counters` (shared with the
+    main process) if passed, workers do not write telemetry records.
+    """
+    global _worker_sampler
+    _worker_sampler = utils.read_json(sampler_path)
+    _worker_sampler._rundir = pathlib.Path(sampler_path).parent
+    _worker_sampler._telemetry_counters = telemetry_counters
+
+
+def _worker_lnprob(par_vals):
+    """Picklable proxy to ``Dynesty._lnprob_dynesty``."""
+    return _worker_sampler._lnprob_dynesty(par_vals)
+
+
+def _worker_lnprobs(par_vals):
+    """Picklable proxy to ``Sampler._get_lnprobs``."""
+    return _worker_sampler._get_lnprobs(*par_vals)
+
+
+def _worker_cubetransform(cube):
+    """Picklable proxy to ``Dynesty._cubetransform``."""
+    return _worker_sampler._cubetransform(cube)
+
+
+def _worker_run_chain(i_chain):
+    """Picklable proxy to ``FastSlowMCMC._run_chain``."""
+    with _worker_sampler._cache_unfoldings():
+        return _worker_sampler._run_chain(i_chain)
+
+
+def _worker_ln_importance_weight(par_vals):
+    """Picklable proxy to ``ImportanceSampler._ln_importance_weight``."""
+    return _worker_sampler._ln_importance_weight(par_vals)
+
+
+def get_sample_store(rundir):
+    """Return the ``SampleStore`` with the samples of a run."""
+    return SampleStore(pathlib.Path(rundir)/SAMPLES_DIRNAME)
+
+
+def read_samples(rundir, columns=None):
+    """
+    Return a ``pandas.DataFrame`` with the samples from a run directory
+    (only `columns` if passed). Runs saved in the legacy
+    ``SAMPLES_FILENAME`` format are supported.
+    """
+    store = get_sample_store(rundir)
+    if store.exists():
+        return store.read(columns)
+    return pd.read_feather(pathlib.Path(rundir)/SAMPLES_FILENAME, columns)
+
+
+def _get_memory_usage():
+    """
+    Return the resident set size of the current process in MiB, or its
+    peak value where the current value is not available.
+    """
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as statm_file:
+            n_pages = int(statm_file.read().split()[1])
+        return n_pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+class _TelemetryCounters:
+    """
+    Number of probability evaluations and time spent on them, in shared
+    memory so that the workers of a multiprocessing pool can register
+    their evaluations with the main process.
+    """
+    def __init__(self):
+        self._values = multiprocessing.Array('d', 2)  # Count and time
+
+    def register(self, latency):
+        """Account for one evaluation that took `latency` seconds."""
+        with self._values.get_lock():
+            self._values[0] += 1
+            self._values[1] += latency
+
+    def read(self):
+        """Return the number of evaluations and their total time."""
+        with self._values.get_lock():
+            n_evaluations, evaluation_time = self._values[:]
+        return int(n_evaluations), evaluation_time
+
+
+class _Telemetry:
+    """
+    Keep count of the probability evaluations of a sampler, including
+    those of its pool workers, and periodically append a record with
+    throughput statistics to a json-lines file from a background thread
+    of the main process. The waveform cache and memory statistics are
+    those of the main process. Multiple MPI ranks can append to the
+    same file, each record reports its process id and rank.
+    """
+    def __init__(self, sampler, path, interval):
+        self.sampler = sampler
+        self.path = path
+        self.interval = interval
+
+        self.counters = _TelemetryCounters()
+
+        self._last_record = (time.perf_counter(), 0, 0.)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        """Start writing records every `interval` seconds."""
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and write a final record."""
+        self._stop_event.set()
+        self._thread.join()
+        self.write_record()
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.write_record()
+
+    def write_record(self):
+        """Append a record with the statistics since the last one."""
+        now = time.perf_counter()
+        n_evaluations, evaluation_time = self.counters.read()
+        last_time, last_n_evaluations, last_evaluation_time \
+            = self._last_record
+        self._last_record = (now, n_evaluations, evaluation_time)
+
+        new_evaluations = n_evaluations - last_n_evaluations
+        counters = self.sampler._get_performance_counters()
+        n_slow = counters['n_slow_evaluations']
+        n_fast = counters['n_fast_evaluations']
+
+        record = {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'pid': os.getpid(),
+            'rank': utils.get_mpi_rank(),
+            'n_evaluations': n_evaluations,
+            'evaluations_per_second': new_evaluations / (now - last_time),
+            'mean_latency': ((evaluation_time - last_evaluation_time)
+                             / new_evaluations if new_evaluations else None),
+            'n_slow_evaluations': n_slow,
+            'n_fast_evaluations': n_fast,
+            'waveform_cache_hit_rate': (n_fast / (n_slow + n_fast)
+                                        if n_slow + n_fast else None),
+            'memory_mib': _get_memory_usage(),
+            'progress': self.sampler._get_progress()}
+
+        with open(self.path, 'a', encoding='utf-8') as telemetry_file:
+            telemetry_file.write(json.dumps(record) + '\n')
 
 
 class Sampler(abc.ABC, utils.JSONMixin):
@@ -41,11 +217,43 @@ class Sampler(abc.ABC, utils.JSONMixin):
     """
     DEFAULT_RUN_KWARGS = {}  # Implemented by subclasses
     PROFILING_FILENAME = 'profiling'
+    TIMING_FILENAME = 'timing.json'
+    TELEMETRY_FILENAME = 'telemetry.jsonl'
     JSON_FILENAME = 'Sampler.json'
 
     def __init__(self, posterior, run_kwargs=None, sample_prior=False,
                  dir_permissions=utils.DIR_PERMISSIONS,
-                 file_permissions=utils.FILE_PERMISSIONS):
+                 file_permissions=utils.FILE_PERMISSIONS, profile=False,
+                 telemetry_interval=60.):
+        """
+        Parameters
+        ----------
+        posterior: cogwheel.posterior.Posterior
+            Distribution to sample.
+
+        run_kwargs: dict, optional
+            Options for the sampling code, see ``DEFAULT_RUN_KWARGS``.
+
+        sample_prior: bool
+            Whether to sample the prior instead of the posterior.
+
+        dir_permissions, file_permissions: octal
+            Permissions for the run directory and its files.
+
+        profile: bool
+            Whether to run ``cProfile`` during sampling and save the
+            statistics to the run directory. Note that this slows down
+            the run. A lightweight timing report is saved regardless,
+            to ``REPORTS_DIRNAME/TIMING_FILENAME``. Both cover only the
+            main process, not the workers of a multiprocessing pool.
+
+        telemetry_interval: float or None
+            Every how many seconds to append a record with throughput
+            statistics (probability evaluations per second, waveform
+            cache hit rate, memory usage, sampler progress...) to
+            ``TELEMETRY_FILENAME`` in the run directory while sampling.
+            ``None`` disables telemetry.
+        """
         super().__init__()
 
         self.posterior = posterior
@@ -61,10 +269,18 @@ class Sampler(abc.ABC, utils.JSONMixin):
 
         self.dir_permissions = dir_permissions
         self.file_permissions = file_permissions
+        self.profile = profile
+        self.telemetry_interval = telemetry_interval
 
         self._get_lnprobs = None  # Set by sample_prior
         self.sample_prior = sample_prior
 
+        self._rundir = None  # Set by run
+        self._restart = False  # Set by run
+        self._telemetry = None  # Set by run
+        self._telemetry_counters = None  # Set by run or _init_worker
+        self._progress = {}  # Updated by subclasses while sampling
+
     @property
     def sample_prior(self):
         """Whether to sample the prior instead of the posterior."""
@@ -75,7 +291,63 @@ class Sampler(abc.ABC, utils.JSONMixin):
         self._sample_prior = sample_prior
         func = (self.posterior.prior.lnprior if sample_prior
                 else self.posterior.lnposterior)
-        self._get_lnprobs = self.posterior.prior.unfold_apply(func)
+        get_lnprobs = self.posterior.prior.unfold_apply(func)
+
+        @wraps(get_lnprobs)
+        def get_lnprobs_with_telemetry(*par_vals):
+            return self._evaluate(get_lnprobs, *par_vals)
+
+        self._get_lnprobs = get_lnprobs_with_telemetry
+
+    def _evaluate(self, func, *args):
+        """
+        Return ``func(*args)``. If telemetry is on, account for it as
+        one probability evaluation.
+        """
+        if self._telemetry_counters is None:
+            return func(*args)
+
+        start = time.perf_counter()
+        result = func(*args)
+        self._telemetry_counters.register(time.perf_counter() - start)
+        return result
+
+    def _start_telemetry(self):
+        """
+        Start appending telemetry records to the run directory, if
+        ``telemetry_interval`` is not ``None``.
+        """
+        if self.telemetry_interval is not None and self._rundir is not None:
+            self._telemetry = _Telemetry(
+                self, self._rundir/self.TELEMETRY_FILENAME,
+                self.telemetry_interval)
+            self._telemetry_counters = self._telemetry.counters
+            self._telemetry.start()
+
+    def _stop_telemetry(self):
+        if self._telemetry is not None:
+            self._telemetry.stop()
+            self._telemetry = None
+            self._telemetry_counters = None
+
+    def _get_progress(self) -> dict:
+        """Return dict with sampler-specific progress information."""
+        return self._progress.copy()
+
+    def __getstate__(self):
+        """
+        Drop ``_get_lnprobs`` and the telemetry for pickling, they are
+        a closure and a thread (and shared memory) respectively.
+        """
+        state = self.__dict__.copy()
+        state['_get_lnprobs'] = None
+        state['_telemetry'] = None
+        state['_telemetry_counters'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sample_prior = self._sample_prior
 
     def resample(self, samples: pd.DataFrame, seed=0):
         """
@@ -134,7 +406,7 @@ class Sampler(abc.ABC, utils.JSONMixin):
 
     def submit_slurm(
             self, rundir, n_hours_limit=48, memory_per_task='32G',
-            resuming=False, sbatch_cmds=()):
+            resuming=False, sbatch_cmds=(), n_tasks=1):
         """
         Parameters
         ----------
@@ -148,11 +420,16 @@ class Sampler(abc.ABC, utils.JSONMixin):
             Determines the memory and number of cpus.
 
         resuming: bool
-            Whether to attempt resuming a previous run if rundir already
-            exists.
+            Whether `rundir` may already exist, e.g. to resume a
+            previous run. Samplers that support it resume from a
+            checkpoint saved with the same settings (see ``run``).
 
         sbatch_cmds: tuple of str
             Strings with SBATCH commands.
+
+        n_tasks: int
+            Number of MPI processes. Only useful for samplers that
+            support MPI (``PyMultiNest``), requires ``mpi4py``.
         """
         rundir = pathlib.Path(rundir)
         job_name = '_'.join([rundir.name,
@@ -166,9 +443,9 @@ class Sampler(abc.ABC, utils.JSONMixin):
         self.to_json(rundir, overwrite=resuming)
 
         sbatch_cmds += (f'--mem-per-cpu={memory_per_task}',)
-        args = rundir.resolve()
+        args = str(rundir.resolve())
         utils.submit_slurm(job_name, n_hours_limit, stdout_path, stderr_path,
-                           args, sbatch_cmds, batch_path)
+                           args, sbatch_cmds, batch_path, n_tasks=n_tasks)
 
     def submit_lsf(self, rundir, n_hours_limit=48,
                    memory_per_task='32G', resuming=False):
@@ -178,8 +455,10 @@ class Sampler(abc.ABC, utils.JSONMixin):
         rundir: path of run directory, e.g. from `self.get_rundir`
         n_hours_limit: Number of hours to allocate for the job
         memory_per_task: Determines the memory and number of cpus
-        resuming: bool, whether to attempt resuming a previous run if
-                  rundir already exists.
+        resuming: bool, whether `rundir` may already exist, e.g. to
+                  resume a previous run. Samplers that support it
+                  resume from a checkpoint saved with the same
+                  settings (see ``run``).
         """
         rundir = pathlib.Path(rundir)
         job_name = '_'.join([self.__class__.__name__,
@@ -194,6 +473,8 @@ class Sampler(abc.ABC, utils.JSONMixin):
         package = pathlib.Path(__file__).parents[1].resolve()
         module = f'cogwheel.{os.path.basename(__file__)}'.removesuffix('.py')
 
+        args = str(rundir.resolve())
+
         batch_path = rundir/'batchfile'
         with open(batch_path, 'w+', encoding='utf-8') as batchfile:
             batchfile.write(textwrap.dedent(f"""\
@@ -207,7 +488,7 @@ class Sampler(abc.ABC, utils.JSONMixin):
                 conda activate {os.environ['CONDA_DEFAULT_ENV']}
 
                 cd {package}
-                srun {sys.executable} -m {module} {rundir.resolve()}
+                srun {sys.executable} -m {module} {args}
                 """))
         batch_path.chmod(0o777)
         os.system(f'bsub < {batch_path.resolve()}')
@@ -217,32 +498,149 @@ class Sampler(abc.ABC, utils.JSONMixin):
     def _run(self):
         """Sample the distribution."""
 
-    def run(self, rundir):
+    def run(self, rundir, restart=False):
         """
         Make a directory to save results and run sampler.
+        If running with multiple MPI processes, all of them sample but
+        only rank 0 writes to `rundir`.
 
         Parameters
         ----------
         rundir: directory where to save output, will create if needed.
+        restart: bool, whether to discard a checkpoint in `rundir`
+                 and start over. Otherwise, samplers that support it
+                 (``Dynesty``) resume from a checkpoint if it was saved
+                 with the same settings, so that e.g. a requeued job
+                 continues where it was interrupted.
         """
         rundir = pathlib.Path(rundir)
-        self.to_json(rundir, dir_permissions=self.dir_permissions,
-                     file_permissions=self.file_permissions, overwrite=True)
-
-        with Profile() as profiler:
-            exit_code = self._run()
-            with open(rundir/FINISHED_FILENAME, 'w', encoding='utf-8') as fobj:
-                fobj.write(f'{exit_code}\n{datetime.datetime.now()}')
-        profiler.dump_stats(rundir/self.PROFILING_FILENAME)
+        self._rundir = rundir
+        self._restart = restart
+        comm = utils.get_mpi_comm()
+        is_root = utils.get_mpi_rank() == 0
+
+        if is_root:
+            self.to_json(rundir, dir_permissions=self.dir_permissions,
+                         file_permissions=self.file_permissions,
+                         overwrite=True)
+        if comm is not None:
+            comm.Barrier()
+
+        counters_0 = self._get_performance_counters()
+        profiler = Profile() if self.profile else contextlib.nullcontext()
+        start = time.perf_counter()
+        self._start_telemetry()
+        try:
+            with utils.StageTimer.record() as timings, profiler:
+                exit_code = self._run()
+        finally:
+            self._stop_telemetry()
+        wall_time = time.perf_counter() - start
+        if not is_root:
+            return
+
+        with open(rundir/FINISHED_FILENAME, 'w', encoding='utf-8') as fobj:
+            fobj.write(f'{exit_code}\n{datetime.datetime.now()}')
+        if self.profile:
+            profiler.dump_stats(rundir/self.PROFILING_FILENAME)
+        (rundir/REPORTS_DIRNAME).mkdir(exist_ok=True)
+        self._write_timing_report(rundir/REPORTS_DIRNAME/self.TIMING_FILENAME,
+                                  wall_time, timings, counters_0)
 
         samples = self.load_samples()
         self.posterior.prior.transform_samples(samples)
         self.posterior.likelihood.postprocess_samples(samples)
 
-        samples.to_feather(rundir/SAMPLES_FILENAME)
+        store = get_sample_store(rundir)
+        store.clear()
+        store.append(samples)
+
+        for path in rundir.rglob('*'):
+            path.chmod(self.dir_permissions if path.is_dir()
+                       else self.file_permissions)
+
+    @contextlib.contextmanager
+    def _pool(self, n_processes):
+        """
+        Context manager that yields a ``multiprocessing.Pool`` with
+        `n_processes` workers (or ``None`` if `n_processes` is 1) that
+        can evaluate the ``_worker_*`` functions of this module.
+        Each worker loads this sampler from the run directory and
+        registers its evaluations in the telemetry of this process.
+        Without a pool, callers should use the sampler's methods
+        directly.
+        """
+        if n_processes == 1:
+            yield None
+            return
+
+        if self._rundir is None:
+            raise RuntimeError(
+                'Use `run()` to sample with multiple processes.')
+
+        with multiprocessing.Pool(
+                n_processes, initializer=_init_worker,
+                initargs=(self._rundir/self.JSON_FILENAME,
+                          self._telemetry_counters)) as pool:
+            yield pool
 
-        for path in rundir.iterdir():
-            path.chmod(self.file_permissions)
+    def _get_performance_counters(self):
+        """
+        Return dict with the waveform generator's evaluation counts and
+        the statistics of caches in ``utils.cache_registry``.
+        """
+        waveform_generator = getattr(self.posterior.likelihood,
+                                     'waveform_generator', None)
+        return {
+            'n_slow_evaluations': getattr(waveform_generator,
+                                          'n_slow_evaluations', 0),
+            'n_fast_evaluations': getattr(waveform_generator,
+                                          'n_fast_evaluations', 0),
+            'lru_caches': utils.get_cache_stats()}
+
+    def _write_timing_report(self, path, wall_time, timings, counters_0):
+        """
+        Save a json file with the wall time of the run, the time spent
+        per stage (see ``utils.StageTimer``), waveform evaluation counts
+        and cache hit rates during the run. Only computations in the
+        main process are accounted for: with a multiprocessing pool,
+        the report says so, and the work done by the workers is missing
+        from it.
+        """
+        counters = self._get_performance_counters()
+        n_slow, n_fast = (counters[key] - counters_0[key]
+                          for key in ('n_slow_evaluations',
+                                      'n_fast_evaluations'))
+
+        lru_caches = {}
+        for name, info in counters['lru_caches'].items():
+            info_0 = counters_0['lru_caches'].get(name, dict.fromkeys(
+                ('hits', 'misses', 'evictions'), 0))
+            hits, misses, evictions = (info[key] - info_0[key]
+                                       for key in ('hits', 'misses',
+                                                   'evictions'))
+            if hits + misses:
+                lru_caches[name] = {'hits': hits,
+                                    'misses': misses,
+                                    'hit_rate': hits / (hits + misses),
+                                    'evictions': evictions,
+                                    'nbytes': info['nbytes']}
+
+        report = {
+            'wall_time': wall_time,
+            'stages': timings,
+            'waveform_generator': {
+                'n_slow_evaluations': n_slow,
+                'n_fast_evaluations': n_fast,
+                'cache_hit_rate': (n_fast / (n_slow + n_fast)
+                                   if n_slow + n_fast else None)},
+            'lru_caches': lru_caches}
+        if self.run_kwargs.get('n_processes', 1) > 1:
+            report['note'] = ('Only the main process is accounted for, not '
+                              'the workers of the multiprocessing pool.')
+
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
 
     @abc.abstractmethod
     def load_samples(self):
@@ -267,7 +665,8 @@ class Sampler(abc.ABC, utils.JSONMixin):
     @staticmethod
     def completed(rundir) -> bool:
         """Return whether the run completed successfully."""
-        return (pathlib.Path(rundir)/SAMPLES_FILENAME).exists()
+        return (get_sample_store(rundir).exists()
+                or (pathlib.Path(rundir)/SAMPLES_FILENAME).exists())
 
     @wraps(utils.JSONMixin.to_json)
     def to_json(self, dirname, basename=None, **kwargs):
@@ -280,7 +679,12 @@ class Sampler(abc.ABC, utils.JSONMixin):
 
 
 class PyMultiNest(Sampler):
-    """Sample a posterior or prior using PyMultiNest."""
+    """
+    Sample a posterior or prior using PyMultiNest.
+
+    Supports MPI: launch with multiple processes (e.g. ``n_tasks`` in
+    ``submit_slurm``) to parallelize the likelihood evaluations.
+    """
     DEFAULT_RUN_KWARGS = {'n_iter_before_update': 1000,
                           'n_live_points': 2048,
                           'evidence_tolerance': 1/4}
@@ -293,8 +697,23 @@ class PyMultiNest(Sampler):
             for par in self.posterior.prior.sampled_params]
 
     def _run(self):
+        # Non-root MPI ranks do not go through ``to_json``:
+        self.run_kwargs['outputfiles_basename'] = os.path.join(self._rundir,
+                                                               '')
         pymultinest.run(self._lnprob_pymultinest, self._cubetransform,
-                        self._ndim, self._nparams, **self.run_kwargs)
+                        self._ndim, self._nparams,
+                        **{'dump_callback': self._update_progress}
+                        | self.run_kwargs)
+
+    def _update_progress(self, n_samples, n_live, n_params, live_points,
+                         posterior, param_constraints, max_lnprob,
+                         ln_evidence, ln_evidence_importance,
+                         ln_evidence_error, *_):
+        """Keep track of the progress for telemetry (dump callback)."""
+        self._progress = {'n_samples': n_samples,
+                          'max_lnprob': max_lnprob,
+                          'log_ev': ln_evidence,
+                          'log_ev_std': ln_evidence_error}
 
     def load_samples(self):
         """
@@ -350,8 +769,34 @@ class PyMultiNest(Sampler):
 
 
 class Dynesty(Sampler):
-    """Sample a posterior or prior using ``dynesty``."""
-    DEFAULT_RUN_KWARGS = {}
+    """
+    Sample a posterior or prior using ``dynesty``.
+
+    The likelihood can be evaluated in parallel by passing
+    ``run_kwargs['n_processes']`` > 1. Each process instantiates the
+    sampler from the json file in the run directory once, and then
+    evaluates batches of ``queue_size`` points at a time (``queue_size``
+    defaults to `n_processes`).
+
+    The log probabilities of the different unfoldings of each sample
+    are stored as dynesty "blobs" while sampling, so they need not be
+    recomputed when loading the samples.
+
+    The sampler state is saved periodically to the run directory,
+    every ``run_kwargs['checkpoint_every']`` seconds (pass ``None`` to
+    disable). ``run`` resumes from the checkpoint if it was saved with
+    the same posterior and settings, as recorded by a hash in
+    ``CHECKPOINT_HASH_FILENAME``; otherwise, or if passed
+    ``restart=True``, the checkpoint is deleted and the run starts
+    over.
+    """
+    DEFAULT_RUN_KWARGS = {'checkpoint_every': 600}
+    CHECKPOINT_FILENAME = 'dynesty.save'
+    CHECKPOINT_HASH_FILENAME = 'dynesty.save.sha1'
+
+    # `run_kwargs` that can change when resuming from a checkpoint:
+    _RESUMABLE_RUN_KWARGS = {'checkpoint_file', 'checkpoint_every',
+                             'n_processes', 'queue_size', 'print_progress'}
 
     @wraps(Sampler.__init__)
     def __init__(self, *args, **kwargs):
@@ -364,54 +809,604 @@ class Dynesty(Sampler):
         reflective = [self.posterior.prior.sampled_params.index(par)
                       for par in self.posterior.prior.reflective_params]
 
+        run_kwargs = self.run_kwargs.copy()
+        n_processes = run_kwargs.pop('n_processes', 1)
+        hash_path = self._rundir/self.CHECKPOINT_HASH_FILENAME
+        settings_hash = self._get_settings_hash()
+        if os.path.exists(run_kwargs.get('checkpoint_file', '')):
+            if self._restart:
+                print('Deleting existing checkpoint, restarting.')
+                os.remove(run_kwargs['checkpoint_file'])
+            elif (not hash_path.exists()
+                  or hash_path.read_text(encoding='utf-8') != settings_hash):
+                print('Deleting checkpoint saved with different settings.')
+                os.remove(run_kwargs['checkpoint_file'])
+        if run_kwargs.get('checkpoint_every') is None:
+            run_kwargs.pop('checkpoint_every', None)
+            run_kwargs.pop('checkpoint_file', None)
+
         sampler_keys = (
             set(inspect.signature(dynesty.DynamicNestedSampler).parameters)
-            & self.run_kwargs.keys())
-        sampler_kwargs = {par: self.run_kwargs[par] for par in sampler_keys}
-
-        run_keys = self.run_kwargs.keys() - sampler_keys
-        run_kwargs = {par: self.run_kwargs[par] for par in run_keys}
-
-        self.sampler = dynesty.DynamicNestedSampler(
-            self._lnprob_dynesty,
-            self._cubetransform,
-            len(self.posterior.prior.sampled_params),
-            rstate=np.random.default_rng(0),
-            periodic=periodic or None,
-            reflective=reflective or None,
-            sample='rwalk',
-            **sampler_kwargs)
-        self.sampler.run_nested(**run_kwargs)
+            & run_kwargs.keys())
+        sampler_kwargs = {par: run_kwargs.pop(par) for par in sampler_keys}
+
+        if n_processes > 1:
+            sampler_kwargs.setdefault('queue_size', n_processes)
+
+        with self._pool(n_processes) as pool:
+            lnprob, cubetransform = (
+                (self._lnprob_dynesty, self._cubetransform) if pool is None
+                else (_worker_lnprob, _worker_cubetransform))
+
+            if os.path.exists(run_kwargs.get('checkpoint_file', '')):
+                print('Resuming from checkpoint.')
+                self.sampler = dynesty.DynamicNestedSampler.restore(
+                    run_kwargs['checkpoint_file'], pool=pool)
+                self._set_dynesty_functions(lnprob, cubetransform)
+                run_kwargs['resume'] = True
+            else:
+                if 'checkpoint_file' in run_kwargs:
+                    hash_path.write_text(settings_hash, encoding='utf-8')
+                self.sampler = dynesty.DynamicNestedSampler(
+                    lnprob,
+                    cubetransform,
+                    len(self.posterior.prior.sampled_params),
+                    rstate=np.random.default_rng(0),
+                    periodic=periodic or None,
+                    reflective=reflective or None,
+                    sample='rwalk',
+                    pool=pool,
+                    blob=True,
+                    **sampler_kwargs)
+            self.sampler.run_nested(**run_kwargs)
+
+            if 'checkpoint_file' in run_kwargs:
+                self.sampler.save(run_kwargs['checkpoint_file'])
+
+    def _get_settings_hash(self):
+        """
+        Return a hex digest of the sampler json in the run directory,
+        which identifies the posterior and the settings that a
+        checkpoint is valid for. `run_kwargs` that do not affect the
+        samples (``_RESUMABLE_RUN_KWARGS``) are excluded.
+        """
+        with open(self._rundir/self.JSON_FILENAME,
+                  encoding='utf-8') as sampler_file:
+            init_kwargs = json.load(sampler_file)['init_kwargs']
+        settings = {
+            'posterior': init_kwargs['posterior'],
+            'sample_prior': init_kwargs['sample_prior'],
+            'run_kwargs': {key: val
+                           for key, val in init_kwargs['run_kwargs'].items()
+                           if key not in self._RESUMABLE_RUN_KWARGS}}
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()
+                            ).hexdigest()
+
+    def _set_dynesty_functions(self, lnprob, cubetransform):
+        """
+        Make ``self.sampler`` (e.g. restored from a checkpoint that was
+        saved with or without a pool) evaluate `lnprob` and
+        `cubetransform`.
+
+        ``dynesty`` has no public interface for this, so the functions
+        wrapped by the restored sampler are replaced. This relies on
+        internals of the ``dynesty`` version in ``requirements.txt``;
+        raise ``RuntimeError`` if they are not found.
+        """
+        for sampler in (self.sampler, self.sampler.sampler,
+                        self.sampler.batch_sampler):
+            if sampler is None:
+                continue
+            wrappers = (getattr(sampler.loglikelihood, 'loglikelihood',
+                                None),
+                        sampler.prior_transform)
+            if not all(hasattr(wrapper, 'func') for wrapper in wrappers):
+                raise RuntimeError(
+                    f'Cannot resume with dynesty {dynesty.__version__}, '
+                    'use the version in requirements.txt or pass '
+                    '`restart=True`.')
+            wrappers[0].func = lnprob
+            wrappers[1].func = cubetransform
 
     def load_samples(self):
         """
         Collect dynesty samples, resample from them to undo the
         parameter folding. Return a ``pandas.DataFrame`` with samples.
+        If the sampler is not in memory, it is restored from the
+        checkpoint file.
         """
-        folded = pd.DataFrame(self.sampler.results.samples,
+        if self.sampler is None:
+            self.sampler = dynesty.DynamicNestedSampler.restore(
+                self.run_kwargs['checkpoint_file'])
+
+        results = self.sampler.results
+        folded = pd.DataFrame(results.samples,
                               columns=self.posterior.prior.sampled_params)
 
-        # ``dynesty`` doesn't allow to save samples' metadata, so we
-        # have to recompute ``lnprobs``:
-        lnprobs = pd.DataFrame(
-            [self._get_lnprobs(**row) for _, row in folded.iterrows()],
-            columns=self._lnprob_cols)
-        utils.update_dataframe(folded, lnprobs)
+        lnprobs = results['blob'] if 'blob' in results.keys() else None
+        if lnprobs is None or np.shape(lnprobs) != (len(folded),
+                                                    len(self._lnprob_cols)):
+            lnprobs = self._compute_lnprobs(folded)
+        utils.update_dataframe(
+            folded, pd.DataFrame(lnprobs, columns=self._lnprob_cols))
 
         samples = self.resample(folded)
-        samples[utils.WEIGHTS_NAME] = np.exp(
-            self.sampler.results.logwt - self.sampler.results.logwt.max())
+        samples[utils.WEIGHTS_NAME] = np.exp(results.logwt
+                                             - results.logwt.max())
         return samples
 
+    def _compute_lnprobs(self, folded):
+        """
+        Return array of shape ``(len(folded), len(self._lnprob_cols))``
+        with the log probability of each unfolding of the `folded`
+        samples. Evaluate in parallel if ``run_kwargs['n_processes']``
+        is larger than 1.
+        """
+        with self._pool(self.run_kwargs.get('n_processes', 1)) as pool:
+            if pool is None:
+                lnprobs = [self._get_lnprobs(*par_vals)
+                           for par_vals in folded.to_numpy()]
+            else:
+                lnprobs = pool.map(_worker_lnprobs, folded.to_numpy())
+        return np.array(lnprobs)
+
+    @wraps(utils.JSONMixin.to_json)
+    def to_json(self, dirname, *args, **kwargs):
+        """
+        Update run_kwargs['checkpoint_file'] before saving.
+        Parameters are as in `utils.JSONMixin.to_json()`
+        """
+        self.run_kwargs['checkpoint_file'] = os.path.join(
+            dirname, self.CHECKPOINT_FILENAME)
+        super().to_json(dirname, *args, **kwargs)
+
     def _lnprob_dynesty(self, par_vals):
-        """Return the logarithm of the folded probability density."""
-        return scipy.special.logsumexp(self._get_lnprobs(*par_vals))
+        """
+        Return the logarithm of the folded probability density, and the
+        log probability of each unfolding as a blob.
+        """
+        lnprobs = self._get_lnprobs(*par_vals)
+        return scipy.special.logsumexp(lnprobs), lnprobs
+
+    def _get_progress(self):
+        """Return dict with dynesty's iteration, calls and efficiency."""
+        if self.sampler is None:
+            return super()._get_progress()
+        return {'iteration': self.sampler.it,
+                'n_calls': self.sampler.ncall,
+                'efficiency': self.sampler.eff}
 
     def _cubetransform(self, cube):
         return (self.posterior.prior.cubemin
                 + cube * self.posterior.prior.folded_cubesize)
 
 
+class ImportanceSampler(Sampler):
+    """
+    Sample a posterior over intrinsic parameters (e.g. with
+    ``MarginalizedExtrinsicLikelihood``) by importance sampling, using
+    ``pn_coordinates.IntrinsicParameterProposal`` as proposal.
+
+    Batches of ``2**run_kwargs['log2n_batch']`` Quasi Monte Carlo
+    samples are drawn from the proposal, until the effective sample
+    size reaches ``run_kwargs['n_effective']`` or
+    ``run_kwargs['max_n_batches']`` batches have been drawn. The
+    posterior is evaluated in parallel if ``run_kwargs['n_processes']``
+    is larger than 1.
+
+    The prior needs to have ``IntrinsicParameterProposal.params`` (plus
+    fixed parameters) as standard parameters, e.g.
+    ``gw_prior.IntrinsicIASPrior`` or ``gw_prior.IntrinsicLVCPrior``.
+    """
+    DEFAULT_RUN_KWARGS = {'log2n_batch': 12,
+                          'n_effective': 2000,
+                          'max_n_batches': 16,
+                          'n_processes': 1}
+    WEIGHTED_SAMPLES_DIRNAME = 'importance_samples'
+
+    # Coordinates in which the reference prior of the proposal, w.r.t.
+    # which its weights are defined, is uniform:
+    _reference_coordinates = ['mchirp', 'lnq', 'cosiota',
+                              's1x_n', 's1y_n', 's1z',
+                              's2x_n', 's2y_n', 's2z']
+    _jacobian_step = 1e-6  # In units of the parameter range
+
+    @wraps(Sampler.__init__)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        prior = self.posterior.prior
+        proposal_params = pn_coordinates.IntrinsicParameterProposal.params
+        if (len(prior.sampled_params) != len(proposal_params)
+                or not set(proposal_params) <= set(prior.standard_params)):
+            raise ValueError(
+                f'`{prior.__class__.__name__}` is incompatible with '
+                '`IntrinsicParameterProposal`, sampled parameters must map '
+                f'one-to-one to {proposal_params}.')
+
+        self.proposal = None  # Set by ``_run``
+        self.weighted_samples = None  # Set by ``_run``
+
+    def _run(self):
+        self.proposal = pn_coordinates.IntrinsicParameterProposal \
+            .from_posterior(self.posterior)
+
+        store = self._get_weighted_samples_store()
+        if store is not None:
+            store.clear()
+
+        batches = []
+        with self._pool(self.run_kwargs['n_processes']) as pool:
+            for _ in range(self.run_kwargs['max_n_batches']):
+                batches.append(self._evaluate_batch(pool))
+                if store is not None:
+                    store.append(batches[-1])
+                self.weighted_samples = pd.concat(batches, ignore_index=True)
+
+                n_effective = utils.n_effective(self._get_weights())
+                self._progress = {'n_samples': len(self.weighted_samples),
+                                  'n_effective': n_effective}
+                print(f'{len(self.weighted_samples)} samples, '
+                      f'n_effective = {n_effective:.1f}, '
+                      f'log_ev = {self.load_evidence()["log_ev"]:.3f}')
+                if n_effective >= self.run_kwargs['n_effective']:
+                    break
+
+    def _get_weighted_samples_store(self):
+        """
+        Return ``SampleStore`` where the batches of weighted samples
+        are appended as they are computed, ``None`` if the sampler was
+        not saved to a directory (see ``to_json``).
+        """
+        if 'weighted_samples_dirname' not in self.run_kwargs:
+            return None
+        return SampleStore(self.run_kwargs['weighted_samples_dirname'])
+
+    def _evaluate_batch(self, pool=None):
+        """
+        Draw samples from the proposal and compute their importance
+        weights, in `pool` if provided (see ``Sampler._pool``).
+        Return a ``pandas.DataFrame`` with columns for the sampled
+        parameters and a column 'ln_weight'.
+        """
+        prior = self.posterior.prior
+
+        samples = self.proposal.generate_intrinsic_samples(
+            self.run_kwargs['log2n_batch'])
+        for par in set(prior.standard_params) - set(samples):
+            samples[par] = self.posterior.likelihood.par_dic_0[par]
+        prior.inverse_transform_samples(samples)
+
+        par_vals = samples[prior.sampled_params].to_numpy()
+        ln_weights = np.fromiter(
+            map(self._ln_importance_weight, par_vals) if pool is None
+            else pool.map(_worker_ln_importance_weight, par_vals),
+            float, len(samples))
+
+        # The proposal weights are relative to a reference density that
+        # is 1 in (mchirp, lnq, cosiota) and uniform in the spin balls:
+        ln_spins_volume = 2 * np.log(4 * np.pi / 3)
+        samples['ln_weight'] = (ln_weights + ln_spins_volume
+                                + np.log(samples[utils.WEIGHTS_NAME]))
+        return samples[prior.sampled_params + ['ln_weight']]
+
+    def _ln_importance_weight(self, par_vals):
+        """
+        Return the log of the probability density at the sampled
+        parameter values `par_vals`, minus the log of the Jacobian
+        determinant of the transformation from sampled parameters to
+        ``_reference_coordinates``.
+        """
+        prior = self.posterior.prior
+        lnprob = self._evaluate(
+            prior.lnprior if self.sample_prior
+            else self.posterior.lnposterior,
+            *par_vals)
+
+        if lnprob == -np.inf:
+            return -np.inf
+
+        # One-sided finite differences, stepping away from the boundary:
+        steps = (self._jacobian_step * prior.cubesize
+                 * np.sign(prior.cubemin + prior.cubesize / 2 - par_vals))
+        reference_0 = self._get_reference_coordinates(par_vals)
+        jacobian = [(self._get_reference_coordinates(par_vals + step)
+                     - reference_0) / step[i]
+                    for i, step in enumerate(np.diag(steps))]
+        return lnprob - np.linalg.slogdet(jacobian)[1]
+
+    def _get_reference_coordinates(self, par_vals):
+        """Map sampled parameter values to ``_reference_coordinates``."""
+        par_dic = self.posterior.prior.transform(*par_vals)
+        par_dic['mchirp'] = gw_utils.m1m2_to_mchirp(par_dic['m1'],
+                                                    par_dic['m2'])
+        par_dic['lnq'] = np.log(par_dic['m2'] / par_dic['m1'])
+        par_dic['cosiota'] = np.cos(par_dic['iota'])
+        return np.array([par_dic[par] for par in self._reference_coordinates])
+
+    def _get_weights(self):
+        ln_weights = self.weighted_samples['ln_weight'].to_numpy()
+        return np.exp(ln_weights - ln_weights.max())
+
+    def load_samples(self):
+        """
+        Return a ``pandas.DataFrame`` with the importance samples and
+        their weights. If they are not in memory, they are read from
+        the directory where the sampler was saved.
+        """
+        if self.weighted_samples is None:
+            self.weighted_samples = self._get_weighted_samples_store().read()
+
+        samples = self.weighted_samples[
+            self.posterior.prior.sampled_params].copy()
+        samples[utils.WEIGHTS_NAME] = self._get_weights()
+        return samples
+
+    def load_evidence(self):
+        if self.weighted_samples is None:
+            self.load_samples()
+
+        ln_weights = self.weighted_samples['ln_weight'].to_numpy()
+        log_ev = scipy.special.logsumexp(ln_weights) - np.log(len(ln_weights))
+        weights = np.exp(ln_weights - log_ev)
+        return {'log_ev': log_ev,
+                'log_ev_std': np.std(weights) / np.sqrt(len(weights))}
+
+    @wraps(utils.JSONMixin.to_json)
+    def to_json(self, dirname, *args, **kwargs):
+        """
+        Update run_kwargs['weighted_samples_dirname'] before saving.
+        Parameters are as in `utils.JSONMixin.to_json()`
+        """
+        self.run_kwargs['weighted_samples_dirname'] = os.path.join(
+            dirname, self.WEIGHTED_SAMPLES_DIRNAME)
+        super().to_json(dirname, *args, **kwargs)
+
+
+class FastSlowMCMC(Sampler):
+    """
+    Sample a posterior or prior with Metropolis-within-Gibbs Markov
+    chains that exploit the waveform cache.
+
+    Each cycle makes one random-walk update of the "slow" sampled
+    parameters, followed by ``run_kwargs['n_fast_steps']`` updates of
+    the "fast" sampled parameters (those that only change
+    ``WaveformGenerator.fast_params``, e.g. distance, phase, time, sky
+    location and polarization), which reuse the cached waveform.
+    The step sizes of each block are adapted during the burn-in to
+    reach an acceptance fraction of ``ACCEPTANCE_TARGET``.
+
+    ``run_kwargs['n_chains']`` independent chains are run, in parallel
+    if ``run_kwargs['n_processes']`` is larger than 1. The chains start
+    near the reference waveform ``likelihood.par_dic_0``.
+    Statistics of acceptance and waveform cache usage per block are
+    saved to ``REPORTS_DIRNAME/STATS_FILENAME`` in the run directory.
+    """
+    DEFAULT_RUN_KWARGS = {'n_chains': 4,
+                          'n_cycles': 2000,
+                          'n_burnin_cycles': 500,
+                          'n_fast_steps': 8,
+                          'thin': 1,
+                          'n_processes': 1,
+                          'seed': 0}
+    CHAINS_FILENAME = 'mcmc_chains.feather'
+    STATS_FILENAME = 'mcmc_stats.json'
+    ACCEPTANCE_TARGET = .25
+
+    @wraps(Sampler.__init__)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        prior = self.posterior.prior
+        waveform_generator = getattr(self.posterior.likelihood,
+                                     'waveform_generator', None)
+        fast_params = prior.get_fast_sampled_params(
+            waveform_generator.fast_params if waveform_generator else [])
+
+        self.blocks = {
+            'slow': [i for i, par in enumerate(prior.sampled_params)
+                     if par not in fast_params],
+            'fast': [i for i, par in enumerate(prior.sampled_params)
+                     if par in fast_params]}
+        self._periodic = np.isin(prior.sampled_params, prior.periodic_params)
+
+        self.chains = None  # Set by ``_run``
+        self.stats = None  # Set by ``_run``
+
+    def _run(self):
+        i_chains = range(self.run_kwargs['n_chains'])
+        with self._pool(self.run_kwargs['n_processes']) as pool, \
+                self._cache_unfoldings():
+            chains, stats = zip(*(
+                map(self._run_chain, i_chains) if pool is None
+                else pool.map(_worker_run_chain, i_chains)))
+
+        self.chains = pd.concat(chains, ignore_index=True)
+        self.stats = {block: {key: sum(chain_stats[block][key]
+                                       for chain_stats in stats)
+                              for key in stats[0][block]}
+                      for block in stats[0]}
+        for block_stats in self.stats.values():
+            n_evaluations = (block_stats['n_slow_evaluations']
+                             + block_stats['n_fast_evaluations'])
+            block_stats['cache_hit_rate'] = (
+                block_stats['n_fast_evaluations'] / n_evaluations
+                if n_evaluations else None)
+
+        if self._rundir is not None:
+            self.chains.to_feather(self.run_kwargs['chains_file'])
+            (self._rundir/REPORTS_DIRNAME).mkdir(exist_ok=True)
+            with open(self._rundir/REPORTS_DIRNAME/self.STATS_FILENAME, 'w',
+                      encoding='utf-8') as stats_file:
+                json.dump(self.stats, stats_file, indent=2)
+
+    @contextlib.contextmanager
+    def _cache_unfoldings(self):
+        """
+        Context manager that makes the waveform generator cache the
+        waveforms of all the unfoldings of a point, so that fast moves
+        reuse them. The generator is shared with the posterior, its
+        previous setting is restored on exit.
+        """
+        waveform_generator = getattr(self.posterior.likelihood,
+                                     'waveform_generator', None)
+        if (waveform_generator is None
+                or waveform_generator.n_cached_waveforms
+                >= len(self._lnprob_cols)):
+            yield
+            return
+
+        n_cached_waveforms = waveform_generator.n_cached_waveforms
+        waveform_generator.n_cached_waveforms = len(self._lnprob_cols)
+        try:
+            yield
+        finally:
+            waveform_generator.n_cached_waveforms = n_cached_waveforms
+
+    def _run_chain(self, i_chain):
+        """
+        Run one Markov chain.
+
+        Return
+        ------
+        chain: pandas.DataFrame
+            Folded samples after burn-in, with columns per
+            ``self.params`` and a 'chain' column.
+
+        stats: dict
+            Keys are block names ('slow', 'fast'), values are dicts
+            with the number of proposals, acceptances and waveform
+            evaluations of the post-burn-in phase.
+        """
+        rng = np.random.default_rng((self.run_kwargs['seed'], i_chain))
+        waveform_generator = getattr(self.posterior.likelihood,
+                                     'waveform_generator', None)
+
+        par_vals = self._get_initial_point(rng)
+        lnprobs = self._get_lnprobs(*par_vals)
+        lnprob = scipy.special.logsumexp(lnprobs)
+
+        blocks = {name: inds for name, inds in self.blocks.items() if inds}
+        scales = dict.fromkeys(blocks, .01)
+        stats = {}
+
+        n_burnin = self.run_kwargs['n_burnin_cycles']
+        samples = []
+        for i_cycle in range(n_burnin + self.run_kwargs['n_cycles']):
+            self._progress = {'chain': i_chain,
+                              'cycle': i_cycle,
+                              'burnin': i_cycle < n_burnin}
+            if i_cycle == n_burnin:
+                stats = {name: dict.fromkeys(['n_proposed', 'n_accepted',
+                                              'n_slow_evaluations',
+                                              'n_fast_evaluations'], 0)
+                         for name in blocks}
+            for name, inds in blocks.items():
+                n_steps = (self.run_kwargs['n_fast_steps']
+                           if name == 'fast' else 1)
+                n_accepted = 0
+                for _ in range(n_steps):
+                    n_slow_0 = getattr(waveform_generator,
+                                       'n_slow_evaluations', 0)
+                    n_fast_0 = getattr(waveform_generator,
+                                       'n_fast_evaluations', 0)
+
+                    proposal = self._propose(par_vals, inds, scales[name],
+                                             rng)
+                    proposal_lnprobs = self._get_lnprobs(*proposal)
+                    proposal_lnprob = scipy.special.logsumexp(
+                        proposal_lnprobs)
+                    if np.log(rng.uniform()) < proposal_lnprob - lnprob:
+                        par_vals = proposal
+                        lnprobs = proposal_lnprobs
+                        lnprob = proposal_lnprob
+                        n_accepted += 1
+
+                    if stats:
+                        stats[name]['n_slow_evaluations'] += getattr(
+                            waveform_generator, 'n_slow_evaluations', 0
+                            ) - n_slow_0
+                        stats[name]['n_fast_evaluations'] += getattr(
+                            waveform_generator, 'n_fast_evaluations', 0
+                            ) - n_fast_0
+
+                if stats:
+                    stats[name]['n_proposed'] += n_steps
+                    stats[name]['n_accepted'] += n_accepted
+                else:
+                    # Burn-in: adapt the step size (Robbins-Monro)
+                    scales[name] *= np.exp(
+                        (n_accepted / n_steps - self.ACCEPTANCE_TARGET)
+                        / np.sqrt(1 + i_cycle))
+
+            if (i_cycle >= n_burnin
+                    and (i_cycle - n_burnin) % self.run_kwargs['thin'] == 0):
+                samples.append(np.concatenate((par_vals, lnprobs)))
+
+        chain = pd.DataFrame(samples, columns=self.params)
+        chain['chain'] = i_chain
+        return chain, stats
+
+    def _get_initial_point(self, rng):
+        """
+        Return array of folded sampled-parameter values close to the
+        reference waveform, or random if it is outside the prior.
+        """
+        prior = self.posterior.prior
+        try:
+            par_vals = prior.fold(**prior.inverse_transform(
+                **{par: self.posterior.likelihood.par_dic_0[par]
+                   for par in prior.standard_params}))
+            par_vals = self._propose(par_vals, np.arange(len(par_vals)),
+                                     1e-3, rng)
+        except (KeyError, AttributeError):
+            par_vals = prior.cubemin + rng.uniform(
+                size=len(prior.cubemin)) * prior.folded_cubesize
+
+        if not np.isfinite(scipy.special.logsumexp(
+                self._get_lnprobs(*par_vals))):
+            par_vals = prior.cubemin + rng.uniform(
+                size=len(prior.cubemin)) * prior.folded_cubesize
+        return par_vals
+
+    def _propose(self, par_vals, inds, scale, rng):
+        """
+        Return a Gaussian random-walk proposal that updates the
+        parameters at `inds`, with standard deviation `scale` in units
+        of the folded parameter ranges. Periodic parameters are wrapped
+        and other parameters are reflected at the folded boundaries, so
+        the proposal is symmetric.
+        """
+        prior = self.posterior.prior
+        normalized = (par_vals - prior.cubemin) / prior.folded_cubesize
+        normalized[inds] += scale * rng.normal(size=len(inds))
+        normalized = np.where(self._periodic,
+                              normalized % 1,
+                              1 - np.abs(1 - normalized % 2))
+        return prior.cubemin + normalized * prior.folded_cubesize
+
+    def load_samples(self):
+        """
+        Collect the chains, resample from them to undo the parameter
+        folding. Return a ``pandas.DataFrame`` with samples.
+        If the chains are not in memory, they are read from the
+        directory where the sampler was saved.
+        """
+        if self.chains is None:
+            self.chains = pd.read_feather(self.run_kwargs['chains_file'])
+        return self.resample(self.chains[self.params])
+
+    @wraps(utils.JSONMixin.to_json)
+    def to_json(self, dirname, *args, **kwargs):
+        """
+        Update run_kwargs['chains_file'] before saving.
+        Parameters are as in `utils.JSONMixin.to_json()`
+        """
+        self.run_kwargs['chains_file'] = os.path.join(dirname,
+                                                      self.CHAINS_FILENAME)
+        super().to_json(dirname, *args, **kwargs)
+
+
 # class Ultranest(Sampler):
 #     """
 #     Sample a posterior using Ultranest.
@@ -468,14 +1463,39 @@ class Dynesty(Sampler):
 #         return self.posterior.lnposterior(*par_vals)
 
 
-def main(sampler_path, postprocess=True):
-    """Load sampler and run it."""
-    rundir = (sampler_path if os.path.isdir(sampler_path)
-              else os.path.dirname(sampler_path))
+def main(sampler_path, postprocess=True, restart=False):
+    """
+    Load sampler and run it.
+    If running with multiple MPI processes, rank 0 broadcasts the
+    resolved path of the json file and every rank loads the sampler
+    from it (broadcasting the sampler would pickle the posterior).
+    Loading does not repeat the expensive setup of relative-binning
+    likelihoods: their summary data and ASD drift are saved as
+    artifacts with the json (see ``utils.JSONMixin.get_artifacts``),
+    which all ranks memory-map. The prior and cheaper parts of the
+    likelihood (e.g. the relative-binning splines) are rebuilt on each
+    rank.
+    Postprocessing is done by rank 0.
+    Samplers that support checkpointing (``Dynesty``) resume from a
+    checkpoint in the run directory saved with the same settings,
+    unless `restart`. So a job that is requeued (e.g. after
+    preemption) with the same command continues where it stopped.
+    """
+    comm = utils.get_mpi_comm()
+    if comm is not None:
+        sampler_path = comm.bcast(pathlib.Path(sampler_path).resolve()
+                                  if comm.Get_rank() == 0 else None)
+
+    if os.path.isdir(sampler_path):
+        sampler_path = os.path.join(sampler_path, Sampler.JSON_FILENAME)
+    rundir = os.path.dirname(sampler_path)
+    sampler = utils.read_json(sampler_path)
+    if comm is not None:
+        comm.Barrier()  # Rank 0 overwrites the json file in ``run``
 
-    utils.read_json(sampler_path).run(rundir)
+    sampler.run(rundir, restart)
 
-    if postprocess:
+    if postprocess and utils.get_mpi_rank() == 0:
         postprocessing.postprocess_rundir(rundir)
 
 
@@ -485,5 +1505,9 @@ if __name__ == '__main__':
                                                 `sampling.Sampler` object.''')
     parser.add_argument('--no_postprocessing', action='store_true',
                         help='''Not postprocess the samples.''')
+    parser.add_argument('--restart', action='store_true',
+                        help='''Discard a checkpoint in the run directory
+                                and start over, instead of resuming.''')
     parser_args = parser.parse_args()
-    main(parser_args.sampler_path, not parser_args.no_postprocessing)
+    main(parser_args.sampler_path, not parser_args.no_postprocessing,
+         parser_args.restart)
@@ -36,21 +36,21 @@ class SkyLocAngles(utils.JSONMixin):
     def radec_to_thetaphinet(self, ra, dec):
         """
         Transform sky location angles from (ra, dec) to
-        (thetanet, phinet).
+        (thetanet, phinet). Vectorized over `ra`, `dec`.
         """
         lon = ra_to_lon(ra, self._gmst)
         xyz = latlon_to_cart3d(dec, lon)
-        ijk = self._rotation_matrix @ xyz
+        ijk = np.einsum('ij,j...->i...', self._rotation_matrix, xyz)
         thetanet, phinet = cart3d_to_thetaphi(ijk)
         return thetanet, phinet
 
     def thetaphinet_to_radec(self, thetanet, phinet):
         """
         Transform sky location angles from (thetanet, phinet)
-        to (ra, dec).
+        to (ra, dec). Vectorized over `thetanet`, `phinet`.
         """
         ijk = thetaphi_to_cart3d(thetanet, phinet)
-        xyz = self._rotation_matrix.T @ ijk
+        xyz = np.einsum('ji,j...->i...', self._rotation_matrix, ijk)
         dec, lon = cart3d_to_latlon(xyz)
         ra = lon_to_ra(lon, self._gmst)
         return ra, dec
@@ -0,0 +1,90 @@
+"""Tests for the benchmark runner `cogwheel.benchmarks.run`."""
+
+from unittest import TestCase, main
+import contextlib
+import io
+import json
+import pathlib
+import tempfile
+
+from cogwheel.benchmarks import run
+
+
+class DummyBenchmark:
+    """Benchmark that counts the calls it gets."""
+    number = 3
+    repeat = 2
+    n_setups = 0
+    n_teardowns = 0
+    n_calls = 0
+
+    def setup(self, value):
+        DummyBenchmark.n_setups += 1
+
+    def teardown(self, value):
+        DummyBenchmark.n_teardowns += 1
+
+    def time_increment(self, value):
+        DummyBenchmark.n_calls += value
+
+
+class RunTestCase(TestCase):
+    """Test discovery, timing and comparison of benchmarks."""
+    def test_discover_benchmarks(self):
+        """Test that benchmarks are discovered and filtered by name."""
+        found = run.discover_benchmarks(
+            r'bench_prior\.CombinedPrior\.time_transform')
+        self.assertEqual(
+            [name for name, *_ in found],
+            [f'bench_prior.CombinedPrior.time_transform({prior_name})'
+             for prior_name in ('IASPrior', 'LVCPrior',
+                                'IntrinsicAlignedSpinIASPrior')])
+        for _, benchmark_class, method_name, params in found:
+            self.assertTrue(callable(getattr(benchmark_class, method_name)))
+            self.assertEqual(len(params), 1)
+
+        self.assertEqual(run.discover_benchmarks('no benchmark is called'),
+                         [])
+
+    def test_time_benchmark(self):
+        """
+        Test that each repetition sets up the benchmark and makes
+        ``number`` calls.
+        """
+        result = run.time_benchmark(DummyBenchmark, 'time_increment', (1,))
+
+        self.assertEqual(result['number'], DummyBenchmark.number)
+        self.assertEqual(result['repeat'], DummyBenchmark.repeat)
+        self.assertLessEqual(result['min'], result['median'])
+        self.assertEqual(DummyBenchmark.n_setups, DummyBenchmark.repeat)
+        self.assertEqual(DummyBenchmark.n_teardowns, DummyBenchmark.repeat)
+        self.assertEqual(DummyBenchmark.n_calls,
+                         DummyBenchmark.repeat * DummyBenchmark.number)
+
+    def test_compare_results(self):
+        """
+        Test that only benchmarks that succeeded in both runs are
+        compared, as ratios of new to old median times.
+        """
+        old = {'a': {'median': 1.}, 'b': {'median': 2.},
+               'c': {'error': 'ValueError()'}, 'd': {'median': 1.}}
+        new = {'a': {'median': 2.}, 'b': {'median': 1.},
+               'c': {'median': 1.}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = [pathlib.Path(tmpdir, f'{label}.json')
+                     for label in ('old', 'new')]
+            for path, results in zip(paths, (old, new)):
+                path.write_text(json.dumps({'results': results}),
+                                encoding='utf-8')
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                ratios = run.compare_results(*paths, threshold=1.5)
+
+        self.assertEqual(ratios, {'a': 2., 'b': .5})
+        self.assertEqual([line[0] for line in output.getvalue().splitlines()],
+                         ['+', '-'])
+
+
+if __name__ == '__main__':
+    main()
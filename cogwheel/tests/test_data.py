@@ -0,0 +1,168 @@
+"""Tests for `EventData`."""
+
+from unittest import TestCase, main, mock
+import pathlib
+import tempfile
+import numpy as np
+import gwpy.timeseries
+
+from cogwheel import data
+
+TGPS = 1e9
+FROM_TIMESERIES_KWARGS = {'eventname': 'test',
+                          'detector_names': 'HL',
+                          'tgps': TGPS,
+                          't_before': 4.,
+                          't_after': 4.,
+                          'wht_filter_duration': 4.,
+                          'fmax': 256.}
+
+
+class FromTimeseriesTestCase(TestCase):
+    """Test ``EventData.from_timeseries`` on synthetic data files."""
+    @classmethod
+    def setUpClass(cls):
+        """Write a file with white noise for each detector."""
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        cls.filenames = []
+        for detector_name in FROM_TIMESERIES_KWARGS['detector_names']:
+            timeseries = gwpy.timeseries.TimeSeries(
+                1e-21 * rng.normal(size=64 * 1024), t0=TGPS - 32.,
+                sample_rate=1024, name=f'{detector_name}1:STRAIN')
+            filename = pathlib.Path(cls._tmpdir.name, f'{detector_name}.hdf5')
+            timeseries.write(filename, path='strain')
+            cls.filenames.append(filename)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        data._measured_asd_cache.clear()
+
+    def _from_timeseries(self, **kwargs):
+        return data.EventData.from_timeseries(
+            self.filenames, **FROM_TIMESERIES_KWARGS | kwargs)
+
+    def test_gwpy_asd(self):
+        """
+        Test that the whitening filter and strain match those obtained
+        with the ASD measured by ``gwpy``.
+        """
+        segment_duration = (FROM_TIMESERIES_KWARGS['wht_filter_duration']
+                            + FROM_TIMESERIES_KWARGS['t_before']
+                            + FROM_TIMESERIES_KWARGS['t_after'])
+
+        def measure_asd_gwpy(timeseries, wht_filter_duration, fmax,
+                             asd_key=None):
+            asd = timeseries.asd(wht_filter_duration,
+                                 overlap=wht_filter_duration / 2,
+                                 method='median', window='hann'
+                                 ).interpolate(1 / segment_duration)
+            return asd.frequencies.value, asd.value
+
+        event_data = self._from_timeseries()
+        with mock.patch.object(data.EventData, '_measure_asd',
+                               measure_asd_gwpy):
+            reference = self._from_timeseries()
+
+        for attr in 'frequencies', 'strain', 'wht_filter':
+            with self.subTest(attr):
+                np.testing.assert_allclose(
+                    getattr(event_data, attr), getattr(reference, attr),
+                    rtol=1e-10,
+                    atol=1e-10 * np.max(np.abs(getattr(reference, attr))))
+
+    def test_n_workers(self):
+        """Test that results do not depend on the number of threads."""
+        event_data = self._from_timeseries(n_workers=1)
+        threaded = self._from_timeseries(n_workers=4)
+
+        for attr in 'frequencies', 'strain', 'wht_filter':
+            with self.subTest(attr):
+                np.testing.assert_array_equal(getattr(threaded, attr),
+                                              getattr(event_data, attr))
+        self.assertEqual(threaded.tcoarse, event_data.tcoarse)
+
+    def test_asd_cache(self):
+        """
+        Test that changing `fmin` reuses the ASDs measured in the first
+        call, and that the result is as if measured again.
+        """
+        n_detectors = len(self.filenames)
+        with mock.patch.object(data.signal, 'welch',
+                               wraps=data.signal.welch) as welch:
+            event_data = self._from_timeseries(fmin=20.)
+            self.assertEqual(welch.call_count, n_detectors)
+
+            other_fmin = self._from_timeseries(fmin=30.)
+            self.assertEqual(welch.call_count, n_detectors)
+
+        np.testing.assert_array_equal(other_fmin.strain, event_data.strain)
+        self.assertGreater(other_fmin.fbounds[0], event_data.fbounds[0])
+
+        data._measured_asd_cache.clear()
+        np.testing.assert_array_equal(
+            self._from_timeseries(fmin=30.).wht_filter, other_fmin.wht_filter)
+
+
+class NpyDirTestCase(TestCase):
+    """Test saving ``EventData`` as a directory of ``.npy`` files."""
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dirname = pathlib.Path(tmpdir.name)/'event_data'
+        self.event_data = data.EventData.gaussian_noise(
+            eventname='test', duration=4, detector_names='HL',
+            asd_funcs=['asd_H_O3', 'asd_L_O3'], tgps=0., seed=0)
+
+    def test_round_trip(self):
+        """
+        Test that the loaded arrays are read-only memory maps equal to
+        the saved ones, and that the metadata are preserved.
+        """
+        self.event_data.to_npy_dir(self.dirname, dir_permissions=0o750,
+                                   file_permissions=0o640)
+        loaded = data.EventData.from_npy_dir(self.dirname)
+
+        self.assertEqual(self.dirname.stat().st_mode & 0o777, 0o750)
+        for attr in data.EventData._ARRAY_KEYS + ('blued_strain',):
+            with self.subTest(attr):
+                array = getattr(loaded, attr)
+                self.assertIsInstance(array, np.memmap)
+                self.assertFalse(array.flags.writeable)
+                np.testing.assert_array_equal(
+                    array, getattr(self.event_data, attr))
+                self.assertEqual(
+                    (self.dirname/f'{attr}.npy').stat().st_mode & 0o777,
+                    0o640)
+
+        for attr in 'eventname', 'detector_names', 'tgps', 'tcoarse':
+            self.assertEqual(getattr(loaded, attr),
+                             getattr(self.event_data, attr))
+        self.assertEqual(loaded.get_content_hash(),
+                         self.event_data.get_content_hash())
+
+        with self.assertRaises(FileExistsError):
+            self.event_data.to_npy_dir(self.dirname)
+
+    def test_content_hash(self):
+        """
+        Test that the content hash is stable and changes with the
+        strain.
+        """
+        content_hash = self.event_data.get_content_hash()
+        self.assertEqual(data.EventData(**self.event_data.get_init_dict()
+                                        ).get_content_hash(),
+                         content_hash)
+
+        strain = self.event_data.strain.copy()
+        strain[0, self.event_data.fslice.start] *= 2
+        self.event_data._set_strain(strain)
+        self.assertNotEqual(self.event_data.get_content_hash(),
+                            content_hash)
+
+
+if __name__ == '__main__':
+    main()
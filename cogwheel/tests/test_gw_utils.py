@@ -2,8 +2,10 @@
 
 from unittest import TestCase, main
 import numpy as np
+import lal
 
-from cogwheel.gw_utils import fplus_fcross, DETECTORS
+from cogwheel.gw_utils import (fplus_fcross, time_delay_from_geocenter,
+                               get_fplus_fcross, get_time_delays, DETECTORS)
 
 
 class PolarizationTestCase(TestCase):
@@ -34,5 +36,35 @@ class PolarizationTestCase(TestCase):
         np.testing.assert_allclose(fp_fc, psi_rotation @ fp0_fc0)
 
 
+class VectorizedTestCase(TestCase):
+    """
+    Test that the vectorized antenna patterns and time delays agree
+    with their scalar LAL counterparts.
+    """
+    @staticmethod
+    def test_vectorized():
+        """Compare on an array of random sky locations."""
+        detector_names = tuple(DETECTORS)
+        n_samples = 10
+        ra = np.random.uniform(0, 2*np.pi, n_samples)
+        dec = np.arcsin(np.random.uniform(-1, 1, n_samples))
+        psi = np.random.uniform(0, np.pi, n_samples)
+        tgps = np.random.uniform(1e9)
+        gmst = lal.GreenwichMeanSiderealTime(tgps)
+
+        np.testing.assert_allclose(
+            get_fplus_fcross(detector_names, ra, dec, psi, gmst),
+            [fplus_fcross(detector_names, *args, tgps)
+             for args in zip(ra, dec, psi)],
+            atol=1e-12)
+
+        np.testing.assert_allclose(
+            get_time_delays(detector_names, ra, dec, gmst),
+            np.transpose([time_delay_from_geocenter(detector_names, *args,
+                                                    tgps)
+                          for args in zip(ra, dec)]),
+            atol=1e-12)
+
+
 if __name__ == '__main__':
     main()
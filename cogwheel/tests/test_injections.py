@@ -0,0 +1,52 @@
+"""Tests for the `injections` module."""
+
+import tempfile
+from unittest import TestCase, main
+import numpy as np
+import pandas as pd
+
+from cogwheel import data
+from cogwheel.injections import InjectionCampaign
+
+from .test_waveform import get_random_par_dic
+
+
+class InjectionCampaignTestCase(TestCase):
+    """
+    Generate a small campaign and check that its events match
+    ``EventData.gaussian_noise`` followed by ``inject_signal``.
+    """
+    def test_matches_event_data(self):
+        """Compare campaign events against individual injections."""
+        approximant = 'IMRPhenomXAS'
+        kwargs = dict(duration=4, detector_names='HL',
+                      asd_funcs=['asd_H_O3', 'asd_L_O3'], tgps=0.,
+                      fmax=512.)
+        injections = pd.DataFrame([get_random_par_dic(aligned_spins=True)
+                                   for _ in range(3)])
+        seed = 1
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            campaign = InjectionCampaign.generate(
+                f'{tmpdir}/campaign', injections, approximant, seed=seed,
+                batch_size=2, **kwargs)
+            self.assertEqual(len(campaign), len(injections))
+
+            seeds = np.random.SeedSequence(seed).spawn(len(injections))
+            for i, event_data in enumerate(campaign):
+                expected = data.EventData.gaussian_noise(
+                    eventname=f'injection_{i}', seed=seeds[i], **kwargs)
+                expected.inject_signal(injections.iloc[i].to_dict(),
+                                       approximant)
+
+                np.testing.assert_allclose(event_data.strain, expected.strain)
+                np.testing.assert_allclose(event_data.wht_filter,
+                                           expected.wht_filter)
+                np.testing.assert_allclose(event_data.injection['h_h'],
+                                           expected.injection['h_h'])
+                self.assertEqual(event_data.injection['par_dic'],
+                                 expected.injection['par_dic'])
+
+
+if __name__ == '__main__':
+    main()
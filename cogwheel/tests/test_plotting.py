@@ -0,0 +1,48 @@
+"""Tests for the `plotting` module."""
+
+from unittest import TestCase, main
+import numpy as np
+import pandas as pd
+
+from cogwheel.plotting import BinnedSamples
+
+
+class BinnedSamplesTestCase(TestCase):
+    """
+    Test that histograms from ``BinnedSamples`` agree with those of
+    ``np.histogram`` and ``np.histogram2d``.
+    """
+    def test_histograms(self):
+        """Compare 1-d and 2-d histograms, with and without weights."""
+        samples = pd.DataFrame(np.random.normal(size=(1000, 3)),
+                               columns=['a', 'b', 'c'])
+        weights = np.random.uniform(size=len(samples))
+
+        for bins, weights in [(None, None),
+                              (None, weights),
+                              (np.linspace(-1, 1, 7), weights)]:
+            with self.subTest(bins=bins, weights=weights):
+                binned_samples = BinnedSamples(samples, bins, weights)
+                edges = binned_samples.bin_edges
+
+                for par, values in samples.items():
+                    histogram, _ = np.histogram(values, edges[par],
+                                                weights=weights,
+                                                density=True)
+                    np.testing.assert_allclose(
+                        binned_samples.get_histogram_1d(par), histogram)
+
+                histogram_2d, _, _ = np.histogram2d(
+                    samples['a'], samples['c'], (edges['a'], edges['c']),
+                    weights=weights)
+                np.testing.assert_allclose(
+                    binned_samples.get_histogram_2d('a', 'c'), histogram_2d)
+
+                subset = binned_samples[['c', 'a']]
+                self.assertEqual(subset.params, ['c', 'a'])
+                np.testing.assert_allclose(
+                    subset.get_histogram_2d('c', 'a'), histogram_2d.T)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,16 @@
 """Make likelihood objects (with injections) and test them."""
 
-from unittest import TestCase, main
+from unittest import TestCase, main, mock
 import inspect
+import pathlib
+import shutil
+import tempfile
+import numpy as np
 
 from cogwheel import data
 from cogwheel import gw_prior
 from cogwheel import likelihood
+from cogwheel import utils
 from cogwheel import waveform
 from cogwheel.posterior import Posterior
 
@@ -76,6 +81,66 @@ class PosteriorTestCase(TestCase):
             with self.subTest(like):
                 self.assertIsInstance(like.lnlike(self.par_dic_0), float)
 
+    def test_likelihood_json(self):
+        """
+        Test that likelihoods loaded from json using the artifact store
+        reproduce the ``.lnlike()`` of likelihoods recomputed from the
+        json, and can be edited in place.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_dir = pathlib.Path(tmpdir)/'store'
+            for like in self.likelihoods:
+                with self.subTest(like):
+                    rundir = pathlib.Path(tmpdir)/like.__class__.__name__
+                    like.to_json(rundir, store_dir=store_dir)
+                    loaded = utils.read_json(rundir)
+
+                    edited = utils.read_json(rundir)
+                    edited.asd_drift *= 2  # Copy-on-write
+                    np.testing.assert_array_equal(edited.asd_drift,
+                                                  2 * loaded.asd_drift)
+
+                    shutil.rmtree(store_dir/utils.ARTIFACT_STORE_DIRNAME)
+                    recomputed = utils.read_json(rundir)
+                    np.testing.assert_equal(
+                        loaded.lnlike(self.par_dic_0),
+                        recomputed.lnlike(self.par_dic_0))
+
+    def test_json_stores(self):
+        """
+        Test that by default a json file keeps its stores in its own
+        directory, which can then be moved, and that json files share
+        the stores in ``utils.STORE_DIR`` if it is set.
+        """
+        like = next(like for like in self.likelihoods
+                    if type(like) is likelihood.RelativeBinningLikelihood)
+
+        def assert_loads(dirname):
+            loaded = utils.read_json(dirname)
+            np.testing.assert_array_equal(loaded.event_data.strain,
+                                          like.event_data.strain)
+            np.testing.assert_array_equal(loaded._d_h_weights,
+                                          like._d_h_weights)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            like.to_json(tmpdir/'event')
+            self.assertEqual(list(tmpdir.iterdir()), [tmpdir/'event'])
+            (tmpdir/'event').rename(tmpdir/'moved')
+            assert_loads(tmpdir/'moved')
+
+            store_dir = tmpdir/'store'
+            with mock.patch.object(utils, 'STORE_DIR', str(store_dir)):
+                like.to_json(tmpdir/'event')
+                like.to_json(tmpdir/'event'/'run_0')
+            self.assertEqual({path.name for path in tmpdir.iterdir()},
+                             {'event', 'moved', 'store'})
+            self.assertEqual(
+                {path.name for path in (tmpdir/'event').iterdir()},
+                {'RelativeBinningLikelihood.json', 'run_0'})
+            self.assertEqual(len(list(
+                (store_dir/utils.EVENT_DATA_STORE_DIRNAME).iterdir())), 1)
+            assert_loads(tmpdir/'event'/'run_0')
 
     def test_posterior(self):
         """
@@ -0,0 +1,188 @@
+"""Postprocess the output of a short sampler run and test it."""
+
+from unittest import TestCase, main, mock
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import numpy as np
+
+from cogwheel import postprocessing
+from cogwheel import sampling
+from cogwheel import utils
+
+from .test_sampling import DYNESTY_RUN_KWARGS, get_posterior
+
+
+class PostProcessorTestCase(TestCase):
+    """Test ``PostProcessor`` on the samples of a ``Dynesty`` run."""
+    @classmethod
+    def setUpClass(cls):
+        """Run the sampler once, tests postprocess copies of the run."""
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        cls.sampled_eventdir = pathlib.Path(cls._tmpdir.name)/'event'
+        sampling.Dynesty(get_posterior(), DYNESTY_RUN_KWARGS).run(
+            cls.sampled_eventdir/'run')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        # The event directory also holds artifacts the run refers to:
+        eventdir = pathlib.Path(tmpdir.name)/'event'
+        shutil.copytree(self.sampled_eventdir, eventdir)
+        self.rundir = eventdir/'run'
+
+    def test_concentrated_weights(self):
+        """
+        Test that the ASD-drift test works with weighted samples that
+        are dominated by a few.
+        """
+        weights = sampling.read_samples(self.rundir)[utils.WEIGHTS_NAME]
+        self.assertGreater(256 * weights.max() / weights.sum(), 1)
+
+        postprocessing.postprocess_rundir(self.rundir)
+
+        with open(self.rundir/postprocessing.TESTS_FILENAME,
+                  encoding='utf-8') as tests_file:
+            tests = json.load(tests_file)
+        self.assertTrue(tests['asd_drift'])
+
+    def test_parallel(self):
+        """
+        Test that the likelihood computed in parallel chunks matches the
+        serial computation, and that batched evaluations match
+        per-sample ones.
+        """
+        processors = {}
+        for n_processes in (1, 2):
+            processor = postprocessing.PostProcessor(
+                self.rundir, n_processes=n_processes, chunk_size=16)
+            processor.add_standard_params()
+            processor.compute_lnl()
+            processor.compute_lnl_aux()
+            processor.clear_checkpoints()
+            processors[n_processes] = processor
+
+        samples = processors[1].samples
+        self.assertGreater(len(samples), 2 * 16)
+        columns = ([postprocessing.PostProcessor.LNL_COL]
+                   + processors[1]._lnl_aux_cols)
+        np.testing.assert_allclose(processors[2].samples[columns],
+                                   samples[columns], rtol=1e-10)
+
+        likelihood = processors[1].posterior.likelihood
+        lnlike = getattr(likelihood, 'lnlike_no_marginalization',
+                         likelihood.lnlike)
+        par_dics = list(postprocessing.PostProcessor._iter_dicts(
+            samples[likelihood.waveform_generator.params]))
+        np.testing.assert_allclose(
+            samples[postprocessing.PostProcessor.LNL_COL],
+            list(map(lnlike, par_dics)), rtol=1e-8)
+        np.testing.assert_allclose(
+            samples[processors[1]._lnl_aux_cols],
+            list(map(processors[1]._boosted_likelihood
+                     .lnlike_detectors_no_asd_drift, par_dics)),
+            rtol=1e-8)
+
+    def test_aux_override(self):
+        """
+        Test that likelihoods overriding ``lnlike_detectors_no_asd_drift``
+        are not evaluated with the batched relative-binning method.
+        """
+        likelihood = utils.read_json(
+            self.rundir/sampling.Sampler.JSON_FILENAME).posterior.likelihood
+        samples = sampling.read_samples(self.rundir)[
+            likelihood.waveform_generator.params].iloc[:4]
+
+        class Override(type(likelihood)):
+            def lnlike_detectors_no_asd_drift(self, par_dic):
+                raise NotImplementedError
+
+        compute_lnl_aux_chunk \
+            = postprocessing.PostProcessor._compute_lnl_aux_chunk
+        self.assertEqual(compute_lnl_aux_chunk(likelihood, samples).shape,
+                         (4, len(likelihood.event_data.detector_names)))
+
+        likelihood.__class__ = Override
+        with self.assertRaises(NotImplementedError):
+            compute_lnl_aux_chunk(likelihood, samples)
+
+    def test_resume(self):
+        """
+        Test that an interrupted likelihood computation is resumed from
+        the chunks that were completed.
+        """
+        compute_lnl_chunk = postprocessing.PostProcessor._compute_lnl_chunk
+        n_calls = 0
+
+        def _compute_lnl_chunk(likelihood, samples):
+            nonlocal n_calls
+            n_calls += 1
+            if n_calls > 1:
+                raise KeyboardInterrupt
+            return compute_lnl_chunk(likelihood, samples)
+
+        processor = postprocessing.PostProcessor(self.rundir, chunk_size=16)
+        processor.add_standard_params()
+        with mock.patch.object(postprocessing.PostProcessor,
+                               '_compute_lnl_chunk',
+                               staticmethod(_compute_lnl_chunk)), \
+                self.assertRaises(KeyboardInterrupt):
+            processor.compute_lnl()
+        self.assertEqual(len(list(processor.checkpoint_dir.glob('lnl_*'))),
+                         1)
+
+        processor = postprocessing.PostProcessor(self.rundir, chunk_size=16)
+        processor.add_standard_params()
+        with mock.patch.object(postprocessing.PostProcessor,
+                               '_compute_lnl_chunk',
+                               side_effect=compute_lnl_chunk
+                               ) as compute_lnl_chunk_mock:
+            processor.compute_lnl()
+        n_chunks = -(-len(processor.samples) // 16)
+        self.assertGreater(n_chunks, 2)
+        self.assertEqual(compute_lnl_chunk_mock.call_count, n_chunks - 1)
+
+        likelihood = processor.posterior.likelihood
+        np.testing.assert_allclose(
+            processor.samples[postprocessing.PostProcessor.LNL_COL],
+            compute_lnl_chunk(likelihood, processor.samples[
+                likelihood.waveform_generator.params]),
+            rtol=1e-10)
+
+    def test_summary_cache(self):
+        """
+        Test that the diagnostics summary of a run is cached, and
+        recomputed when the files it derives from change.
+        """
+        postprocessing.postprocess_rundir(self.rundir)
+        diagnostics = postprocessing.Diagnostics
+        summary = diagnostics.get_summary(self.rundir)
+
+        with mock.patch.object(diagnostics, '_get_n_effective',
+                               wraps=diagnostics._get_n_effective
+                               ) as get_n_effective:
+            self.assertEqual(diagnostics.get_summary(self.rundir)['tests'],
+                             summary['tests'])
+            get_n_effective.assert_not_called()
+
+            tests_path = self.rundir/postprocessing.TESTS_FILENAME
+            tests = json.loads(tests_path.read_text(encoding='utf-8'))
+            tests['lnl_max'] += 1
+            tests_path.write_text(json.dumps(tests), encoding='utf-8')
+            mtime = tests_path.stat().st_mtime_ns + 10**9
+            os.utime(tests_path, ns=(mtime, mtime))
+
+            updated = diagnostics.get_summary(self.rundir)
+            get_n_effective.assert_called_once()
+        self.assertEqual(updated['tests']['lnl_max'],
+                         summary['tests']['lnl_max'] + 1)
+
+
+if __name__ == '__main__':
+    main()
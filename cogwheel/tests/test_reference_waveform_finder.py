@@ -0,0 +1,126 @@
+"""Tests for `ReferenceWaveformFinder` and its `TemplateBank`."""
+
+from unittest import TestCase, main, mock
+import pathlib
+import tempfile
+import numpy as np
+
+from cogwheel import data
+from cogwheel import waveform
+from cogwheel.likelihood import ReferenceWaveformFinder
+from cogwheel.likelihood import template_bank
+
+PAR_DIC_0 = {'m1': 30., 'm2': 25., 's1z': .1, 's2z': -.1,
+             's1x_n': 0., 's1y_n': 0., 's2x_n': 0., 's2y_n': 0.,
+             'l1': 0., 'l2': 0., 'iota': .5, 'ra': 1., 'dec': .3, 'psi': .4,
+             'phi_ref': .2, 't_geocenter': 0., 'd_luminosity': 800.,
+             'f_ref': 50.}
+
+
+class ReferenceWaveformFinderTestCase(TestCase):
+    """
+    Test that the vectorized likelihood evaluations of
+    ``ReferenceWaveformFinder`` match the scalar ones.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """Instantiate a ``ReferenceWaveformFinder`` at an injection."""
+        event_data = data.EventData.gaussian_noise(
+            eventname='test', duration=8, detector_names='HLV',
+            asd_funcs=['asd_H_O3', 'asd_L_O3', 'asd_V_O3'], tgps=0., seed=0)
+        event_data.inject_signal(PAR_DIC_0, 'IMRPhenomXAS')
+
+        cls.reference_waveform_finder = ReferenceWaveformFinder(
+            event_data=event_data,
+            waveform_generator=waveform.WaveformGenerator.from_event_data(
+                event_data, 'IMRPhenomXAS'),
+            par_dic_0=PAR_DIC_0, pn_phase_tol=.05)
+
+    def test_lnlike_max_amp_phase_skyloc(self):
+        """
+        Test that ``lnlike_max_amp_phase_skyloc`` matches
+        ``lnlike_max_amp_phase`` on a grid of sky locations and times.
+        """
+        rwf = self.reference_waveform_finder
+        ra, dec, t_geocenter = np.meshgrid(np.linspace(0, 2*np.pi, 4),
+                                           np.linspace(-1.5, 1.5, 3),
+                                           [-.01, 0., .01], indexing='ij')
+
+        lnl = rwf.lnlike_max_amp_phase_skyloc(ra, dec, t_geocenter)
+
+        self.assertEqual(lnl.shape, ra.shape)
+        np.testing.assert_allclose(
+            lnl,
+            np.vectorize(lambda *vals: rwf.lnlike_max_amp_phase(
+                rwf.par_dic_0 | dict(zip(['ra', 'dec', 't_geocenter'],
+                                         vals))))(ra, dec, t_geocenter),
+            rtol=1e-8)
+
+    def test_lnlike_incoherent_templates(self):
+        """
+        Test that ``_lnlike_incoherent_templates`` matches
+        ``lnlike_max_amp_phase_time`` for templates of a bank.
+        """
+        rwf = self.reference_waveform_finder
+        intrinsic = np.array([[20., .24, 0.], [23., .2, .3], [26., .25, -.2]])
+        hplus_hcross = np.array([
+            template_bank.TemplateBank._get_hplus_hcross(
+                rwf.waveform_generator, rwf.fbin, mchirp_eta_chieff)
+            for mchirp_eta_chieff in intrinsic])
+
+        np.testing.assert_allclose(
+            rwf._lnlike_incoherent_templates(hplus_hcross, chunk_size=2),
+            [rwf.lnlike_max_amp_phase_time(
+                rwf._updated_intrinsic(*mchirp_eta_chieff)
+                | template_bank.TemplateBank.FIXED_PAR_DIC)
+             for mchirp_eta_chieff in intrinsic],
+            rtol=1e-8)
+
+
+class TemplateBankTestCase(TestCase):
+    """Test that ``TemplateBank`` is generated once and reused."""
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patcher = mock.patch.object(template_bank, 'TEMPLATE_BANKS_DIR',
+                                    pathlib.Path(tmpdir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get(self):
+        """
+        Test that a bank is generated on the first call only, and that
+        templates with different settings get a different bank.
+        """
+        waveform_generator = waveform.WaveformGenerator(
+            'HL', tgps=0., tcoarse=4., approximant='IMRPhenomXAS')
+        kwargs = {'waveform_generator': waveform_generator,
+                  'fbin': np.geomspace(20., 512., 32),
+                  'mchirp_range': (20., 30.),
+                  'eta_range': (.2, .25),
+                  'chieff_range': (-.5, .5),
+                  'n_templates': 2**4}
+
+        with mock.patch.object(template_bank.TemplateBank, '_generate',
+                               wraps=template_bank.TemplateBank._generate
+                               ) as generate:
+            bank = template_bank.TemplateBank.get(**kwargs)
+            reloaded = template_bank.TemplateBank.get(**kwargs)
+            generate.assert_called_once()
+
+            other = template_bank.TemplateBank.get(
+                **kwargs | {'chieff_range': (-.9, .9)})
+            self.assertEqual(generate.call_count, 2)
+
+        self.assertEqual(reloaded.path, bank.path)
+        self.assertNotEqual(other.path, bank.path)
+        self.assertEqual(bank.hplus_hcross.shape,
+                         (2**4, 1, 2, len(kwargs['fbin'])))
+        np.testing.assert_array_equal(reloaded.hplus_hcross,
+                                      bank.hplus_hcross)
+        mchirp = bank.intrinsic[:, 0]
+        self.assertTrue(np.all((mchirp >= 16.) & (mchirp <= 32.)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Tests for the summary data of `RelativeBinningLikelihood`."""
+
+from unittest import TestCase, main, mock
+import numpy as np
+
+from cogwheel import data
+from cogwheel import gw_utils
+from cogwheel import waveform
+from cogwheel.likelihood import RelativeBinningLikelihood
+
+PAR_DIC_0 = {'m1': 5., 'm2': 4., 's1z': .1, 's2z': -.1,
+             's1x_n': 0., 's1y_n': 0., 's2x_n': 0., 's2y_n': 0.,
+             'l1': 0., 'l2': 0., 'iota': .5, 'ra': 1., 'dec': .3, 'psi': .4,
+             'phi_ref': .2, 't_geocenter': 0., 'd_luminosity': 200.,
+             'f_ref': 50.}
+
+
+class RelativeBinningLikelihoodTestCase(TestCase):
+    """
+    Test that the ways of computing the summary data of
+    ``RelativeBinningLikelihood`` agree, on a long low-mass signal.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """Instantiate a ``RelativeBinningLikelihood`` at an injection."""
+        event_data = data.EventData.gaussian_noise(
+            eventname='test', duration=64, detector_names='HL',
+            asd_funcs=['asd_H_O3', 'asd_L_O3'], tgps=0., fmin=20., seed=0)
+        event_data.inject_signal(PAR_DIC_0, 'IMRPhenomXAS')
+
+        cls.likelihood_kwargs = {
+            'event_data': event_data,
+            'waveform_generator': waveform.WaveformGenerator.from_event_data(
+                event_data, 'IMRPhenomXAS'),
+            'par_dic_0': PAR_DIC_0,
+            'pn_phase_tol': .05}
+        cls.likelihood = RelativeBinningLikelihood(**cls.likelihood_kwargs)
+
+    def test_summary_bands(self):
+        """
+        Test that the summary data do not depend on the size of the
+        bands they are accumulated over.
+        """
+        n_bands = len(self.likelihood._get_summary_bands())
+        with mock.patch.object(RelativeBinningLikelihood,
+                               'SUMMARY_BAND_SIZE', 2**10):
+            banded = RelativeBinningLikelihood(**self.likelihood_kwargs)
+            self.assertGreater(len(banded._get_summary_bands()), n_bands)
+
+        for attr in '_d_h_weights', '_h_h_weights':
+            with self.subTest(attr):
+                np.testing.assert_allclose(getattr(banded, attr),
+                                           getattr(self.likelihood, attr),
+                                           rtol=1e-10)
+
+    def test_multiband(self):
+        """
+        Test that a reference waveform generated on a multibanded grid
+        gives the same summary data as on the full grid.
+        """
+        multibanded = RelativeBinningLikelihood(
+            **self.likelihood_kwargs, multiband_phase_tol=.01)
+
+        event_data = self.likelihood.event_data
+        inds = event_data.get_multiband_inds(
+            lambda f: gw_utils.time_to_merger(
+                f, gw_utils.m1m2_to_mchirp(PAR_DIC_0['m1'], PAR_DIC_0['m2'])),
+            multibanded.multiband_phase_tol)
+        self.assertLess(len(inds), len(event_data.frequencies[
+            event_data.fslice]) / 2)
+
+        np.testing.assert_allclose(
+            multibanded._h0_f, self.likelihood._h0_f,
+            atol=1e-4 * np.max(np.abs(self.likelihood._h0_f)))
+
+        par_dic = PAR_DIC_0 | {'m1': 5.01, 'psi': .5, 'd_luminosity': 210.}
+        self.assertAlmostEqual(multibanded.lnlike(par_dic),
+                               self.likelihood.lnlike(par_dic), delta=1e-3)
+
+    def test_interpolate_multiband(self):
+        """
+        Test that the interpolation from a multibanded grid is exact
+        for cubic polynomials.
+        """
+        inds = np.concatenate([np.arange(0, 64, 1), np.arange(64, 256, 8),
+                               np.arange(256, 1025, 64)])
+        fine_inds = np.arange(inds[-1] + 1)
+        coefficients = np.array([[1., -2., .5, 3.], [0., 1j, 2., -1j]])
+
+        def cubic(x):
+            return np.polynomial.polynomial.polyval(x / inds[-1],
+                                                    coefficients.T)
+
+        np.testing.assert_allclose(
+            RelativeBinningLikelihood._interpolate_multiband(
+                inds, cubic(inds), fine_inds),
+            cubic(fine_inds), atol=1e-10)
+
+
+if __name__ == '__main__':
+    main()
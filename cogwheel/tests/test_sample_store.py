@@ -0,0 +1,55 @@
+"""Tests for the `sample_store` module."""
+
+import tempfile
+from unittest import TestCase, main
+import numpy as np
+import pandas as pd
+
+from cogwheel import utils
+from cogwheel.sample_store import SampleStore
+
+
+class SampleStoreTestCase(TestCase):
+    """
+    Append chunks of samples and update columns, and check that the
+    store reads back the same as an equivalent in-memory DataFrame.
+    """
+    def test_append_and_write_columns(self):
+        """Compare store contents against a DataFrame."""
+        rng = np.random.default_rng(0)
+        chunks = [pd.DataFrame({'x': rng.normal(size=n_rows),
+                                utils.WEIGHTS_NAME: rng.uniform(size=n_rows)})
+                  for n_rows in (10, 5, 7)]
+        samples = pd.concat(chunks, ignore_index=True)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SampleStore(tmpdir)
+            for chunk in chunks:
+                store.append(chunk)
+
+            # Update a column only in some rows, and add a new column
+            rows = np.zeros(len(samples), bool)
+            rows[12] = True
+            samples.loc[rows, 'x'] = 0.
+            samples['y'] = 2 * samples['x']
+            store.write_columns(samples[['x']], rows)
+            store.write_columns(samples[['y']])
+
+            reloaded = SampleStore(tmpdir)
+            self.assertEqual(reloaded.n_samples, len(samples))
+            self.assertEqual(reloaded.columns, list(samples.columns))
+            pd.testing.assert_frame_equal(reloaded.read(), samples)
+            pd.testing.assert_frame_equal(reloaded.read(['y', 'x']),
+                                          samples[['y', 'x']])
+            self.assertAlmostEqual(
+                reloaded.n_effective(),
+                utils.n_effective(samples[utils.WEIGHTS_NAME]))
+
+            # Only the chunk with `rows` got a new file for 'x':
+            self.assertEqual([len(chunk['files'])
+                              for chunk in reloaded.metadata['chunks']],
+                             [2, 3, 2])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""Run samplers on a short injection and test their output."""
+
+from unittest import TestCase, main, mock
+import json
+import os
+import pathlib
+import tempfile
+import numpy as np
+import dynesty
+
+from cogwheel import data
+from cogwheel import gw_prior
+from cogwheel import likelihood
+from cogwheel import sampling
+from cogwheel import utils
+from cogwheel import waveform
+from cogwheel.posterior import Posterior
+
+PAR_DIC_0 = {'m1': 30., 'm2': 25., 's1z': .1, 's2z': -.1,
+             's1x_n': 0., 's1y_n': 0., 's2x_n': 0., 's2y_n': 0.,
+             'l1': 0., 'l2': 0., 'iota': .5, 'ra': 1., 'dec': .3, 'psi': .4,
+             'phi_ref': .2, 't_geocenter': 0., 'd_luminosity': 800.,
+             'f_ref': 50.}
+
+DYNESTY_RUN_KWARGS = {'nlive_init': 20,
+                      'maxiter': 40,
+                      'print_progress': False,
+                      'checkpoint_every': None}
+
+
+def get_posterior(prior_class=gw_prior.AlignedSpinIASPrior,
+                  approximant='IMRPhenomXAS'):
+    """Return a ``Posterior`` for an injection in Gaussian noise."""
+    event_data = data.EventData.gaussian_noise(
+        eventname='test', duration=4, detector_names='HL',
+        asd_funcs=['asd_H_O3', 'asd_L_O3'], tgps=0., seed=0)
+    event_data.inject_signal(PAR_DIC_0, approximant)
+
+    waveform_generator = waveform.WaveformGenerator.from_event_data(
+        event_data, approximant)
+    rwf = likelihood.ReferenceWaveformFinder(
+        event_data=event_data, waveform_generator=waveform_generator,
+        par_dic_0=PAR_DIC_0, pn_phase_tol=.05)
+    return Posterior(
+        prior_class.from_reference_waveform_finder(rwf),
+        prior_class.default_likelihood_class.from_reference_waveform_finder(
+            rwf, approximant))
+
+
+class DynestyTestCase(TestCase):
+    """Test the ``Dynesty`` sampler."""
+    @classmethod
+    def setUpClass(cls):
+        cls.posterior = get_posterior()
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = pathlib.Path(tmpdir.name)
+
+    def test_serial_evaluation(self):
+        """
+        Test that without a pool, each sampler evaluates its own
+        distribution, also after the run.
+        """
+        samplers = [sampling.Dynesty(self.posterior, DYNESTY_RUN_KWARGS,
+                                     sample_prior=sample_prior)
+                    for sample_prior in (False, True)]
+        for i, sampler in enumerate(samplers):
+            sampler.run(self.tmpdir/f'run{i}')
+
+        cube = np.full(len(self.posterior.prior.sampled_params), .5)
+        for sampler in samplers:
+            with self.subTest(sample_prior=sampler.sample_prior):
+                par_vals = sampler._cubetransform(cube)
+                self.assertEqual(
+                    sampler.sampler.prior_transform(cube).tolist(),
+                    par_vals.tolist())
+                self.assertEqual(
+                    sampler.sampler.loglikelihood(par_vals).val,
+                    sampler._lnprob_dynesty(par_vals)[0])
+
+    def test_telemetry(self):
+        """
+        Test that the telemetry records count every evaluation and end
+        with the final progress of the run.
+        """
+        sampler = sampling.Dynesty(self.posterior, DYNESTY_RUN_KWARGS,
+                                   telemetry_interval=.01)
+        with mock.patch.object(sampling.Dynesty, '_lnprob_dynesty',
+                               autospec=True,
+                               side_effect=sampling.Dynesty._lnprob_dynesty
+                               ) as lnprob_dynesty:
+            sampler.run(self.tmpdir)
+
+        with open(self.tmpdir/sampling.Sampler.TELEMETRY_FILENAME,
+                  encoding='utf-8') as telemetry_file:
+            records = [json.loads(line) for line in telemetry_file]
+        self.assertGreater(len(records), 1)
+        self.assertEqual([record['n_evaluations'] for record in records],
+                         sorted(record['n_evaluations'] for record in records))
+        self.assertEqual(records[-1]['n_evaluations'],
+                         lnprob_dynesty.call_count)
+        self.assertEqual(records[-1]['progress']['iteration'],
+                         sampler.sampler.it)
+
+    def test_telemetry_pool(self):
+        """
+        Test that the evaluations of pool workers are counted in the
+        telemetry of the main process, the only one writing records.
+        """
+        sampler = sampling.Dynesty(
+            self.posterior, DYNESTY_RUN_KWARGS | {'n_processes': 2},
+            telemetry_interval=.01)
+        sampler.run(self.tmpdir)
+
+        with open(self.tmpdir/sampling.Sampler.TELEMETRY_FILENAME,
+                  encoding='utf-8') as telemetry_file:
+            records = [json.loads(line) for line in telemetry_file]
+        self.assertEqual({record['pid'] for record in records},
+                         {os.getpid()})
+        # Dynesty does not count the queued evaluations it discards:
+        self.assertGreaterEqual(records[-1]['n_evaluations'],
+                                records[-1]['progress']['n_calls'])
+
+    def test_set_dynesty_functions(self):
+        """
+        Test that the functions of a ``dynesty`` sampler can be
+        replaced, and that an error is raised if its internals changed.
+        """
+        sampler = sampling.Dynesty(self.posterior, DYNESTY_RUN_KWARGS)
+        sampler.sampler = dynesty.DynamicNestedSampler(
+            lambda par_vals: 0., lambda cube: cube, 2)
+
+        sampler._set_dynesty_functions(sampler._lnprob_dynesty,
+                                       sampler._cubetransform)
+        self.assertEqual(sampler.sampler.loglikelihood.loglikelihood.func,
+                         sampler._lnprob_dynesty)
+        self.assertEqual(sampler.sampler.prior_transform.func,
+                         sampler._cubetransform)
+
+        sampler.sampler.prior_transform = sampler._cubetransform
+        with self.assertRaises(RuntimeError):
+            sampler._set_dynesty_functions(sampler._lnprob_dynesty,
+                                           sampler._cubetransform)
+
+    def test_resume(self):
+        """
+        Test that a run interrupted after a checkpoint is resumed from
+        it by default, and that it starts over if requested or if the
+        settings changed.
+        """
+        run_kwargs = DYNESTY_RUN_KWARGS | {'maxiter': 60,
+                                           'checkpoint_every': 0}
+        reference = sampling.Dynesty(self.posterior, run_kwargs)
+        reference.run(self.tmpdir/'reference')
+
+        rundir = self.tmpdir/'run'
+        lnprob_dynesty = sampling.Dynesty._lnprob_dynesty
+        n_calls = 0
+
+        def _lnprob_dynesty(sampler, par_vals):
+            nonlocal n_calls
+            n_calls += 1
+            if n_calls > 100:
+                raise KeyboardInterrupt
+            return lnprob_dynesty(sampler, par_vals)
+
+        with mock.patch.object(sampling.Dynesty, '_lnprob_dynesty',
+                               _lnprob_dynesty), \
+                self.assertRaises(KeyboardInterrupt):
+            sampling.Dynesty(self.posterior, run_kwargs).run(rundir)
+
+        checkpoint_path = rundir/sampling.Dynesty.CHECKPOINT_FILENAME
+        n_iterations = dynesty.DynamicNestedSampler.restore(
+            checkpoint_path).it
+        self.assertGreater(n_iterations, 1)
+
+        with mock.patch.object(dynesty.DynamicNestedSampler, 'restore',
+                               wraps=dynesty.DynamicNestedSampler.restore
+                               ) as restore:
+            # As a requeued job would, with the same command:
+            sampling.main(rundir, postprocess=False)
+        restore.assert_called_once()
+        resumed = dynesty.DynamicNestedSampler.restore(checkpoint_path)
+        self.assertGreater(resumed.it, n_iterations)
+        self.assertEqual(resumed.results.niter,
+                         len(sampling.read_samples(rundir)))
+
+        with mock.patch.object(dynesty.DynamicNestedSampler, 'restore',
+                               wraps=dynesty.DynamicNestedSampler.restore
+                               ) as restore:
+            sampler = utils.read_json(rundir/sampling.Sampler.JSON_FILENAME)
+            sampler.run(rundir, restart=True)
+            sampling.Dynesty(self.posterior,
+                             run_kwargs | {'maxiter': 50}).run(rundir)
+        restore.assert_not_called()
+        np.testing.assert_array_equal(sampler.sampler.results.samples,
+                                      reference.sampler.results.samples)
+
+
+class ImportanceSamplerTestCase(TestCase):
+    """Test the ``ImportanceSampler``."""
+    @classmethod
+    def setUpClass(cls):
+        cls.posterior = get_posterior(gw_prior.IntrinsicIASPrior,
+                                      'IMRPhenomXPHM')
+
+    def test_reload(self):
+        """
+        Test that samples and evidence can be loaded by a sampler
+        instantiated from the json file of a completed run.
+        """
+        sampler = sampling.ImportanceSampler(
+            self.posterior, {'log2n_batch': 3, 'max_n_batches': 2})
+        with tempfile.TemporaryDirectory() as rundir:
+            sampler.run(rundir)
+            reloaded = utils.read_json(
+                pathlib.Path(rundir, sampling.Sampler.JSON_FILENAME))
+
+            self.assertEqual(reloaded.load_evidence(),
+                             sampler.load_evidence())
+            samples = reloaded.load_samples()
+            self.assertEqual(len(samples), 2 * 2**3)
+            np.testing.assert_array_equal(samples.to_numpy(),
+                                          sampler.load_samples().to_numpy())
+
+
+class FastSlowMCMCTestCase(TestCase):
+    """Test the ``FastSlowMCMC`` sampler."""
+    @classmethod
+    def setUpClass(cls):
+        cls.posterior = get_posterior()
+
+    def test_reload(self):
+        """
+        Test that samples can be loaded by a sampler instantiated from
+        the run directory of a completed run, and that chains cache the
+        waveforms of all the unfoldings of a point without changing the
+        posterior's waveform generator.
+        """
+        sampler = sampling.FastSlowMCMC(
+            self.posterior, {'n_chains': 2, 'n_cycles': 10,
+                             'n_burnin_cycles': 10, 'n_fast_steps': 2})
+        waveform_generator = self.posterior.likelihood.waveform_generator
+        n_cached_waveforms = waveform_generator.n_cached_waveforms
+        self.assertLess(n_cached_waveforms, len(sampler._lnprob_cols))
+
+        run_chain = sampling.FastSlowMCMC._run_chain
+
+        def _run_chain(sampler, i_chain):
+            self.assertEqual(waveform_generator.n_cached_waveforms,
+                             len(sampler._lnprob_cols))
+            return run_chain(sampler, i_chain)
+
+        with tempfile.TemporaryDirectory() as rundir:
+            with mock.patch.object(sampling.FastSlowMCMC, '_run_chain',
+                                   _run_chain):
+                sampler.run(rundir)
+            self.assertEqual(waveform_generator.n_cached_waveforms,
+                             n_cached_waveforms)
+            reloaded = utils.read_json(rundir)  # Reports don't interfere
+            samples = reloaded.load_samples()
+            for filename in (sampling.Sampler.TIMING_FILENAME,
+                             sampling.FastSlowMCMC.STATS_FILENAME):
+                self.assertTrue(pathlib.Path(
+                    rundir, sampling.REPORTS_DIRNAME, filename).exists())
+
+        self.assertEqual(len(samples), 2 * 10)
+        np.testing.assert_array_equal(samples.to_numpy(),
+                                      sampler.load_samples().to_numpy())
+
+
+class MainTestCase(TestCase):
+    """Test ``sampling.main``."""
+    @classmethod
+    def setUpClass(cls):
+        cls.posterior = get_posterior()
+
+    def test_mpi_broadcasts_path(self):
+        """
+        Test that under MPI only the path to the sampler is broadcast,
+        and every rank loads the sampler from it, memory-mapping the
+        summary data of the likelihood instead of recomputing it.
+        """
+        likelihood_class = type(self.posterior.likelihood)
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                mock.patch.object(likelihood_class, '_set_summary',
+                                  autospec=True) as set_summary:
+            sampling.Dynesty(self.posterior).to_json(tmpdir)
+            sampler_path = pathlib.Path(tmpdir, 'Sampler.json').resolve()
+
+            for rank in (0, 1):
+                with self.subTest(rank=rank):
+                    comm = mock.Mock()
+                    comm.Get_rank.return_value = rank
+                    comm.bcast.side_effect = lambda obj, root=0: sampler_path
+
+                    with mock.patch.object(utils, 'get_mpi_comm',
+                                           return_value=comm), \
+                            mock.patch.object(sampling.Dynesty, 'run',
+                                              autospec=True) as run:
+                        sampling.main(
+                            str(sampler_path) if rank == 0 else 'wrong',
+                            postprocess=False)
+
+                    comm.bcast.assert_called_once()
+                    self.assertEqual(comm.bcast.call_args.args[0],
+                                     sampler_path if rank == 0 else None)
+                    sampler = run.call_args.args[0]
+                    self.assertIsInstance(sampler, sampling.Dynesty)
+                    self.assertEqual(sampler.posterior.prior.sampled_params,
+                                     self.posterior.prior.sampled_params)
+                    set_summary.assert_not_called()
+                    self.assertIsInstance(
+                        sampler.posterior.likelihood._d_h_weights, np.memmap)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Tests for the caching and parallelization utilities of `utils`."""
+
+import gc
+from unittest import TestCase, main
+import numpy as np
+
+from cogwheel import utils
+
+
+class Dummy:
+    """Class with a cached method that counts its evaluations."""
+    def __init__(self):
+        self.n_calls = 0
+
+    @utils.lru_cache(maxsize=2, invalidated_by=('test_utils',))
+    def square(self, x):
+        """Return ``x**2``."""
+        self.n_calls += 1
+        return x**2
+
+    @utils.lru_cache(maxsize=None, maxbytes=2000)
+    def zeros(self, n):
+        """Return ``np.zeros(n)``."""
+        self.n_calls += 1
+        return np.zeros(n)
+
+
+def sphere(x):
+    """Return the squared distance of `x` to ``(1, 1)``."""
+    return np.sum((np.asarray(x) - 1)**2)
+
+
+class LRUCacheTestCase(TestCase):
+    """Test scoping, eviction, invalidation and statistics of caches."""
+    def setUp(self):
+        Dummy.square.cache_clear()
+
+    def test_instance_scopes(self):
+        """Instances have separate entries that are freed with them."""
+        evictions_0 = Dummy.square.cache.evictions
+        dummy_1, dummy_2 = Dummy(), Dummy()
+        for _ in range(2):
+            self.assertEqual(dummy_1.square(3), 9)
+            self.assertEqual(dummy_2.square(3), 9)
+        self.assertEqual((dummy_1.n_calls, dummy_2.n_calls), (1, 1))
+
+        # maxsize applies per instance:
+        dummy_1.square(4)
+        dummy_1.square(5)
+        dummy_2.square(3)
+        self.assertEqual(dummy_2.n_calls, 1)
+
+        stats = Dummy.square.cache.get_stats()
+        self.assertEqual(stats['n_scopes'], 2)
+        self.assertEqual(stats['evictions'] - evictions_0, 1)
+
+        del dummy_1
+        gc.collect()
+        self.assertEqual(Dummy.square.cache.get_stats()['n_scopes'], 1)
+
+    def test_maxbytes(self):
+        """Least recently used entries are evicted to respect maxbytes."""
+        cache = utils.LRUCache('test_utils.maxbytes', maxsize=None,
+                               maxbytes=2500)
+        for key in range(3):
+            cache.set(key, np.zeros(100))  # 800 bytes each
+        cache.get(0)
+        cache.set(3, np.zeros(100))
+        self.assertIs(cache.get(1), utils.LRUCache.MISSING)
+        for key in (0, 2, 3):
+            self.assertIsNot(cache.get(key), utils.LRUCache.MISSING)
+        self.assertLessEqual(cache.get_stats()['nbytes'], 2500)
+
+        utils.set_cache_limits({'test_utils.maxbytes': {'maxbytes': 1000}})
+        self.assertEqual(cache.get_stats()['currsize'], 1)
+        with self.assertRaises(ValueError):
+            utils.set_cache_limits({'test_utils.nonexistent': {}})
+
+    def test_maxbytes_method(self):
+        """Methods with `maxbytes` are limited per instance."""
+        dummy = Dummy()
+        for n in (100, 100, 200, 100):  # 800, 800, 1600, 800 bytes
+            dummy.zeros(n)
+        self.assertEqual(dummy.n_calls, 3)
+        self.assertEqual(Dummy.zeros.cache_info().currsize, 1)
+
+    def test_set_limits(self):
+        """Caches can be resized, also from unlimited memory."""
+        name = Dummy.square.cache.name
+        self.addCleanup(utils.set_cache_limits,
+                        {name: {'maxsize': 2, 'maxbytes': None}})
+        dummy = Dummy()
+        dummy.square(2)
+        dummy.square(3)
+        utils.set_cache_limits({name: {'maxsize': 1}})
+        for x in (2, 3, 2):
+            dummy.square(x)
+        self.assertEqual(dummy.n_calls, 5)
+
+        utils.set_cache_limits({name: {'maxbytes': 100}})
+        dummy.square(3)
+        dummy.square(3)
+        self.assertEqual(dummy.n_calls, 6)
+        self.assertLessEqual(Dummy.square.cache.get_stats()['nbytes'], 100)
+
+    def test_invalidation(self):
+        """``clear_caches(tag)`` only clears caches with that tag."""
+        info_0 = Dummy.square.cache_info()
+        dummy = Dummy()
+        dummy.square(2)
+        utils.clear_caches('waveform')
+        dummy.square(2)
+        self.assertEqual(dummy.n_calls, 1)
+
+        square = dummy.square  # References see the cache cleared too
+        utils.clear_caches('test_utils')
+        square(2)
+        self.assertEqual(dummy.n_calls, 2)
+
+        info = Dummy.square.cache_info()
+        self.assertEqual((info.hits - info_0.hits,
+                          info.misses - info_0.misses), (1, 2))
+        self.assertIn(Dummy.square.cache.name, utils.get_cache_stats())
+
+
+class PoolVectorizeTestCase(TestCase):
+    """Test evaluation of functions in a pool of spawned processes."""
+    def test_pool_vectorize(self):
+        """The pool can be reused to evaluate multiple batches."""
+        points = np.arange(12.).reshape(3, 4)
+        with utils.pool_vectorize(sphere, 2) as vectorized_sphere:
+            for _ in range(2):
+                np.testing.assert_array_equal(
+                    vectorized_sphere(points),
+                    np.sum((points - 1)**2, axis=0))
+
+    def test_differential_evolution(self):
+        """Differential evolution evaluated in parallel converges."""
+        result = utils.differential_evolution(
+            sphere, [(-2, 2), (-2, 2)], guesses=[0, 0], seed=0,
+            n_processes=2)
+        np.testing.assert_allclose(result.x, [1, 1], atol=1e-3)
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,24 @@
 """Utility functions."""
 
+import collections
+import contextlib
 import functools
+import hashlib
 import importlib
 import inspect
 import json
+import multiprocessing
 import os
 import pathlib
 import re
+import shutil
 import sys
 import tempfile
 import textwrap
+import threading
+import time
+import types
+import weakref
 import numpy as np
 from scipy.optimize import _differentialevolution
 from scipy.special import logsumexp
@@ -34,6 +43,42 @@ class ClassProperty:
         return self.func(cls)
 
 
+def differential_evolution(func, bounds, guesses=None, n_processes=1,
+                           **kwargs):
+    """
+    Wrapper of `scipy.optimize.differential_evolution()` that can
+    incorporate initial guesses passed by the user and evaluate the
+    population in parallel.
+
+    Parameters
+    ----------
+    func, bounds: See `scipy.optimize.differential_evolution()` docs.
+    guesses: nguesses x nparameters array with initial guesses, or
+             ``None``. They will be appended to the initial population
+             of differential evolution. Can be a 1d array for one
+             guess.
+    n_processes: int, if larger than 1, each generation of the
+                 population is evaluated in parallel by a pool of
+                 processes (see ``pool_vectorize``), which requires
+                 `func` to be picklable. Implies
+                 ``updating='deferred'``. To reuse the pool for
+                 multiple optimizations, use ``pool_vectorize`` and
+                 pass the vectorized function with ``vectorized=True``
+                 instead.
+    **kwargs: Passed to `scipy.optimize.differential_evolution()`.
+    """
+    if n_processes == 1:
+        with _DifferentialEvolutionSolverWithGuesses(func, bounds, guesses,
+                                                     **kwargs) as solver:
+            return solver.solve()
+
+    with pool_vectorize(func, n_processes) as vectorized_func, \
+            _DifferentialEvolutionSolverWithGuesses(
+                vectorized_func, bounds, guesses, vectorized=True,
+                updating='deferred', **kwargs) as solver:
+        return solver.solve()
+
+
 def differential_evolution_with_guesses(
         func, bounds, guesses, **kwargs):
     """
@@ -46,11 +91,9 @@ def differential_evolution_with_guesses(
     guesses: nguesses x nparameters array with initial guesses.
              They will be appended to the initial population of
              differential evolution. Can be a 1d array for one guess.
-    **kwargs: Passed to `scipy.optimize.differential_evolution()`.
+    **kwargs: Passed to `differential_evolution()`.
     """
-    with _DifferentialEvolutionSolverWithGuesses(func, bounds, guesses,
-                                                 **kwargs) as solver:
-        return solver.solve()
+    return differential_evolution(func, bounds, guesses, **kwargs)
 
 
 class _DifferentialEvolutionSolverWithGuesses(
@@ -58,35 +101,577 @@ class _DifferentialEvolutionSolverWithGuesses(
     """
     Class that implements `differential_evolution_with_guesses()`.
     """
-    def __init__(self, func, bounds, guesses, **kwargs):
+    def __init__(self, func, bounds, guesses=None, **kwargs):
+        if 'seed' in kwargs and 'seed' not in inspect.signature(
+                super().__init__).parameters:
+            kwargs['rng'] = kwargs.pop('seed')  # Renamed in scipy 1.15
         super().__init__(func, bounds, **kwargs)
-        initial_pop = self._scale_parameters(self.population)
-        population = np.vstack((initial_pop, guesses))
-        self.init_population_array(population)
+        if guesses is not None:
+            initial_pop = self._scale_parameters(self.population)
+            population = np.vstack((initial_pop, guesses))
+            self.init_population_array(population)
+
+
+# Function evaluated by ``_call_worker_function`` in pool processes.
+# Set by ``_init_worker_function``.
+_worker_function = None
+
+
+def _init_worker_function(function):
+    """Initializer for the processes of ``pool_vectorize``."""
+    global _worker_function
+    _worker_function = function
+
 
+def _call_worker_function(arg):
+    """Picklable proxy to the function set by ``_init_worker_function``."""
+    return _worker_function(arg)
 
-cached_functions_registry = []
 
+@contextlib.contextmanager
+def pool_vectorize(function, n_processes):
+    """
+    Context manager that yields a vectorized version of `function`,
+    that takes an array of shape ``(n_params, n_points)`` and returns
+    an array with `function` evaluated at each of the `n_points`,
+    distributed over `n_processes`.
+
+    The processes are spawned (not forked, which is unsafe if threads
+    are running) when entering the context, and `function` is sent to
+    each of them once, by the pool initializer. Thus `function` needs
+    to be picklable (e.g. a bound method, or a ``functools.partial``
+    of one), and changes to its state made within the context are not
+    seen by the processes. Use the pool for as many evaluations as
+    possible, since starting it has an overhead.
+    Scripts using this need an ``if __name__ == '__main__'`` guard.
+    """
+    with multiprocessing.get_context('spawn').Pool(
+            n_processes, initializer=_init_worker_function,
+            initargs=(function,)) as pool:
+        yield lambda points: np.array(
+            pool.map(_call_worker_function, np.transpose(points)))
+
+
+# ----------------------------------------------------------------------
+# Caching:
 
-def lru_cache(*args, **kwargs):
+# Instances of ``LRUCache``, so they can be queried (``get_cache_stats``),
+# resized (``set_cache_limits``) and cleared (``clear_caches``):
+cache_registry = []
+
+
+def get_nbytes(obj):
     """
-    Decorator like `functools.lru_cache` that also registers the
-    decorated function in ``cached_functions_registry`` so all caches
-    can easily be cleared with ``clear_caches()``.
+    Return an estimate of the memory used by `obj` (bytes), including
+    the numpy arrays it contains (in tuples, lists or dicts).
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(map(get_nbytes, obj))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(map(get_nbytes, obj.values()))
+    return sys.getsizeof(obj)
+
+
+class _CacheScope:
+    """
+    Entries of an ``LRUCache`` that belong to one scope: either in
+    `entries`, or in the ``functools.lru_cache`` of `function`.
+    """
+    __slots__ = ('entries', 'nbytes', 'function')
+
+    def __init__(self):
+        self.entries = collections.OrderedDict()  # {key: (value, nbytes)}
+        self.nbytes = 0
+        self.function = None
+
+
+def _call_with_weakref(instance_ref, function, *args, **kwargs):
+    """Call `function` with the referent of `instance_ref` as ``self``."""
+    return function(instance_ref(), *args, **kwargs)
+
+
+class LRUCache:
+    """
+    Least-recently-used cache, bounded by number of entries and/or
+    memory, with hit, miss and eviction counters.
+
+    Entries can be scoped to an instance (e.g. the ``self`` of a cached
+    method): each instance gets its own entries, limits apply per
+    scope, and the entries are released when the instance is garbage
+    collected. Entries without scope are shared.
+
+    Values are stored with ``set`` and retrieved with ``get``.
+    Alternatively, if there is no `maxbytes` limit, ``get_function``
+    returns a function wrapped with ``functools.lru_cache``, which is
+    faster since hits do not run Python code.
+
+    Caches are registered in ``cache_registry``.
+    """
+    MISSING = object()  # Returned by ``get`` if `key` is not cached
+
+    def __init__(self, name, maxsize=128, maxbytes=None,
+                 invalidated_by=()):
+        """
+        Parameters
+        ----------
+        name: str
+            Identifies the cache in ``get_cache_stats`` and
+            ``set_cache_limits``.
+
+        maxsize: int or None
+            Maximum number of entries per scope, ``None`` for no limit.
+
+        maxbytes: int or None
+            Maximum memory of the entries per scope (bytes) as
+            estimated by ``get_nbytes``, ``None`` for no limit.
+            Memory is only estimated if there is a limit.
+
+        invalidated_by: sequence of str
+            Tags such that ``clear_caches(tag)`` clears this cache.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.invalidated_by = frozenset(invalidated_by)
+
+        # Counts of ``get`` and ``set``, plus those of ``functools``
+        # caches when cleared. Updated without lock, so they can be
+        # slightly off under concurrency:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._shared_scope = _CacheScope()
+        self._instance_scopes = {}  # {id(instance): _CacheScope}
+        self._lock = threading.RLock()
+        cache_registry.append(self)
+
+    def _get_scope(self, instance):
+        if instance is None:
+            return self._shared_scope
+        return (self._instance_scopes.get(id(instance))
+                or self._add_scope(instance))
+
+    def _add_scope(self, instance):
+        # Raises TypeError if `instance` is not weakref-able:
+        weakref.finalize(instance, self._drop_scope, id(instance))
+        return self._instance_scopes.setdefault(id(instance), _CacheScope())
+
+    def _drop_scope(self, instance_id):
+        if (scope := self._instance_scopes.pop(instance_id, None)) is not None:
+            self._clear_scope(scope)
+
+    def _get_scopes(self):
+        return [self._shared_scope, *self._instance_scopes.values()]
+
+    def _clear_scope(self, scope):
+        """
+        Clear the entries of `scope`, adding the counts of its
+        ``functools`` cache to the totals. The function is kept, so
+        references to it remain valid.
+        """
+        with self._lock:
+            scope.entries.clear()
+            scope.nbytes = 0
+            if scope.function is not None:
+                info = scope.function.cache_info()
+                scope.function.cache_clear()
+                self.hits += info.hits
+                self.misses += info.misses
+                self.evictions += info.misses - info.currsize
+
+    def get(self, key, instance=None):
+        """Return the cached value or ``LRUCache.MISSING``."""
+        if instance is None:
+            entries = self._shared_scope.entries
+        else:  # Inlined ``_get_scope``, this is the hot path
+            entries = (self._instance_scopes.get(id(instance))
+                       or self._add_scope(instance)).entries
+
+        entry = entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return self.MISSING
+        try:
+            entries.move_to_end(key)
+        except KeyError:  # Evicted by another thread
+            pass
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, instance=None):
+        """Cache `value` under `key` and apply the size limits."""
+        scope = self._get_scope(instance)
+        nbytes = 0 if self.maxbytes is None else get_nbytes(value)
+        with self._lock:
+            if key in scope.entries:
+                scope.nbytes -= scope.entries.pop(key)[1]
+            scope.entries[key] = value, nbytes
+            scope.nbytes += nbytes
+            self._evict(scope)
+
+    def get_function(self, function, instance=None, typed=False):
+        """
+        Return `function` wrapped with a ``functools.lru_cache`` of
+        size `maxsize`, that stores its entries in the scope of
+        `instance`. If `instance` is passed, it is bound to `function`
+        as first argument without keeping it alive.
+        Only to be used if `maxbytes` is ``None``. Raise ``TypeError``
+        if `instance` is not weakref-able.
+        """
+        if instance is None:
+            scope = self._shared_scope
+        else:
+            scope = (self._instance_scopes.get(id(instance))
+                     or self._add_scope(instance))
+        if (cached_function := scope.function) is None:
+            if instance is not None:
+                function = functools.partial(
+                    _call_with_weakref, weakref.ref(instance), function)
+            cached_function = functools.lru_cache(self.maxsize, typed)(
+                function)
+            scope.function = cached_function
+        return cached_function
+
+    def _evict(self, scope):
+        while scope.entries and (
+                (self.maxsize is not None
+                 and len(scope.entries) > self.maxsize)
+                or (self.maxbytes is not None
+                    and scope.nbytes > self.maxbytes)):
+            scope.nbytes -= scope.entries.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def set_limits(self, maxsize=MISSING, maxbytes=MISSING):
+        """
+        Update `maxsize` and/or `maxbytes`, evicting as needed.
+        Functions from ``get_function`` are cleared and replaced, since
+        the size of a ``functools.lru_cache`` cannot change.
+        """
+        with self._lock:
+            if maxsize is not self.MISSING:
+                self.maxsize = maxsize
+            if maxbytes is not self.MISSING:
+                if self.maxbytes is None and maxbytes is not None:
+                    self._measure_entries()
+                self.maxbytes = maxbytes
+            for scope in self._get_scopes():
+                if scope.function is not None:
+                    self._clear_scope(scope)
+                    scope.function = None
+                self._evict(scope)
+
+    def _measure_entries(self):
+        """Estimate the memory of entries set without `maxbytes`."""
+        for scope in self._get_scopes():
+            for key, (value, _) in scope.entries.items():
+                scope.entries[key] = value, get_nbytes(value)
+            scope.nbytes = sum(nbytes for _, nbytes
+                               in scope.entries.values())
+
+    def clear(self, instance=None):
+        """
+        Clear the entries scoped to `instance`, or all entries if
+        `instance` is ``None``.
+        """
+        if instance is not None:
+            scopes = [self._instance_scopes.get(id(instance))]
+        else:
+            scopes = self._get_scopes()
+        for scope in scopes:
+            if scope is not None:
+                self._clear_scope(scope)
+
+    def get_stats(self):
+        """
+        Return dictionary with the cache limits, current size and
+        cumulative hits, misses and evictions. The memory used
+        (``'nbytes'``) is ``None`` if there is no `maxbytes` limit.
+        """
+        hits, misses, evictions = self.hits, self.misses, self.evictions
+        currsize = 0
+        scopes = self._get_scopes()
+        for scope in scopes:
+            currsize += len(scope.entries)
+            if (function := scope.function) is not None:
+                info = function.cache_info()
+                hits += info.hits
+                misses += info.misses
+                evictions += info.misses - info.currsize
+                currsize += info.currsize
+        return {'hits': hits,
+                'misses': misses,
+                'evictions': evictions,
+                'n_scopes': len(self._instance_scopes),
+                'currsize': currsize,
+                'nbytes': (None if self.maxbytes is None
+                           else sum(scope.nbytes for scope in scopes)),
+                'maxsize': self.maxsize,
+                'maxbytes': self.maxbytes}
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class CachedFunction:
+    """
+    Function wrapper that caches its return values in an
+    ``LRUCache``, see ``lru_cache``. When used as a method, entries are
+    scoped to the instance.
+
+    Without `maxbytes`, calls go to a ``functools.lru_cache`` from
+    ``LRUCache.get_function``; for methods, attribute access already
+    returns it, so hits have no Python overhead.
+    """
+    _KWARGS_MARK = object()
+
+    def __init__(self, function, maxsize=128, maxbytes=None, typed=False,
+                 invalidated_by=()):
+        functools.update_wrapper(self, function)
+        self.typed = typed
+        self.cache = LRUCache(f'{function.__module__}.{function.__qualname__}',
+                              maxsize, maxbytes, invalidated_by)
+        self._is_method = False
+
+    def __set_name__(self, owner, name):
+        """Called when defined in a class body: scope to instances."""
+        self._is_method = True
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.cache.maxbytes is None:
+            # Inlined ``LRUCache.get_function``, this is the hot path
+            scope = self.cache._instance_scopes.get(id(instance))
+            if scope is not None and scope.function is not None:
+                return scope.function
+            try:
+                return self.cache.get_function(self.__wrapped__, instance,
+                                               self.typed)
+            except TypeError:  # `instance` is not weakref-able
+                pass
+        return types.MethodType(self, instance)
+
+    def __reduce__(self):
+        return self.__qualname__  # Pickle by reference
+
+    def __call__(self, *args, **kwargs):
+        if self.cache.maxbytes is None:
+            if self._is_method or (
+                    function := self.cache._shared_scope.function) is None:
+                function, args = self._get_function(args)
+            return function(*args, **kwargs)
+
+        if self._is_method and args:
+            instance, key = args[0], args[1:]
+        else:
+            instance, key = None, args
+        if kwargs:
+            key += (self._KWARGS_MARK, *kwargs.items())
+        if self.typed:
+            key += tuple(map(type, key))
+
+        try:
+            value = self.cache.get(key, instance)
+        except TypeError:  # `instance` is not weakref-able
+            instance, key = None, (args[0], *key)
+            value = self.cache.get(key)
+
+        if value is LRUCache.MISSING:
+            value = self.__wrapped__(*args, **kwargs)
+            self.cache.set(key, value, instance)
+        return value
+
+    def _get_function(self, args):
+        """
+        Return the ``functools``-cached function to call with `args`
+        and the arguments to pass it. Methods called through the class
+        (e.g. ``Class.method(instance, ...)``) get the function of the
+        instance's scope, which binds the instance.
+        """
+        if self._is_method and args:
+            try:
+                return self.cache.get_function(
+                    self.__wrapped__, args[0], self.typed), args[1:]
+            except TypeError:  # `instance` is not weakref-able
+                pass
+        return (self.cache.get_function(self.__wrapped__, typed=self.typed),
+                args)
+
+    def cache_clear(self, instance=None):
+        """
+        Clear the cache of `instance`, or all the cache if `instance`
+        is ``None``.
+        """
+        self.cache.clear(instance)
+
+    def cache_info(self):
+        """Return cache statistics, like ``functools.lru_cache``."""
+        stats = self.cache.get_stats()
+        return CacheInfo(stats['hits'], stats['misses'], stats['maxsize'],
+                         stats['currsize'])
+
+
+def lru_cache(maxsize=128, maxbytes=None, typed=False, invalidated_by=()):
+    """
+    Decorator like `functools.lru_cache`, that also limits memory and
+    registers the cache in ``cache_registry`` so caches can be
+    queried, resized and cleared.
+
+    If the decorated function is defined in a class body, it is cached
+    separately for each instance, so that caches do not keep
+    instances alive and a large cache in one instance does not evict
+    entries of the others.
+
+    Parameters
+    ----------
+    maxsize: int or None
+        Maximum number of cached values (per instance for methods).
+
+    maxbytes: int or None
+        Maximum memory of the cached values (per instance for methods)
+        in bytes, as estimated by ``get_nbytes``. If ``None``, values
+        are cached by ``functools.lru_cache`` with no overhead.
+
+    typed: bool
+        Whether to cache arguments of different types separately.
+
+    invalidated_by: sequence of str
+        Tags, ``clear_caches(tag)`` will clear caches with a matching
+        tag. E.g. caches that depend on the settings of a
+        ``WaveformGenerator`` are tagged ``'waveform'``.
     """
     def decorator(function):
-        function = functools.lru_cache(*args, **kwargs)(function)
-        cached_functions_registry.append(function)
-        return function
+        return CachedFunction(function, maxsize, maxbytes, typed,
+                              invalidated_by)
     return decorator
 
 
-def clear_caches():
+def clear_caches(*tags, instance=None):
     """
-    Clear caches of functions decorated with ``lru_cache``.
+    Clear caches in ``cache_registry``.
+
+    Parameters
+    ----------
+    *tags: str
+        Only clear caches with a matching `invalidated_by` tag. By
+        default all caches are cleared.
+
+    instance: object, optional
+        Only clear the entries scoped to this instance.
     """
-    for function in cached_functions_registry:
-        function.cache_clear()
+    for cache in cache_registry:
+        if not tags or cache.invalidated_by.intersection(tags):
+            cache.clear(instance)
+
+
+def get_cache_stats():
+    """
+    Return dictionary with the statistics of the caches in
+    ``cache_registry`` (see ``LRUCache.get_stats``), by name.
+    """
+    return {cache.name: cache.get_stats() for cache in cache_registry}
+
+
+def dump_cache_stats(path=None):
+    """
+    Write the output of ``get_cache_stats`` to a json file, or print a
+    summary of the caches that were used if `path` is ``None``.
+    """
+    stats = get_cache_stats()
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as stats_file:
+            json.dump(stats, stats_file, indent=2)
+        return
+
+    print(f'{"cache":<60} {"hits":>9} {"misses":>9} {"evicted":>9} '
+          f'{"size":>6} {"MiB":>8}')
+    for name, cache_stats in stats.items():
+        if cache_stats['hits'] + cache_stats['misses']:
+            mib = ('-' if cache_stats['nbytes'] is None
+                   else f'{cache_stats["nbytes"] / 2**20:.2f}')
+            print(f'{name[-60:]:<60} {cache_stats["hits"]:>9} '
+                  f'{cache_stats["misses"]:>9} {cache_stats["evictions"]:>9} '
+                  f'{cache_stats["currsize"]:>6} {mib:>8}')
+
+
+def set_cache_limits(limits):
+    """
+    Resize caches, e.g. to adapt them to the available memory.
+
+    Parameters
+    ----------
+    limits: dict
+        Of the form ``{name: {'maxsize': int, 'maxbytes': int}}`` where
+        `name` is a key of the output of ``get_cache_stats``, and
+        either of 'maxsize' or 'maxbytes' can be omitted.
+    """
+    caches = {cache.name: cache for cache in cache_registry}
+    if missing := limits.keys() - caches.keys():
+        raise ValueError(f'Unknown caches: {missing}')
+    for name, cache_limits in limits.items():
+        caches[name].set_limits(**cache_limits)
+
+
+class StageTimer:
+    """
+    Aggregate the number of calls and wall time spent in different
+    stages of a computation (e.g. waveform generation, marginalization).
+    Functions are assigned to a stage with the ``timed`` decorator.
+    Times are exclusive, i.e. time spent in a nested stage is not
+    counted in the outer stage.
+    Timing is only active within the ``record`` context, otherwise the
+    overhead of ``timed`` functions is negligible.
+    """
+    active = False
+    timings = {}  # {stage: {'n_calls': int, 'time': float}}
+    _nested_times = []  # Time spent in nested stages, by depth
+
+    @classmethod
+    @contextlib.contextmanager
+    def record(cls):
+        """
+        Context manager that resets and activates timing, yields the
+        ``timings`` dictionary.
+        """
+        cls.timings = {}
+        cls._nested_times = []
+        cls.active = True
+        try:
+            yield cls.timings
+        finally:
+            cls.active = False
+
+
+def timed(stage):
+    """
+    Decorator that accumulates the calls and wall time of the decorated
+    function in ``StageTimer.timings[stage]`` when timing is active.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def new_function(*args, **kwargs):
+            if not StageTimer.active:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+            StageTimer._nested_times.append(0.)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested_time = StageTimer._nested_times.pop()
+                if StageTimer._nested_times:
+                    StageTimer._nested_times[-1] += elapsed
+                timing = StageTimer.timings.setdefault(
+                    stage, {'n_calls': 0, 'time': 0.})
+                timing['n_calls'] += 1
+                timing['time'] += elapsed - nested_time
+        return new_function
+    return decorator
 
 
 def mod(value, start=0, period=2*np.pi):
@@ -282,10 +867,31 @@ def handle_scalars(function):
     return new_function
 
 
+def get_mpi_comm():
+    """
+    Return the MPI world communicator if the program was launched
+    with multiple MPI processes (e.g. by ``srun`` or ``mpirun``) and
+    ``mpi4py`` is installed, otherwise ``None``.
+    """
+    try:
+        from mpi4py import MPI  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    if MPI.COMM_WORLD.Get_size() == 1:
+        return None
+    return MPI.COMM_WORLD
+
+
+def get_mpi_rank():
+    """Return the MPI rank of this process, 0 if not using MPI."""
+    comm = get_mpi_comm()
+    return 0 if comm is None else comm.Get_rank()
+
 
 def submit_slurm(job_name, n_hours_limit, stdout_path, stderr_path,
                  args='', sbatch_cmds=(), batch_path=None,
-                 multithreading=False):
+                 multithreading=False, n_tasks=1):
     """
     Generic function to submit a job using slurm.
     This function is intended to be called from other modules rather
@@ -321,6 +927,11 @@ def submit_slurm(job_name, n_hours_limit, stdout_path, stderr_path,
         Whether to enable automatic OMP multithreading. Defaults to
         ``False`` because multithreading is found to be slower
         despite using more resources.
+
+    n_tasks: int
+        Number of tasks that ``srun`` launches. Values larger than 1
+        run the calling module as an MPI program (requires
+        ``mpi4py``).
     """
     cogwheel_dir = pathlib.Path(__file__).parents[1].resolve()
     module = inspect.getmodule(inspect.stack()[1].frame).__name__
@@ -340,6 +951,7 @@ def submit_slurm(job_name, n_hours_limit, stdout_path, stderr_path,
         #SBATCH --error={stderr_path}
         #SBATCH --open-mode=append
         #SBATCH --time={n_hours_limit:02}:00:00
+        #SBATCH --ntasks={n_tasks}
         {sbatch_lines}
 
         eval "$(conda shell.bash hook)"
@@ -524,6 +1136,72 @@ def sorted_rundirs(rundirs):
 
 class_registry = {}
 
+# Directories where `CogwheelEncoder` saves ``EventData`` instances and
+# the arrays returned by ``JSONMixin.get_artifacts``, under a hash of
+# their contents so that json files can share them:
+EVENT_DATA_STORE_DIRNAME = 'event_data_store'
+ARTIFACT_STORE_DIRNAME = 'artifact_store'
+
+# Root of the stores. If ``None``, each json file keeps its stores in
+# its own directory, so that the directory is self-contained. Set it
+# (or the environment variable ``COGWHEEL_CACHE``) to a directory
+# shared by e.g. an event directory and its rundirs so they share a
+# single copy of the data; json files then refer to the stores by
+# absolute path.
+STORE_DIR = os.environ.get('COGWHEEL_CACHE')
+
+
+def get_arrays_hash(arrays):
+    """
+    Return a hex digest that identifies the contents of a dictionary
+    of arrays.
+    """
+    sha1 = hashlib.sha1()
+    for key, val in sorted(arrays.items()):
+        val = np.ascontiguousarray(val)
+        sha1.update(f'{key}{val.dtype}{val.shape}'.encode())
+        sha1.update(val.data)
+    return sha1.hexdigest()
+
+
+def save_arrays(dirname, arrays, *, dir_permissions=DIR_PERMISSIONS,
+                file_permissions=FILE_PERMISSIONS):
+    """
+    Save a dictionary of arrays as a directory with one ``.npy`` file
+    per array, that can be loaded with ``load_arrays``.
+    The directory is written atomically; if it exists, nothing is
+    done.
+    """
+    dirname = pathlib.Path(dirname)
+    if dirname.exists():
+        return
+
+    mkdirs(dirname.parent, dir_permissions)
+    tmpdir = pathlib.Path(tempfile.mkdtemp(dir=dirname.parent,
+                                           prefix=f'.{dirname.name}.'))
+    for key, val in arrays.items():
+        np.save(tmpdir/f'{key}.npy', val)
+        (tmpdir/f'{key}.npy').chmod(file_permissions)
+    tmpdir.chmod(dir_permissions)
+    try:
+        tmpdir.rename(dirname)
+    except OSError:  # Written concurrently by another process
+        shutil.rmtree(tmpdir)
+        if not dirname.exists():
+            raise
+
+
+def load_arrays(dirname, mmap_mode='r'):
+    """
+    Return dictionary of arrays saved with ``save_arrays``. By default
+    arrays are memory-mapped read-only, so that processes loading the
+    same directory share memory. With ``mmap_mode='c'``
+    (copy-on-write) memory is shared too, but the arrays can be edited
+    in place without changing the files.
+    """
+    return {path.stem: np.load(path, mmap_mode=mmap_mode)
+            for path in sorted(pathlib.Path(dirname).glob('*.npy'))}
+
 
 def read_json(json_path):
     """
@@ -557,13 +1235,22 @@ class JSONMixin:
 
     Define a method `reinstantiate` that allows to safely modify
     attributes defined at init.
+
+    Subclasses whose instantiation is expensive can override
+    `get_artifacts` and `from_artifacts`: the arrays they precompute
+    are then saved once to a content-addressed store (see
+    ``STORE_DIR``), and memory-mapped instead of recomputed on load.
     """
     def to_json(self, dirname, basename=None, *,
                 dir_permissions=DIR_PERMISSIONS,
-                file_permissions=FILE_PERMISSIONS, overwrite=False):
+                file_permissions=FILE_PERMISSIONS, overwrite=False,
+                store_dir=None):
         """
         Write class instance to json file.
         It can then be loaded with `read_json`.
+        ``EventData`` and artifacts are saved to content-addressed
+        stores in `store_dir`, which defaults to ``STORE_DIR`` if set,
+        otherwise to `dirname`.
         """
         basename = basename or f'{self.__class__.__name__}.json'
         filepath = pathlib.Path(dirname)/basename
@@ -576,6 +1263,8 @@ class JSONMixin:
 
         with open(filepath, 'w', encoding='utf-8') as outfile:
             json.dump(self, outfile, cls=CogwheelEncoder, dirname=dirname,
+                      store_dir=store_dir or STORE_DIR,
+                      dir_permissions=dir_permissions,
                       file_permissions=file_permissions, overwrite=overwrite,
                       indent=2)
         filepath.chmod(file_permissions)
@@ -599,6 +1288,24 @@ class JSONMixin:
                 '(or store its init parameters with the same names).')
         return {key: getattr(self, key) for key in keys}
 
+    def get_artifacts(self):
+        """
+        Return dictionary of arrays that are expensive to compute from
+        the init parameters and that ``from_artifacts`` can use to
+        instantiate the class faster, or ``None``. This template
+        returns ``None``.
+        """
+        return None
+
+    @classmethod
+    def from_artifacts(cls, init_kwargs, artifacts):
+        """
+        Return a class instance given keyword arguments to `__init__`
+        and the output of ``get_artifacts``. This template ignores
+        `artifacts`.
+        """
+        return cls(**init_kwargs)
+
     def reinstantiate(self, **new_init_kwargs):
         """
         Return an new instance of the current instance's class, with an
@@ -647,11 +1354,15 @@ class CogwheelEncoder(NumpyEncoder):
     Encoder for classes in the `cogwheel` package that subclass
     `JSONMixin`.
     """
-    def __init__(self, dirname=None, file_permissions=FILE_PERMISSIONS,
-                 overwrite=False, **kwargs):
+    def __init__(self, dirname=None, store_dir=None,
+                 dir_permissions=DIR_PERMISSIONS,
+                 file_permissions=FILE_PERMISSIONS, overwrite=False,
+                 **kwargs):
         super().__init__(**kwargs)
 
         self.dirname = dirname
+        self.store_dir = store_dir
+        self.dir_permissions = dir_permissions
         self.file_permissions = file_permissions
         self.overwrite = overwrite
 
@@ -662,19 +1373,46 @@ class CogwheelEncoder(NumpyEncoder):
             module = spec.name
         return module
 
+    def _get_store_path(self, store_dirname, key):
+        """
+        Return the path to the entry `key` of a content-addressed store
+        and the path by which the json file refers to it: relative if
+        the store is in the json's directory, so the directory can be
+        moved, otherwise absolute.
+        """
+        if self.store_dir is None:
+            path = pathlib.Path(store_dirname, key)
+            return pathlib.Path(self.dirname)/path, path.as_posix()
+
+        path = pathlib.Path(self.store_dir).resolve()/store_dirname/key
+        return path, path.as_posix()
+
     def default(self, o):
         if o.__class__.__name__ == 'EventData':
-            filename = os.path.join(self.dirname, f'{o.eventname}.npz')
-            o.to_npz(filename=filename, overwrite=self.overwrite,
-                     permissions=self.file_permissions)
+            path, reference = self._get_store_path(
+                EVENT_DATA_STORE_DIRNAME,
+                f'{o.eventname}_{o.get_content_hash()[:16]}')
+            if not path.exists():
+                o.to_npy_dir(path, dir_permissions=self.dir_permissions,
+                             file_permissions=self.file_permissions)
             return {'__cogwheel_class__': o.__class__.__name__,
                     '__module__': self._get_module_name(o),
-                    'filename': os.path.basename(filename)}
+                    'path': reference}
 
         if o.__class__.__name__ in class_registry:
-            return {'__cogwheel_class__': o.__class__.__name__,
-                    '__module__': self._get_module_name(o),
-                    'init_kwargs': o.get_init_dict()}
+            dic = {'__cogwheel_class__': o.__class__.__name__,
+                   '__module__': self._get_module_name(o),
+                   'init_kwargs': o.get_init_dict()}
+
+            if (artifacts := o.get_artifacts()) is not None:
+                path, dic['artifacts'] = self._get_store_path(
+                    ARTIFACT_STORE_DIRNAME,
+                    f'{o.__class__.__name__}_'
+                    f'{get_arrays_hash(artifacts)[:16]}')
+                save_arrays(path, artifacts,
+                            dir_permissions=self.dir_permissions,
+                            file_permissions=self.file_permissions)
+            return dic
 
         return super().default(o)
 
@@ -693,7 +1431,19 @@ class CogwheelDecoder(json.JSONDecoder):
             importlib.import_module(obj['__module__'])
             cls = class_registry[obj['__cogwheel_class__']]
             if cls.__name__ == 'EventData':
+                if 'path' in obj:
+                    return cls.from_npy_dir(os.path.join(self.dirname,
+                                                         obj['path']))
+                # Legacy format
                 return cls.from_npz(filename=os.path.join(self.dirname,
                                                           obj['filename']))
+            if 'artifacts' in obj:
+                artifacts_path = os.path.join(self.dirname, obj['artifacts'])
+                if os.path.isdir(artifacts_path):
+                    # Copy-on-write, so instances can be edited in place
+                    # while sharing memory until then:
+                    return cls.from_artifacts(
+                        obj['init_kwargs'],
+                        load_arrays(artifacts_path, mmap_mode='c'))
             return cls(**obj['init_kwargs'])
         return obj
@@ -106,6 +106,7 @@ def within_bounds(par_dic: dict) -> bool:
            )
 
 
+@utils.timed('waveform')
 def compute_hplus_hcross(f, par_dic, approximant: str,
                          harmonic_modes=None, lal_dic=None):
     """
@@ -268,7 +269,7 @@ class WaveformGenerator(utils.JSONMixin):
         if self.harmonic_modes != old_harmonic_modes:
             print(f'`approximant` changed to {approximant!r}, setting'
                   f'`harmonic_modes` to {self.harmonic_modes}.')
-        utils.clear_caches()
+        utils.clear_caches('waveform')
 
     @property
     def harmonic_modes(self):
@@ -294,7 +295,7 @@ class WaveformGenerator(utils.JSONMixin):
         self._harmonic_modes_by_m = defaultdict(list)
         for l, m in self._harmonic_modes:
             self._harmonic_modes_by_m[m].append((l, m))
-        utils.clear_caches()
+        utils.clear_caches('waveform')
 
     @property
     def n_cached_waveforms(self):
@@ -324,7 +325,7 @@ class WaveformGenerator(utils.JSONMixin):
     @lalsimulation_commands.setter
     def lalsimulation_commands(self, lalsimulation_commands):
         self._lalsimulation_commands = lalsimulation_commands
-        utils.clear_caches()
+        utils.clear_caches('waveform')
 
     def get_m_mprime_inds(self):
         """
@@ -387,7 +388,7 @@ class WaveformGenerator(utils.JSONMixin):
 
         # shifts shape: (n_detectors, n_frequencies)
         if not np.array_equal(f, self._cached_f):
-            self._get_shifts.cache_clear()
+            WaveformGenerator._get_shifts.cache_clear(self)
             self._cached_f = f
         shifts = self._get_shifts(par_dic['ra'], par_dic['dec'],
                                   par_dic['t_geocenter'])